@@ -0,0 +1,161 @@
+"""
+Activity log for Law Office Management System
+
+An append-only record of who created, changed or deleted what. Entries are
+buffered and written in batches; the dashboard reads the newest few with a
+keyset query. Entries older than ACTIVITY_LOG_RETENTION_DAYS are rolled up
+into per-day counts and removed, so the table stays small.
+"""
+import atexit
+import threading
+from datetime import datetime, timezone
+from config import (ACTIVITY_LOG_BATCH_SIZE, ACTIVITY_LOG_FLUSH_INTERVAL,
+                    ACTIVITY_LOG_RETENTION_DAYS, ACTIVITY_FEED_SIZE)
+
+ACTIONS = ('create', 'update', 'delete')
+
+def create_activity_log(conn):
+    """Create the activity log and rollup tables"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS activity_log (
+            id INTEGER PRIMARY KEY,
+            created_at TIMESTAMP NOT NULL,
+            user_id INTEGER,
+            entity_type TEXT NOT NULL,
+            entity_id INTEGER,
+            action TEXT NOT NULL CHECK (action IN ('create', 'update', 'delete')),
+            description TEXT,
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )
+    ''')
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_activity_log_created_at ON activity_log (created_at)")
+
+    # Per-day counts of entries that were pruned
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS activity_rollup (
+            day DATE NOT NULL,
+            entity_type TEXT NOT NULL,
+            action TEXT NOT NULL,
+            count INTEGER NOT NULL,
+            PRIMARY KEY (day, entity_type, action)
+        ) WITHOUT ROWID
+    ''')
+
+def write_entries(conn, entries):
+    """Insert (created_at, user_id, entity_type, entity_id, action, description) rows"""
+    conn.executemany('''
+        INSERT INTO activity_log (created_at, user_id, entity_type, entity_id, action, description)
+        VALUES (?, ?, ?, ?, ?, ?)
+    ''', entries)
+
+def fetch_recent(conn, limit=ACTIVITY_FEED_SIZE, before_id=None):
+    """Get the newest entries, optionally only those older than before_id.
+
+    Entries are appended in order, so the id is a keyset on time.
+    """
+    query = '''
+        SELECT a.id, a.created_at, a.entity_type, a.entity_id, a.action, a.description,
+               u.full_name AS user_name
+        FROM activity_log a
+        LEFT JOIN users u ON a.user_id = u.id
+    '''
+    params = []
+    if before_id is not None:
+        query += " WHERE a.id < ?"
+        params.append(before_id)
+    query += " ORDER BY a.id DESC LIMIT ?"
+    params.append(limit)
+
+    return conn.execute(query, params).fetchall()
+
+def rollup_and_prune(conn, retention_days=ACTIVITY_LOG_RETENTION_DAYS):
+    """Fold entries older than retention_days into activity_rollup and delete them.
+
+    Returns the number of entries removed.
+    """
+    cutoff = f"-{int(retention_days)} days"
+
+    conn.execute('''
+        INSERT INTO activity_rollup (day, entity_type, action, count)
+        SELECT date(created_at), entity_type, action, COUNT(*)
+        FROM activity_log
+        WHERE created_at < datetime('now', ?)
+        GROUP BY date(created_at), entity_type, action
+        ON CONFLICT (day, entity_type, action) DO UPDATE SET count = count + excluded.count
+    ''', (cutoff,))
+    cursor = conn.execute("DELETE FROM activity_log WHERE created_at < datetime('now', ?)", (cutoff,))
+    return cursor.rowcount
+
+class ActivityLog:
+    """Buffered activity log writer.
+
+    log() only appends to a buffer. The buffer is written in one transaction
+    once it holds batch_size entries or flush_interval seconds after the
+    first entry, whichever comes first, and at exit.
+    """
+
+    def __init__(self, batch_size=ACTIVITY_LOG_BATCH_SIZE, flush_interval=ACTIVITY_LOG_FLUSH_INTERVAL):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._pending = []
+        self._timer = None
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+
+    def log(self, entity_type, action, entity_id=None, description=None, user_id=None):
+        """Record that the current user did action to an entity"""
+        if action not in ACTIONS:
+            raise ValueError(f"Unknown activity action: {action}")
+
+        if user_id is None:
+            from auth import auth
+            user = auth.get_current_user()
+            user_id = user['id'] if user else None
+
+        entry = (
+            datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S"),
+            user_id, entity_type, entity_id, action, description
+        )
+
+        with self._lock:
+            self._pending.append(entry)
+            full = len(self._pending) >= self.batch_size
+            if not full and self._timer is None:
+                self._timer = threading.Timer(self.flush_interval, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+        if full:
+            self.flush()
+
+    def flush(self):
+        """Write buffered entries now"""
+        # One writer at a time keeps batches in log order
+        with self._flush_lock:
+            with self._lock:
+                entries, self._pending = self._pending, []
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+
+            if not entries:
+                return
+
+            try:
+                from database import db
+                with db.get_connection() as conn:
+                    write_entries(conn, entries)
+            except Exception as e:
+                print(f"Error writing activity log: {e}")
+
+    def recent(self, limit=ACTIVITY_FEED_SIZE, before_id=None):
+        """Get the newest entries, including ones still buffered"""
+        self.flush()
+
+        from database import db
+        with db.get_connection() as conn:
+            return fetch_recent(conn, limit, before_id)
+
+# Global activity log instance
+activity_log = ActivityLog()
+atexit.register(activity_log.flush)
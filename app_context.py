@@ -0,0 +1,101 @@
+"""
+Application context for Law Office Management System
+
+The shared services (database, authentication, translations) are created
+on first use instead of at import time. Modules keep importing ``db``,
+``auth`` and ``i18n`` as before; those names are proxies that look the
+service up in the context. Tools and tests can point a service at
+something else before (or after) it is first used:
+
+    from app_context import context
+    from database import DatabaseManager
+    context.override('db', DatabaseManager(':memory:'))
+"""
+import threading
+from contextlib import contextmanager
+
+class AppContext:
+    """Registry of lazily constructed, overridable services"""
+
+    def __init__(self):
+        self._factories = {}
+        self._services = {}
+        self._lock = threading.RLock()
+
+    def register(self, name, factory):
+        """Register the factory that builds a service on first use"""
+        with self._lock:
+            self._factories[name] = factory
+
+    def get(self, name):
+        """Get a service, constructing it if needed"""
+        service = self._services.get(name)
+        if service is not None:
+            return service
+
+        with self._lock:
+            service = self._services.get(name)
+            if service is None:
+                if name not in self._factories:
+                    raise KeyError(f"Unknown service: {name}")
+                service = self._factories[name]()
+                self._services[name] = service
+            return service
+
+    def is_created(self, name):
+        """Check if a service has been constructed or overridden"""
+        return name in self._services
+
+    def override(self, name, service):
+        """Use service instead of the registered one"""
+        with self._lock:
+            self._services[name] = service
+
+    def reset(self, name=None):
+        """Forget one (or every) service so the next use builds it again"""
+        with self._lock:
+            if name is None:
+                self._services.clear()
+            else:
+                self._services.pop(name, None)
+
+    @contextmanager
+    def overridden(self, **services):
+        """Temporarily override services, restoring the previous ones afterwards"""
+        with self._lock:
+            previous = {name: self._services.get(name) for name in services}
+            self._services.update(services)
+        try:
+            yield self
+        finally:
+            with self._lock:
+                for name, service in previous.items():
+                    if service is None:
+                        self._services.pop(name, None)
+                    else:
+                        self._services[name] = service
+
+class ServiceProxy:
+    """Module-level stand-in for a service held by the context"""
+
+    def __init__(self, name, context):
+        object.__setattr__(self, '_name', name)
+        object.__setattr__(self, '_context', context)
+
+    def __getattr__(self, attribute):
+        return getattr(self._context.get(self._name), attribute)
+
+    def __setattr__(self, attribute, value):
+        setattr(self._context.get(self._name), attribute, value)
+
+    def __repr__(self):
+        state = "created" if self._context.is_created(self._name) else "not created"
+        return f"<{self._name} service proxy ({state})>"
+
+def service(name, factory):
+    """Register a service with the global context and return its proxy"""
+    context.register(name, factory)
+    return ServiceProxy(name, context)
+
+# Global application context
+context = AppContext()
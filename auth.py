@@ -1,16 +1,25 @@
 """
 User authentication and role management
 """
-import bcrypt
 from datetime import datetime
 from database import db
+from app_context import service
+from activity_log import activity_log
+from passwords import hash_password, verify_password, needs_rehash
+from session import sessions
+from change_bus import change_bus
 
 class AuthManager:
     def __init__(self):
         self.current_user = None
+        self.session_token = None
     
     def authenticate(self, username, password):
-        """Authenticate user with username and password"""
+        """Authenticate user with username and password.
+        
+        Takes as long as one bcrypt check whether or not the user exists, so
+        call it from a worker thread rather than the Tk event loop.
+        """
         try:
             with db.get_connection() as conn:
                 cursor = conn.cursor()
@@ -21,16 +30,17 @@ class AuthManager:
                 ''', (username,))
                 
                 user = cursor.fetchone()
+                password_hash = user['password_hash'] if user else None
                 
-                if user and bcrypt.checkpw(password.encode('utf-8'), user['password_hash']):
-                    self.current_user = {
-                        'id': user['id'],
-                        'username': user['username'],
-                        'full_name': user['full_name'],
-                        'role': user['role'],
-                        'email': user['email'],
-                        'phone': user['phone']
-                    }
+                if verify_password(password, password_hash):
+                    if needs_rehash(password_hash):
+                        # Cost factor changed since this hash was made
+                        cursor.execute(
+                            "UPDATE users SET password_hash = ? WHERE id = ?",
+                            (hash_password(password), user['id'])
+                        )
+                    
+                    self._start_session(user)
                     return True
                 
                 return False
@@ -38,9 +48,50 @@ class AuthManager:
             print(f"Authentication error: {e}")
             return False
     
+    def resume_session(self, token):
+        """Log in again with a session token instead of the password"""
+        user_id = sessions.verify(token)
+        if user_id is None:
+            return False
+        
+        try:
+            with db.get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    SELECT id, username, full_name, role, email, phone
+                    FROM users 
+                    WHERE id = ? AND is_active = 1
+                ''', (user_id,))
+                
+                user = cursor.fetchone()
+        except Exception as e:
+            print(f"Session error: {e}")
+            return False
+        
+        if not user:
+            return False
+        
+        # The token stays the same; it was issued for this login
+        self._start_session(user, token)
+        return True
+    
+    def _start_session(self, user, token=None):
+        """Make user the current user"""
+        self.current_user = {
+            'id': user['id'],
+            'username': user['username'],
+            'full_name': user['full_name'],
+            'role': user['role'],
+            'email': user['email'],
+            'phone': user['phone']
+        }
+        self.session_token = token or sessions.issue(user['id'])
+    
     def logout(self):
         """Logout current user"""
+        sessions.revoke(self.session_token)
         self.current_user = None
+        self.session_token = None
     
     def is_authenticated(self):
         """Check if user is authenticated"""
@@ -100,7 +151,7 @@ class UserManager:
         """Create a new user"""
         try:
             # Hash password
-            password_hash = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
+            password_hash = hash_password(password)
             
             with db.get_connection() as conn:
                 cursor = conn.cursor()
@@ -108,9 +159,11 @@ class UserManager:
                     INSERT INTO users (username, password_hash, full_name, role, email, phone)
                     VALUES (?, ?, ?, ?, ?, ?)
                 ''', (username, password_hash, full_name, role, email, phone))
-                
-                conn.commit()
-                return cursor.lastrowid
+            
+            # Announced once the connection's outermost block has committed
+            activity_log.log('user', 'create', cursor.lastrowid, username)
+            change_bus.publish('users', 'create', cursor.lastrowid)
+            return cursor.lastrowid
         except Exception as e:
             print(f"Error creating user: {e}")
             return None
@@ -130,7 +183,7 @@ class UserManager:
                     values.append(value)
                 elif field == 'password' and value:
                     # Hash new password
-                    password_hash = bcrypt.hashpw(value.encode('utf-8'), bcrypt.gensalt())
+                    password_hash = hash_password(value)
                     update_fields.append("password_hash = ?")
                     values.append(password_hash)
             
@@ -146,8 +199,11 @@ class UserManager:
             with db.get_connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute(query, values)
-                conn.commit()
-                return cursor.rowcount > 0
+            
+            if cursor.rowcount > 0:
+                activity_log.log('user', 'update', user_id, kwargs.get('username'))
+                change_bus.publish('users', 'update', user_id)
+            return cursor.rowcount > 0
         except Exception as e:
             print(f"Error updating user: {e}")
             return False
@@ -161,9 +217,11 @@ class UserManager:
                     UPDATE users SET is_active = 0, updated_at = CURRENT_TIMESTAMP
                     WHERE id = ?
                 ''', (user_id,))
-                
-                conn.commit()
-                return cursor.rowcount > 0
+            
+            if cursor.rowcount > 0:
+                activity_log.log('user', 'delete', user_id)
+                change_bus.publish('users', 'delete', user_id)
+            return cursor.rowcount > 0
         except Exception as e:
             print(f"Error deleting user: {e}")
             return False
@@ -260,6 +318,6 @@ class UserManager:
             print(f"Error validating username: {e}")
             return False
 
-# Global instances
-auth = AuthManager()
-user_manager = UserManager()
\ No newline at end of file
+# Global instances, created on first use (see app_context)
+auth = service('auth', AuthManager)
+user_manager = service('user_manager', UserManager)
\ No newline at end of file
@@ -0,0 +1,172 @@
+"""
+Background workers for database work started from Tk callbacks
+
+Tk is single-threaded: anything slow run from a callback freezes the window.
+BackgroundRunner runs functions on a small thread pool and hands results back
+to the Tk main loop through a queue polled with root.after(). Requests can be
+given a key; submitting a new request with the same key cancels the older
+one, so a superseded search never overwrites a newer result.
+"""
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from config import WORKER_THREADS, WORKER_POLL_INTERVAL, SEARCH_CANCEL_CHECK_STEPS
+
+_local = threading.local()
+
+class CancelToken:
+    """Cancellation flag shared between the Tk thread and a worker"""
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        """Mark the request as no longer wanted"""
+        self._event.set()
+
+    @property
+    def cancelled(self):
+        """Check if the request was cancelled"""
+        return self._event.is_set()
+
+def current_token():
+    """Get the cancel token of the request running on this worker, if any"""
+    return getattr(_local, 'token', None)
+
+@contextmanager
+def interruptible(conn, steps=SEARCH_CANCEL_CHECK_STEPS):
+    """Abort queries on conn once the current request is cancelled.
+
+    A cancelled query raises sqlite3.OperationalError ("interrupted"); the
+    runner drops it like any other cancelled result. Outside a worker this
+    does nothing.
+    """
+    token = current_token()
+    if token is None:
+        yield conn
+        return
+
+    conn.set_progress_handler(lambda: 1 if token.cancelled else 0, steps)
+    try:
+        yield conn
+    finally:
+        conn.set_progress_handler(None, steps)
+
+class BackgroundRunner:
+    """Run functions on worker threads and deliver results on the Tk thread"""
+
+    def __init__(self, root, max_workers=WORKER_THREADS, poll_interval=WORKER_POLL_INTERVAL):
+        self.root = root
+        self.poll_interval = poll_interval
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="law-office-worker")
+        self._results = queue.Queue()
+        self._latest = {}  # key -> token of the newest request with that key
+        self._pending = 0
+        self._polling = False
+
+    def submit(self, func, *args, on_success=None, on_error=None, key=None):
+        """Run func(*args) in the background.
+
+        on_success(result) or on_error(exception) is called on the Tk thread
+        unless the request was cancelled first. Returns the request's
+        CancelToken.
+        """
+        token = CancelToken()
+
+        if key is not None:
+            self.cancel(key)
+            self._latest[key] = token
+
+        self._pending += 1
+        self._executor.submit(self._run, token, key, func, args, on_success, on_error)
+        self._schedule_poll()
+        return token
+
+    def post(self, callback, *args):
+        """Call callback(*args) on the Tk thread, e.g. to report progress from a worker"""
+        self._results.put((None, None, callback, args))
+
+    def cancel(self, key):
+        """Cancel the pending request with this key, if any"""
+        token = self._latest.pop(key, None)
+        if token:
+            token.cancel()
+
+    def _run(self, token, key, func, args, on_success, on_error):
+        """Worker side: call func and queue the outcome for the Tk thread"""
+        if token.cancelled:
+            self._results.put((token, key, None, None))
+            return
+
+        _local.token = token
+        try:
+            result = func(*args)
+            self._results.put((token, key, on_success, result))
+        except Exception as e:
+            self._results.put((token, key, on_error or self._report_error, e))
+        finally:
+            _local.token = None
+
+    def _schedule_poll(self):
+        """Start polling the result queue if not already polling"""
+        if not self._polling:
+            self._polling = True
+            self.root.after(self.poll_interval, self._poll)
+
+    def _poll(self):
+        """Tk side: deliver finished results to their callbacks"""
+        while True:
+            try:
+                token, key, callback, payload = self._results.get_nowait()
+            except queue.Empty:
+                break
+
+            if token is None:
+                # Posted from a worker that is still running
+                try:
+                    callback(*payload)
+                except Exception as e:
+                    print(f"Background callback error: {e}")
+                continue
+
+            self._pending -= 1
+            if key is not None and self._latest.get(key) is token:
+                del self._latest[key]
+
+            # Stale or cancelled results are dropped
+            if token.cancelled or callback is None:
+                continue
+
+            try:
+                callback(payload)
+            except Exception as e:
+                print(f"Background callback error: {e}")
+
+        self._polling = False
+        if self._pending:
+            try:
+                self._schedule_poll()
+            except Exception:
+                # The window is gone
+                self._polling = False
+
+    def _report_error(self, error):
+        """Default error handler"""
+        print(f"Background task error: {error}")
+
+    def shutdown(self):
+        """Cancel pending requests and stop accepting new ones"""
+        for token in self._latest.values():
+            token.cancel()
+        self._latest.clear()
+        self._executor.shutdown(wait=False)
+
+def get_runner(widget):
+    """Get the BackgroundRunner for a widget's Tk root, creating it on first use"""
+    root = widget._root()
+    runner = getattr(root, '_background_runner', None)
+    if runner is None:
+        runner = BackgroundRunner(root)
+        root._background_runner = runner
+    return runner
@@ -0,0 +1,171 @@
+"""
+Online database backups for Law Office Management System
+
+Backups go through SQLite's backup API instead of copying the file, so a
+backup taken while the application is writing is still consistent. Pages
+are copied in small steps with a short sleep in between, which keeps the
+database available to the UI for the whole backup.
+"""
+import gzip
+import os
+import sqlite3
+import time
+from config import BACKUP_PAGES_PER_STEP, BACKUP_STEP_SLEEP, BACKUP_MAX_RESTARTS, BACKUP_CHUNK_SIZE
+
+class BackupError(Exception):
+    """Raised when a backup or restore cannot be completed or verified"""
+
+def is_compressed(path):
+    """Check if a backup file is gzip-compressed"""
+    return path.endswith(".gz")
+
+def check_integrity(conn):
+    """Run PRAGMA integrity_check, raising BackupError on any problem"""
+    problems = [row[0] for row in conn.execute("PRAGMA integrity_check")]
+    if problems != ["ok"]:
+        raise BackupError("Integrity check failed: " + "; ".join(problems[:5]))
+
+class _TooManyRestarts(Exception):
+    """Internal: the source kept changing under a stepwise copy"""
+
+def copy_database(source, target, pages=BACKUP_PAGES_PER_STEP, sleep=BACKUP_STEP_SLEEP, progress=None):
+    """Copy source into target with the backup API, a few pages per step.
+
+    A write from another connection restarts a stepwise copy. If that
+    happens BACKUP_MAX_RESTARTS times, the rest is copied in one step
+    (in WAL mode that still does not block writers).
+    progress(done, total) is called after every step, counted in pages.
+    """
+    state = {'done': 0, 'restarts': 0}
+
+    def on_step(status, remaining, total):
+        done = total - remaining
+        if done < state['done']:
+            state['restarts'] += 1
+            if state['restarts'] >= BACKUP_MAX_RESTARTS:
+                raise _TooManyRestarts()
+        state['done'] = done
+
+        if progress:
+            progress(done, total)
+        # Let other connections get at the database between steps
+        if remaining and sleep:
+            time.sleep(sleep)
+
+    try:
+        source.backup(target, pages=pages, progress=on_step)
+    except _TooManyRestarts:
+        source.backup(target, pages=-1, progress=on_step)
+
+def create_backup(connect, backup_path, compress=False, progress=None):
+    """Back up the database opened by connect() to backup_path.
+
+    progress(phase, done, total) is called with phase 'copy' (pages),
+    'verify' and 'compress' (bytes). The backup is written to a temporary
+    file first and only moved into place once it passed the integrity check.
+    Returns backup_path.
+    """
+    def report(phase, done, total):
+        if progress:
+            progress(phase, done, total)
+
+    partial_path = backup_path + ".partial"
+    copy_path = partial_path + ".db" if compress else partial_path
+
+    source = connect()
+    try:
+        target = sqlite3.connect(copy_path)
+        try:
+            copy_database(source, target, progress=lambda done, total: report('copy', done, total))
+
+            # A self-contained file: no -wal/-shm next to the backup
+            target.execute("PRAGMA journal_mode = DELETE")
+
+            report('verify', 0, 1)
+            check_integrity(target)
+            report('verify', 1, 1)
+        finally:
+            target.close()
+    except Exception:
+        _remove(copy_path)
+        raise
+    finally:
+        source.close()
+
+    try:
+        if compress:
+            _compress_file(copy_path, partial_path, lambda done, total: report('compress', done, total))
+            _remove(copy_path)
+        os.replace(partial_path, backup_path)
+    except Exception:
+        _remove(copy_path)
+        _remove(partial_path)
+        raise
+
+    return backup_path
+
+def restore_backup(backup_path, target, progress=None):
+    """Copy a backup into an open target connection, replacing its contents.
+
+    The backup (decompressed to a temporary file if needed) is verified
+    before anything in the target is touched. progress(phase, done, total)
+    is called with phase 'decompress' (bytes), 'verify' and 'copy' (pages).
+    """
+    def report(phase, done, total):
+        if progress:
+            progress(phase, done, total)
+
+    source_path = backup_path
+    if is_compressed(backup_path):
+        source_path = backup_path + ".restore.db"
+        _decompress_file(backup_path, source_path, lambda done, total: report('decompress', done, total))
+
+    try:
+        source = sqlite3.connect(f"file:{source_path}?mode=ro", uri=True)
+        try:
+            report('verify', 0, 1)
+            check_integrity(source)
+            report('verify', 1, 1)
+            copy_database(source, target, progress=lambda done, total: report('copy', done, total))
+        finally:
+            source.close()
+    except sqlite3.DatabaseError as e:
+        raise BackupError(f"Not a valid backup file: {e}") from e
+    finally:
+        if source_path != backup_path:
+            _remove(source_path)
+
+def _compress_file(source_path, target_path, progress=None):
+    """Gzip a file in fixed-size chunks"""
+    total = os.path.getsize(source_path)
+    done = 0
+    with open(source_path, "rb") as source, gzip.open(target_path, "wb") as target:
+        while True:
+            chunk = source.read(BACKUP_CHUNK_SIZE)
+            if not chunk:
+                break
+            target.write(chunk)
+            done += len(chunk)
+            if progress:
+                progress(done, total)
+
+def _decompress_file(source_path, target_path, progress=None):
+    """Gunzip a file in fixed-size chunks, counting progress in compressed bytes"""
+    total = os.path.getsize(source_path)
+    try:
+        with open(source_path, "rb") as raw, gzip.GzipFile(fileobj=raw) as source, open(target_path, "wb") as target:
+            while True:
+                chunk = source.read(BACKUP_CHUNK_SIZE)
+                if not chunk:
+                    break
+                target.write(chunk)
+                if progress:
+                    progress(min(raw.tell(), total), total)
+    except (OSError, EOFError) as e:
+        _remove(target_path)
+        raise BackupError(f"Cannot decompress backup: {e}") from e
+
+def _remove(path):
+    """Delete a file if it exists"""
+    if os.path.exists(path):
+        os.remove(path)
@@ -0,0 +1,522 @@
+#!/usr/bin/env python3
+"""
+Performance benchmarks for Law Office Management System
+Run a benchmark with: python benchmark.py <name> [options]
+"""
+
+import argparse
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+def create_bench_database(path, rows):
+    """Create a throwaway database with a cases-like table"""
+    conn = sqlite3.connect(path)
+    conn.execute('''
+        CREATE TABLE cases (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            case_number TEXT UNIQUE NOT NULL,
+            title TEXT NOT NULL,
+            status TEXT DEFAULT 'open',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    conn.executemany(
+        "INSERT INTO cases (case_number, title) VALUES (?, ?)",
+        ((f"B-{i}", f"Benchmark case {i}") for i in range(rows))
+    )
+    conn.commit()
+    conn.close()
+
+def run_concurrent_workload(path, pragmas, readers, duration):
+    """Run one writer and several readers against a database for a while"""
+    from database import apply_pragmas
+
+    stop = threading.Event()
+    counts = {'reads': 0, 'writes': 0, 'busy': 0}
+    lock = threading.Lock()
+
+    def connect():
+        conn = sqlite3.connect(path, timeout=5)
+        apply_pragmas(conn, pragmas)
+        return conn
+
+    def reader():
+        conn = connect()
+        while not stop.is_set():
+            try:
+                conn.execute("SELECT COUNT(*) FROM cases WHERE status = 'open'").fetchone()
+                with lock:
+                    counts['reads'] += 1
+            except sqlite3.OperationalError:
+                with lock:
+                    counts['busy'] += 1
+        conn.close()
+
+    def writer():
+        conn = connect()
+        i = 0
+        while not stop.is_set():
+            try:
+                conn.execute(
+                    "INSERT INTO cases (case_number, title) VALUES (?, ?)",
+                    (f"W-{threading.get_ident()}-{i}", "Write benchmark")
+                )
+                conn.commit()
+                i += 1
+                with lock:
+                    counts['writes'] += 1
+            except sqlite3.OperationalError:
+                with lock:
+                    counts['busy'] += 1
+        conn.close()
+
+    threads = [threading.Thread(target=reader) for _ in range(readers)]
+    threads.append(threading.Thread(target=writer))
+    for thread in threads:
+        thread.start()
+    time.sleep(duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    return counts
+
+def bench_pragmas(args):
+    """Compare concurrent read/write throughput: SQLite defaults vs DB_PRAGMAS"""
+    from config import DB_PRAGMAS
+
+    profiles = [
+        ("defaults", {}),
+        ("tuned", DB_PRAGMAS),
+    ]
+
+    print(f"{args.readers} readers + 1 writer, {args.duration}s each, {args.rows} seed rows")
+    print(f"{'profile':<10} {'reads/s':>10} {'writes/s':>10} {'busy':>8}")
+
+    for name, pragmas in profiles:
+        workdir = tempfile.mkdtemp(prefix="law_office_bench_")
+        try:
+            path = os.path.join(workdir, "bench.db")
+            create_bench_database(path, args.rows)
+            counts = run_concurrent_workload(path, pragmas, args.readers, args.duration)
+            print(f"{name:<10} {counts['reads'] / args.duration:>10.0f} "
+                  f"{counts['writes'] / args.duration:>10.0f} {counts['busy']:>8}")
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+def make_arabic_case_rows(count):
+    """Build case list rows with the repetition a real office has"""
+    import random
+
+    first_names = ["أحمد", "محمد", "محمود", "مصطفى", "فاطمة", "مريم", "عمر", "يوسف", "خالد", "سارة"]
+    last_names = ["حسن", "علي", "إبراهيم", "عبد الله", "السيد", "عثمان", "منصور", "الشريف"]
+    courts = ["محكمة القاهرة الابتدائية", "محكمة الجيزة الابتدائية", "محكمة النقض", "مجلس الدولة"]
+    case_types = ["مدني", "جنائي", "تجاري", "إداري", "أسرة", "عمالي"]
+    statuses = ["مفتوحة", "مغلقة", "معلقة", "مؤجلة"]
+    lawyers = ["أ. أحمد حسن", "أ. منى علي", "أ. كريم السيد"]
+
+    rng = random.Random(42)
+    rows = []
+    for i in range(count):
+        rows.append([
+            f"{2024 - i % 5}/{i}",
+            f"دعوى {rng.choice(case_types)} رقم {i}",
+            f"{rng.choice(first_names)} {rng.choice(last_names)}",
+            rng.choice(courts),
+            rng.choice(case_types),
+            rng.choice(statuses),
+            rng.choice(lawyers),
+            f"{1 + i % 28:02d}/{1 + i % 12:02d}/2024",
+        ])
+    return rows
+
+def bench_format_text(args):
+    """Per-row cost of Arabic reshaping/BiDi for case rows, uncached vs cached"""
+    import text_shaping
+
+    rows = make_arabic_case_rows(args.rows)
+
+    def run(shape):
+        start = time.perf_counter()
+        for row in rows:
+            [shape(value) for value in row]
+        return (time.perf_counter() - start) / len(rows) * 1e6
+
+    text_shaping.clear_cache()
+    uncached = run(text_shaping.shape_text_uncached)
+    cold = run(text_shaping.shape_text)
+    warm = run(text_shaping.shape_text)
+    stats = text_shaping.get_cache_stats()
+
+    print(f"{args.rows} rows x 8 columns")
+    print(f"{'uncached':<10} {uncached:>10.1f} us/row")
+    print(f"{'cold cache':<10} {cold:>10.1f} us/row")
+    print(f"{'warm cache':<10} {warm:>10.1f} us/row  ({uncached / warm:.1f}x faster)")
+    print(f"cache: {stats['size']} entries, hit rate {stats['hit_rate']:.1%}")
+
+def bench_dashboard(args):
+    """Dashboard statistics: four COUNT(*) queries vs the counters table"""
+    from migrations import migrate
+    from dashboard_stats import fetch_statistics, _FALLBACK_QUERY
+
+    conn = sqlite3.connect(":memory:")
+    migrate(conn)
+
+    conn.executemany("INSERT INTO clients (name) VALUES (?)", ((f"Client {i}",) for i in range(args.rows // 10)))
+    conn.executemany(
+        "INSERT INTO cases (case_number, title, client_id, status) VALUES (?, ?, ?, ?)",
+        ((f"B-{i}", f"Case {i}", 1 + i % (args.rows // 10), ("open", "closed", "pending")[i % 3])
+         for i in range(args.rows))
+    )
+    conn.executemany(
+        "INSERT INTO tasks (title, status) VALUES (?, ?)",
+        (("Task", ("pending", "completed")[i % 2]) for i in range(args.rows))
+    )
+    conn.executemany(
+        "INSERT INTO appointments (title, appointment_date) VALUES (?, datetime('now', ?))",
+        (("Appointment", f"{i % 400 - 365} days") for i in range(args.rows))
+    )
+    conn.commit()
+
+    def run(query):
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            query()
+        return (time.perf_counter() - start) / args.repeat * 1000
+
+    counts = run(lambda: conn.execute(_FALLBACK_QUERY).fetchone())
+    counters = run(lambda: fetch_statistics(conn))
+
+    print(f"{args.rows} cases/tasks/appointments, {args.rows // 10} clients")
+    print(f"{'COUNT(*)':<10} {counts:>10.2f} ms")
+    print(f"{'counters':<10} {counters:>10.2f} ms  ({counts / counters:.0f}x faster)")
+
+def bench_repositories(args):
+    """Case repository calls with the prepared statement cache on and off"""
+    import random
+    from database import DatabaseManager
+    from repositories import CaseRepository
+    from config import DB_CACHED_STATEMENTS, TREE_PAGE_SIZE
+
+    def setup(cached_statements):
+        database = DatabaseManager(":memory:", cached_statements=cached_statements)
+        with database.get_connection() as conn:
+            conn.executemany("INSERT INTO clients (name) VALUES (?)", ((f"Client {i}",) for i in range(args.rows // 10)))
+            conn.executemany(
+                "INSERT INTO cases (case_number, title, client_id, created_at) VALUES (?, ?, ?, datetime('now', ?))",
+                ((f"B-{i}", f"Case {i}", 1 + i % (args.rows // 10), f"-{i} seconds") for i in range(args.rows))
+            )
+        return CaseRepository(database)
+
+    ids = random.Random(0).sample(range(1, args.rows + 1), min(args.lookups, args.rows))
+
+    def scroll(repository):
+        key = None
+        for _ in range(5):
+            rows = repository.page(key, TREE_PAGE_SIZE)
+            key = repository.page_key(rows[-1])
+
+    def lookups(repository):
+        for case_id in ids:
+            repository.get_summary(case_id)
+
+    def stream(repository):
+        return sum(len(batch) for batch in repository.iter_summaries())
+
+    def run(func, repository):
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            func(repository)
+        return (time.perf_counter() - start) / args.repeat * 1000
+
+    repositories = {'cached': setup(DB_CACHED_STATEMENTS), 'uncached': setup(0)}
+    benchmarks = [
+        ("scroll 5 pages", scroll),
+        (f"{len(ids)} lookups", lookups),
+        (f"stream {args.rows} rows", stream),
+    ]
+
+    print(f"{args.rows} cases, statement cache {DB_CACHED_STATEMENTS} vs 0")
+    print(f"{'':<20} {'cached ms':>10} {'uncached ms':>12}")
+    for name, func in benchmarks:
+        cached = run(func, repositories['cached'])
+        uncached = run(func, repositories['uncached'])
+        print(f"{name:<20} {cached:>10.2f} {uncached:>12.2f}")
+
+def bench_export(args):
+    """Export speed and peak memory for a large case list"""
+    import tracemalloc
+    from app_context import context
+    from database import DatabaseManager
+    import export
+
+    database = DatabaseManager(":memory:")
+    with database.get_connection() as conn:
+        conn.execute("INSERT INTO clients (name) VALUES ('Benchmark client')")
+        conn.executemany(
+            "INSERT INTO cases (case_number, title, client_id, status) VALUES (?, ?, 1, 'open')",
+            ((f"B-{i}", f"Benchmark case {i}") for i in range(args.rows))
+        )
+        conn.commit()
+    context.override('db', database)
+
+    directory = tempfile.mkdtemp()
+    try:
+        print(f"{args.rows} cases")
+        print(f"{'format':<8} {'seconds':>8} {'rows/s':>10} {'peak MB':>8}")
+        for file_format in export.EXPORT_FORMATS:
+            path = os.path.join(directory, f"cases.{file_format}")
+            result = export.export_list('cases', file_format, path)
+            peak = ""
+            if args.memory:
+                # Tracing slows the export a lot, so it gets a run of its own
+                tracemalloc.start()
+                export.export_list('cases', file_format, path)
+                peak = f"{tracemalloc.get_traced_memory()[1] / 1024 / 1024:.1f}"
+                tracemalloc.stop()
+            print(f"{file_format:<8} {result.seconds:>8.2f} {result.rows_per_second:>10.0f} {peak:>8}")
+    finally:
+        shutil.rmtree(directory)
+
+def bench_pdf(args):
+    """Pages per second and peak memory for a large PDF case report"""
+    import tracemalloc
+    from app_context import context
+    from database import DatabaseManager
+    import pdf_reports
+
+    database = DatabaseManager(":memory:")
+    rows = make_arabic_case_rows(args.rows)
+    statuses = ['open', 'closed', 'pending', 'postponed']
+    with database.get_connection() as conn:
+        lawyers = sorted(set(row[6] for row in rows))
+        conn.executemany(
+            "INSERT INTO users (username, password_hash, full_name, role) VALUES (?, '-', ?, 'lawyer')",
+            ((f"lawyer{i}", name) for i, name in enumerate(lawyers))
+        )
+        lawyer_ids = dict(conn.execute("SELECT full_name, id FROM users").fetchall())
+        clients = sorted(set(row[2] for row in rows))
+        conn.executemany("INSERT INTO clients (name) VALUES (?)", ((name,) for name in clients))
+        client_ids = dict(conn.execute("SELECT name, id FROM clients").fetchall())
+        conn.executemany(
+            "INSERT INTO cases (case_number, title, client_id, court_name, case_type, status, assigned_lawyer_id) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            ((row[0], row[1], client_ids[row[2]], row[3], row[4], statuses[i % 4], lawyer_ids[row[6]]) for i, row in enumerate(rows))
+        )
+        conn.commit()
+    context.override('db', database)
+
+    directory = tempfile.mkdtemp()
+    try:
+        path = os.path.join(directory, "report.pdf")
+        result = pdf_reports.render_report(args.report, path)
+        print(f"{args.report}: {result.rows} rows, {result.pages} pages")
+        print(f"{result.seconds:.2f}s, {result.pages_per_second:.1f} pages/s, {os.path.getsize(path) / 1024 / 1024:.1f} MB")
+        if args.memory:
+            # Tracing slows rendering a lot, so it gets a run of its own
+            tracemalloc.start()
+            pdf_reports.render_report(args.report, path)
+            print(f"peak Python memory {tracemalloc.get_traced_memory()[1] / 1024 / 1024:.1f} MB")
+            tracemalloc.stop()
+    finally:
+        shutil.rmtree(directory)
+
+def bench_aggregates(args):
+    """Statistics: GROUP BY over cases and invoices vs the aggregate tables"""
+    from app_context import context
+    from database import DatabaseManager
+    from repositories import StatisticsRepository
+
+    database = DatabaseManager(":memory:")
+    statuses = ['open', 'closed', 'pending', 'postponed']
+    with database.get_connection() as conn:
+        conn.executemany("INSERT INTO clients (name) VALUES (?)", ((f"Client {i}",) for i in range(args.rows // 10)))
+        start = time.perf_counter()
+        conn.executemany(
+            "INSERT INTO cases (case_number, title, client_id, court_name, status, start_date) VALUES (?, ?, ?, ?, ?, ?)",
+            ((f"B-{i}", f"Case {i}", 1 + i % (args.rows // 10), f"Court {i % 20}", statuses[i % 4],
+              f"{2020 + i % 5}-{1 + i % 12:02d}-01") for i in range(args.rows))
+        )
+        conn.executemany(
+            "INSERT INTO invoices (invoice_number, client_id, amount, tax_amount, total_amount, issue_date) VALUES (?, ?, ?, ?, ?, ?)",
+            ((f"I-{i}", 1 + i % (args.rows // 10), 100.0, 15.0, 115.0, f"{2020 + i % 5}-{1 + i % 12:02d}-15")
+             for i in range(args.rows))
+        )
+        conn.commit()
+        inserted = time.perf_counter() - start
+    context.override('db', database)
+    statistics = StatisticsRepository(database)
+
+    def run(query):
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            query()
+        return (time.perf_counter() - start) / args.repeat * 1000
+
+    with database.get_connection() as conn:
+        scans = {
+            'cases by court': lambda: conn.execute(
+                "SELECT court_name, COUNT(*) FROM cases GROUP BY court_name ORDER BY 2 DESC").fetchall(),
+            'cases by month': lambda: conn.execute(
+                "SELECT substr(start_date, 1, 7), COUNT(*) FROM cases GROUP BY 1 ORDER BY 1").fetchall(),
+            'invoices by client': lambda: conn.execute(
+                "SELECT c.name, COUNT(*), SUM(i.total_amount) FROM invoices i LEFT JOIN clients c ON c.id = i.client_id "
+                "GROUP BY i.client_id ORDER BY 3 DESC").fetchall(),
+        }
+        reads = {
+            'cases by court': lambda: statistics.cases_by('court'),
+            'cases by month': lambda: statistics.cases_by('month'),
+            'invoices by client': lambda: statistics.invoices_by('client'),
+        }
+
+        print(f"{args.rows} cases and invoices inserted in {inserted:.2f}s (triggers included)")
+        print(f"{'statistic':<20} {'scan ms':>10} {'cube ms':>10}")
+        for name in scans:
+            scan = run(scans[name])
+            read = run(reads[name])
+            speedup = f"{scan / read:.1f}x faster" if scan > read else f"{read / scan:.1f}x slower"
+            print(f"{name:<20} {scan:>10.2f} {read:>10.2f}  ({speedup})")
+
+def bench_reminders(args):
+    """Reminder scheduler: loading a lawyer's open tasks and rescheduling one"""
+    from datetime import date, timedelta
+    from app_context import context
+    from database import DatabaseManager
+    import reminders
+
+    database = DatabaseManager(":memory:")
+    today = date.today()
+    with database.get_connection() as conn:
+        conn.executemany(
+            "INSERT INTO tasks (title, status, due_date, assigned_to) VALUES (?, ?, ?, ?)",
+            ((f"Task {i}", ("pending", "in_progress", "completed")[i % 3],
+              (today + timedelta(days=i % 365 - 30)).isoformat(), 1 + i % 4) for i in range(args.rows))
+        )
+        conn.commit()
+    context.override('db', database)
+
+    class Root:
+        """Stands in for the Tk root: only the timer is needed"""
+        def after(self, ms, callback):
+            return None
+        def after_cancel(self, after_id):
+            pass
+
+    scheduler = reminders.ReminderScheduler(Root(), 1, print)
+    start = time.perf_counter()
+    tasks, heap = scheduler.load(1)
+    loaded = time.perf_counter() - start
+    start = time.perf_counter()
+    scheduler.schedule_all((tasks, heap))
+    built = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for task in tasks[:args.changes]:
+        scheduler.unschedule(task.id)
+        scheduler.schedule(task._replace(due_date=(today + timedelta(days=5)).isoformat()))
+    changed = (time.perf_counter() - start) / min(args.changes, len(tasks)) * 1000000
+
+    print(f"{args.rows} tasks, {len(tasks)} open and not yet due for one lawyer, {scheduler.pending()} reminders")
+    print(f"load and heap (worker) {loaded * 1000:.1f} ms, take over (Tk thread) {built * 1000:.1f} ms, "
+          f"reschedule {changed:.1f} us per task")
+
+def bench_bcrypt(args):
+    """Login check time per bcrypt cost factor, to choose BCRYPT_ROUNDS"""
+    import bcrypt
+    from config import BCRYPT_ROUNDS, LOGIN_TARGET_MS
+
+    if args.target is None:
+        args.target = LOGIN_TARGET_MS
+
+    password = b"benchmark-password"
+    chosen = None
+
+    print(f"target: {args.target:.0f} ms per login check (BCRYPT_ROUNDS is {BCRYPT_ROUNDS})")
+    print(f"{'rounds':<8} {'check ms':>10}")
+    for rounds in range(args.min_rounds, args.max_rounds + 1):
+        password_hash = bcrypt.hashpw(password, bcrypt.gensalt(rounds))
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            bcrypt.checkpw(password, password_hash)
+            timings.append((time.perf_counter() - start) * 1000)
+        elapsed = sorted(timings)[len(timings) // 2]
+
+        print(f"{rounds:<8} {elapsed:>10.1f}")
+        if elapsed > args.target:
+            # Each extra round doubles the cost, so stop here
+            break
+        chosen = rounds
+
+    if chosen is None:
+        print(f"even {args.min_rounds} rounds is slower than the target on this machine")
+    else:
+        print(f"recommended: BCRYPT_ROUNDS = {chosen}")
+
+def main():
+    """Parse arguments and run the selected benchmark"""
+    parser = argparse.ArgumentParser(description="Law Office Management System benchmarks")
+    subparsers = parser.add_subparsers(dest="benchmark")
+
+    pragmas_parser = subparsers.add_parser("pragmas", help=bench_pragmas.__doc__)
+    pragmas_parser.add_argument("--readers", type=int, default=4)
+    pragmas_parser.add_argument("--duration", type=float, default=3.0)
+    pragmas_parser.add_argument("--rows", type=int, default=20000)
+    pragmas_parser.set_defaults(func=bench_pragmas)
+
+    format_parser = subparsers.add_parser("format-text", help=bench_format_text.__doc__)
+    format_parser.add_argument("--rows", type=int, default=5000)
+    format_parser.set_defaults(func=bench_format_text)
+
+    dashboard_parser = subparsers.add_parser("dashboard", help=bench_dashboard.__doc__)
+    dashboard_parser.add_argument("--rows", type=int, default=100000)
+    dashboard_parser.add_argument("--repeat", type=int, default=20)
+    dashboard_parser.set_defaults(func=bench_dashboard)
+
+    repositories_parser = subparsers.add_parser("repositories", help=bench_repositories.__doc__)
+    repositories_parser.add_argument("--rows", type=int, default=50000)
+    repositories_parser.add_argument("--lookups", type=int, default=1000)
+    repositories_parser.add_argument("--repeat", type=int, default=5)
+    repositories_parser.set_defaults(func=bench_repositories)
+
+    export_parser = subparsers.add_parser("export", help=bench_export.__doc__)
+    export_parser.add_argument("--rows", type=int, default=200000)
+    export_parser.add_argument("--memory", action="store_true", help="Also measure peak Python memory (slow)")
+    export_parser.set_defaults(func=bench_export)
+
+    pdf_parser = subparsers.add_parser("pdf", help=bench_pdf.__doc__)
+    pdf_parser.add_argument("--rows", type=int, default=10000)
+    pdf_parser.add_argument("--report", default="cases_by_lawyer", choices=["cases_by_lawyer", "cases_by_court", "cases_by_status"])
+    pdf_parser.add_argument("--memory", action="store_true", help="Also measure peak Python memory (slow)")
+    pdf_parser.set_defaults(func=bench_pdf)
+
+    aggregates_parser = subparsers.add_parser("aggregates", help=bench_aggregates.__doc__)
+    aggregates_parser.add_argument("--rows", type=int, default=100000)
+    aggregates_parser.add_argument("--repeat", type=int, default=20)
+    aggregates_parser.set_defaults(func=bench_aggregates)
+
+    reminders_parser = subparsers.add_parser("reminders", help=bench_reminders.__doc__)
+    reminders_parser.add_argument("--rows", type=int, default=100000)
+    reminders_parser.add_argument("--changes", type=int, default=1000)
+    reminders_parser.set_defaults(func=bench_reminders)
+
+    bcrypt_parser = subparsers.add_parser("bcrypt", help=bench_bcrypt.__doc__)
+    bcrypt_parser.add_argument("--target", type=float, default=None, help="milliseconds (default LOGIN_TARGET_MS)")
+    bcrypt_parser.add_argument("--min-rounds", type=int, default=10)
+    bcrypt_parser.add_argument("--max-rounds", type=int, default=16)
+    bcrypt_parser.add_argument("--repeat", type=int, default=3)
+    bcrypt_parser.set_defaults(func=bench_bcrypt)
+
+    args = parser.parse_args()
+    if not args.benchmark:
+        parser.print_help()
+        sys.exit(1)
+
+    args.func(args)
+
+if __name__ == "__main__":
+    main()
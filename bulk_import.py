@@ -0,0 +1,300 @@
+"""
+Bulk import of clients and cases from CSV or Excel (.xlsx) files
+
+Files are streamed a row at a time (csv module / openpyxl read_only mode),
+checked, and inserted with executemany in batches of IMPORT_BATCH_SIZE
+inside one transaction, so a failed import leaves the database as it was.
+Rows that fail the checks are skipped and written, with the reason, to a
+reject file next to the source.
+
+Cases name their client by national ID (client_national_id column) and
+their lawyer by username (lawyer_username column); both are resolved
+through maps read once before the import starts.
+
+    python bulk_import.py clients clients.xlsx
+    python bulk_import.py cases cases.csv
+"""
+import argparse
+import csv
+import os
+import time
+from collections import namedtuple
+from datetime import datetime, date
+from repositories import client_repository, case_repository, user_repository
+from repositories.clients import CLIENT_FIELDS
+from repositories.cases import CASE_FIELDS
+from config import IMPORT_BATCH_SIZE
+
+CASE_STATUSES = ('open', 'closed', 'pending', 'postponed')
+
+# Accepted date formats: stored form first, then the form the app displays
+DATE_FORMATS = ("%Y-%m-%d", "%d/%m/%Y")
+
+class ImportResult(namedtuple('ImportResult', ['imported', 'rejected', 'seconds', 'reject_path'])):
+    """Outcome of an import; reject_path is None when every row was accepted"""
+
+    @property
+    def rows_per_second(self):
+        rows = self.imported + self.rejected
+        return rows / self.seconds if self.seconds > 0 else 0.0
+
+def normalize_header(name):
+    """Column name as a field name: 'National ID' -> 'national_id'"""
+    return str(name or "").strip().lower().replace(" ", "_")
+
+def clean_value(value):
+    """Cell value as stored text, or None for an empty cell"""
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.strftime("%Y-%m-%d")
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, float) and value.is_integer():
+        # Excel stores IDs and phone numbers typed as numbers as floats
+        value = int(value)
+    value = str(value).strip()
+    return value or None
+
+def parse_date(value):
+    """Date text in one of DATE_FORMATS as YYYY-MM-DD; raises ValueError"""
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, date_format).strftime("%Y-%m-%d")
+        except ValueError:
+            pass
+    raise ValueError(f"invalid date: {value}")
+
+def read_rows(path):
+    """Yield (line number, header list, {field: value}) for each data row of a file"""
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".csv":
+        return _read_csv(path)
+    if extension == ".xlsx":
+        return _read_xlsx(path)
+    raise ValueError(f"Unsupported file type: {extension} (use .csv or .xlsx)")
+
+def count_rows(path):
+    """Approximate number of data rows, for progress; None if unknown"""
+    if path.lower().endswith(".xlsx"):
+        from openpyxl import load_workbook
+        workbook = load_workbook(path, read_only=True)
+        try:
+            max_row = workbook.active.max_row
+            return max_row - 1 if max_row else None
+        finally:
+            workbook.close()
+
+    # Counting newlines is far cheaper than parsing the file twice
+    lines = 0
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            lines += chunk.count(b"\n")
+    return max(lines - 1, 0)
+
+def _read_csv(path):
+    """Rows of a CSV file (UTF-8, with or without BOM)"""
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            return
+        fields = [normalize_header(name) for name in header]
+        for row in reader:
+            if any(cell.strip() for cell in row):
+                yield reader.line_num, header, dict(zip(fields, (clean_value(cell) for cell in row)))
+
+def _read_xlsx(path):
+    """Rows of the first worksheet of an Excel workbook"""
+    # openpyxl is only needed for imports and exports
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        header = [str(name) if name is not None else "" for name in header]
+        fields = [normalize_header(name) for name in header]
+        for line, row in enumerate(rows, start=2):
+            values = [clean_value(cell) for cell in row]
+            if any(value is not None for value in values):
+                yield line, header, dict(zip(fields, values))
+    finally:
+        workbook.close()
+
+class RejectFile:
+    """CSV of rejected rows with their line number and reason, created on first use"""
+
+    def __init__(self, path):
+        self.path = path
+        self.count = 0
+        self._file = None
+        self._writer = None
+
+    def add(self, line, header, row, reason):
+        """Record a rejected row"""
+        if self._writer is None:
+            self._file = open(self.path, "w", newline="", encoding="utf-8-sig")
+            self._writer = csv.writer(self._file)
+            self._writer.writerow(["line", "error"] + list(header))
+        fields = [normalize_header(name) for name in header]
+        self._writer.writerow([line, reason] + [row.get(field) or "" for field in fields])
+        self.count += 1
+
+    def close(self):
+        """Close the file; returns its path, or None if nothing was rejected"""
+        if self._file is None:
+            return None
+        self._file.close()
+        return self.path
+
+def default_reject_path(path):
+    """clients.xlsx -> clients.rejects.csv in the same directory"""
+    return os.path.splitext(path)[0] + ".rejects.csv"
+
+class ClientImporter:
+    """Checks client rows; national IDs must be unique"""
+
+    entity = 'clients'
+    required_columns = ('name',)
+    repository = client_repository
+
+    def prepare(self):
+        """Read what the checks need, before the import transaction starts"""
+        self.national_ids = set(self.repository.national_ids())
+
+    def check(self, row):
+        """Get the CLIENT_FIELDS dict for a row; raises ValueError if it is invalid"""
+        if not row.get('name'):
+            raise ValueError("name is required")
+
+        national_id = row.get('national_id')
+        if national_id:
+            if national_id in self.national_ids:
+                raise ValueError(f"national ID {national_id} already exists")
+            self.national_ids.add(national_id)
+
+        return dict((field, row.get(field)) for field in CLIENT_FIELDS)
+
+class CaseImporter:
+    """Checks case rows and resolves their client and lawyer references"""
+
+    entity = 'cases'
+    required_columns = ('case_number', 'title', 'client_national_id')
+    repository = case_repository
+
+    def prepare(self):
+        """Read what the checks need, before the import transaction starts"""
+        self.clients = client_repository.national_ids()
+        self.lawyers = user_repository.usernames()
+        self.case_numbers = self.repository.case_numbers()
+
+    def check(self, row):
+        """Get the CASE_FIELDS dict for a row; raises ValueError if it is invalid"""
+        for field in ('case_number', 'title', 'client_national_id'):
+            if not row.get(field):
+                raise ValueError(f"{field} is required")
+
+        case_number = row['case_number']
+        if case_number in self.case_numbers:
+            raise ValueError(f"case number {case_number} already exists")
+
+        client_id = self.clients.get(row['client_national_id'])
+        if client_id is None:
+            raise ValueError(f"no client with national ID {row['client_national_id']}")
+
+        lawyer_id = None
+        if row.get('lawyer_username'):
+            lawyer_id = self.lawyers.get(row['lawyer_username'])
+            if lawyer_id is None:
+                raise ValueError(f"no active user {row['lawyer_username']}")
+
+        status = (row.get('status') or 'open').lower()
+        if status not in CASE_STATUSES:
+            raise ValueError(f"invalid status: {row['status']}")
+
+        fields = dict((field, row.get(field)) for field in CASE_FIELDS)
+        fields.update(client_id=client_id, assigned_lawyer_id=lawyer_id, status=status)
+        for field in ('start_date', 'end_date'):
+            if fields[field]:
+                fields[field] = parse_date(fields[field])
+
+        self.case_numbers.add(case_number)
+        return fields
+
+def run_import(importer, path, created_by=None, reject_path=None, progress=None, batch_size=IMPORT_BATCH_SIZE):
+    """Import the rows of a file with an importer (ClientImporter, CaseImporter).
+
+    progress(done, total) is called after each batch; total may be None.
+    Raises ValueError if the file cannot be imported at all (unsupported
+    type, missing columns); nothing is written in that case.
+    """
+    from database import db
+
+    start = time.perf_counter()
+    total = count_rows(path) if progress else None
+    importer.prepare()
+    rejects = RejectFile(reject_path or default_reject_path(path))
+    imported = 0
+    done = 0
+
+    try:
+        with db.get_connection() as conn:
+            batch = []
+            for line, header, row in read_rows(path):
+                if done == 0:
+                    missing = [column for column in importer.required_columns if column not in row]
+                    if missing:
+                        raise ValueError(f"Missing columns: {', '.join(missing)}")
+                done += 1
+
+                try:
+                    batch.append(importer.check(row))
+                except ValueError as e:
+                    rejects.add(line, header, row, str(e))
+
+                if len(batch) >= batch_size:
+                    importer.repository.insert_many(conn, batch, created_by)
+                    imported += len(batch)
+                    batch = []
+                    if progress:
+                        # total is estimated, so never report past it
+                        progress(done, max(total, done) if total is not None else None)
+
+            if batch:
+                importer.repository.insert_many(conn, batch, created_by)
+                imported += len(batch)
+    finally:
+        reject_path = rejects.close()
+
+    if progress:
+        progress(done, done)
+    return ImportResult(imported, rejects.count, time.perf_counter() - start, reject_path)
+
+def import_clients(path, created_by=None, reject_path=None, progress=None):
+    """Import clients from a CSV or Excel file (see run_import)"""
+    return run_import(ClientImporter(), path, created_by, reject_path, progress)
+
+def import_cases(path, created_by=None, reject_path=None, progress=None):
+    """Import cases from a CSV or Excel file (see run_import)"""
+    return run_import(CaseImporter(), path, created_by, reject_path, progress)
+
+def main():
+    parser = argparse.ArgumentParser(description="Import clients or cases from a CSV or Excel file")
+    parser.add_argument("entity", choices=["clients", "cases"])
+    parser.add_argument("path")
+    parser.add_argument("--rejects", help="Where to write rejected rows (default: <file>.rejects.csv)")
+    args = parser.parse_args()
+
+    importers = {'clients': import_clients, 'cases': import_cases}
+    result = importers[args.entity](args.path, reject_path=args.rejects)
+
+    print(f"Imported {result.imported} {args.entity}, rejected {result.rejected} "
+          f"in {result.seconds:.2f}s ({result.rows_per_second:.0f} rows/s)")
+    if result.reject_path:
+        print(f"Rejected rows: {result.reject_path}")
+
+if __name__ == "__main__":
+    main()
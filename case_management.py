@@ -4,15 +4,24 @@ Case Management Module for Law Office Management System
 import tkinter as tk
 from tkinter import ttk
 from gui_components import *
-from database import db
 from auth import auth
 from i18n import i18n
+from search_index import IncrementalSearch, build_match_query
+from background import get_runner
+from activity_log import activity_log
+from change_bus import change_bus
+from repositories import case_repository
+from lookups import client_lookup, lawyer_lookup
 from datetime import datetime, date
 
 class CaseManagement:
+    # Kept current from the change bus (see ViewCache.sync)
+    live_tables = ('cases',)
+    
     def __init__(self, parent):
         self.parent = parent
         self.current_case = None
+        self.cases_search = IncrementalSearch(case_repository.search, self.case_document)
         self.create_interface()
         self.load_cases()
     
@@ -63,8 +72,8 @@ class CaseManagement:
         ).pack(side="right" if i18n.is_rtl() else "left", padx=5)
         
         # Search frame
-        search_frame = SearchFrame(main_frame, self.search_cases)
-        search_frame.pack(fill="x", pady=(0, 10))
+        self.search_frame = SearchFrame(main_frame, self.search_cases, incremental=True)
+        self.search_frame.pack(fill="x", pady=(0, 10))
         
         # Cases list
         list_frame = tk.Frame(main_frame, bg="white")
@@ -109,60 +118,66 @@ class CaseManagement:
         
         # Bind selection
         self.cases_tree.bind('<<TreeviewSelect>>', self.on_case_select)
+        
+        # Saved and deleted cases are applied row by row
+        change_bus.subscribe('cases', self.on_cases_changed, owner=main_frame)
     
     def load_cases(self):
-        """Load cases from database"""
-        try:
-            # Clear existing items
-            for item in self.cases_tree.get_children():
-                self.cases_tree.delete(item)
-            
-            with db.get_connection() as conn:
-                cursor = conn.cursor()
-                
-                # Join with clients and users tables to get names
-                query = '''
-                    SELECT 
-                        c.id,
-                        c.case_number,
-                        c.title,
-                        cl.name as client_name,
-                        c.court_name,
-                        c.case_type,
-                        c.status,
-                        u.full_name as lawyer_name,
-                        c.start_date
-                    FROM cases c
-                    LEFT JOIN clients cl ON c.client_id = cl.id
-                    LEFT JOIN users u ON c.assigned_lawyer_id = u.id
-                    ORDER BY c.created_at DESC
-                '''
-                
-                cursor.execute(query)
-                cases = cursor.fetchall()
-                
-                for case in cases:
-                    # Format data for display
-                    case_data = [
-                        case['case_number'] or '',
-                        case['title'] or '',
-                        case['client_name'] or '',
-                        case['court_name'] or '',
-                        case['case_type'] or '',
-                        i18n.get(case['status'], case['status']) if case['status'] else '',
-                        case['lawyer_name'] or '',
-                        self.format_date(case['start_date']) if case['start_date'] else ''
-                    ]
-                    
-                    # Insert with RTL formatting
-                    formatted_data = [RTLWidget.format_text(str(val)) for val in case_data]
-                    item = self.cases_tree.insert("", "end", values=formatted_data)
-                    
-                    # Store case ID in item
-                    self.cases_tree.set(item, '#1', case['id'])
-                    
-        except Exception as e:
-            show_error(f"Error loading cases: {str(e)}")
+        """Load cases from database, a page at a time as the list scrolls"""
+        # Called after every change, so earlier search results are stale
+        self.cases_search.reset()
+        self.cases_tree.set_page_source(
+            case_repository.page,
+            case_repository.page_key,
+            self.format_case_row,
+            on_error=lambda e: show_error(f"Error loading cases: {str(e)}"),
+            row_id=lambda case: case.id
+        )
+    
+    def refresh(self):
+        """Reload after the data changed elsewhere, keeping the current search"""
+        self.cases_search.reset()
+        self.search_cases(self.search_frame.get_search_text())
+    
+    def on_cases_changed(self, table, action, case_id):
+        """Apply a change to one case without reloading the list"""
+        # Cached search results may now include or miss this case
+        self.cases_search.reset()
+        
+        if action == 'delete':
+            self.cases_tree.remove_row(case_id)
+            return
+        
+        get_runner(self.cases_tree).submit(
+            case_repository.get_summary, case_id,
+            on_success=lambda case: self.show_changed_case(action, case),
+            on_error=lambda e: print(f"Error loading case {case_id}: {e}")
+        )
+    
+    def show_changed_case(self, action, case):
+        """Redraw a saved case, or add a new one to the top of the list"""
+        if case is None or self.cases_tree.update_row(case):
+            return
+        
+        # Search results only change when the search runs again
+        if action == 'create' and not self.search_frame.get_search_text().strip():
+            self.cases_tree.prepend_row(case)
+    
+    def format_case_row(self, case):
+        """Format a case row for display"""
+        case_data = [
+            case.case_number or '',
+            case.title or '',
+            case.client_name or '',
+            case.court_name or '',
+            case.case_type or '',
+            i18n.get(case.status, case.status) if case.status else '',
+            case.lawyer_name or '',
+            self.format_date(case.start_date) if case.start_date else ''
+        ]
+        
+        # RTL formatting
+        return [RTLWidget.format_text(str(val)) for val in case_data]
     
     def search_cases(self, search_term):
         """Search cases"""
@@ -170,66 +185,31 @@ class CaseManagement:
             self.load_cases()
             return
         
-        try:
-            # Clear existing items
-            for item in self.cases_tree.get_children():
-                self.cases_tree.delete(item)
-            
-            with db.get_connection() as conn:
-                cursor = conn.cursor()
-                
-                search_pattern = f"%{search_term}%"
-                query = '''
-                    SELECT 
-                        c.id,
-                        c.case_number,
-                        c.title,
-                        cl.name as client_name,
-                        c.court_name,
-                        c.case_type,
-                        c.status,
-                        u.full_name as lawyer_name,
-                        c.start_date
-                    FROM cases c
-                    LEFT JOIN clients cl ON c.client_id = cl.id
-                    LEFT JOIN users u ON c.assigned_lawyer_id = u.id
-                    WHERE c.case_number LIKE ? OR c.title LIKE ? OR cl.name LIKE ?
-                    ORDER BY c.created_at DESC
-                '''
-                
-                cursor.execute(query, (search_pattern, search_pattern, search_pattern))
-                cases = cursor.fetchall()
-                
-                for case in cases:
-                    case_data = [
-                        case['case_number'] or '',
-                        case['title'] or '',
-                        case['client_name'] or '',
-                        case['court_name'] or '',
-                        case['case_type'] or '',
-                        i18n.get(case['status'], case['status']) if case['status'] else '',
-                        case['lawyer_name'] or '',
-                        self.format_date(case['start_date']) if case['start_date'] else ''
-                    ]
-                    
-                    formatted_data = [RTLWidget.format_text(str(val)) for val in case_data]
-                    item = self.cases_tree.insert("", "end", values=formatted_data)
-                    self.cases_tree.set(item, '#1', case['id'])
-                    
-        except Exception as e:
-            show_error(f"Error searching cases: {str(e)}")
+        if not build_match_query(search_term):
+            self.cases_tree.clear_page_source()
+            return
+        
+        # Search results replace the paged list
+        self.cases_tree.set_row_source(
+            lambda: self.cases_search.search(search_term),
+            self.format_case_row,
+            on_error=lambda e: show_error(f"Error searching cases: {str(e)}"),
+            row_id=lambda case: case.id
+        )
+    
+    def case_document(self, case):
+        """Searchable values of a search result, as indexed in cases_fts"""
+        return (case.case_number, case.title, case.client_name, case.client_national_id,
+                case.client_phone, case.client_email, case.description)
     
     def on_case_select(self, event):
         """Handle case selection"""
-        selection = self.cases_tree.selection()
-        if selection:
-            item = selection[0]
-            # The case ID is stored in the first column (hidden)
-            self.current_case = self.cases_tree.item(item)['values'][0] if self.cases_tree.item(item)['values'] else None
+        # Tree items are keyed by case ID
+        self.current_case = self.cases_tree.selected_id()
     
     def add_case(self):
         """Add new case"""
-        CaseDialog(self.parent, callback=self.load_cases)
+        CaseDialog(self.parent)
     
     def edit_case(self):
         """Edit selected case"""
@@ -237,37 +217,7 @@ class CaseManagement:
             show_warning(i18n.get('select_case_first', 'Please select a case first'))
             return
         
-        try:
-            # Get case ID from hidden column
-            selection = self.cases_tree.selection()
-            if not selection:
-                show_warning(i18n.get('select_case_first', 'Please select a case first'))
-                return
-            
-            # Get case ID from the tree item
-            case_id = None
-            for item in self.cases_tree.get_children():
-                if item in selection:
-                    # Try to get the case ID from the database based on case number
-                    values = self.cases_tree.item(item)['values']
-                    case_number = values[0] if values else None
-                    
-                    if case_number:
-                        with db.get_connection() as conn:
-                            cursor = conn.cursor()
-                            cursor.execute("SELECT id FROM cases WHERE case_number = ?", (case_number,))
-                            result = cursor.fetchone()
-                            if result:
-                                case_id = result['id']
-                    break
-            
-            if case_id:
-                CaseDialog(self.parent, case_id=case_id, callback=self.load_cases)
-            else:
-                show_warning(i18n.get('case_not_found', 'Case not found'))
-                
-        except Exception as e:
-            show_error(f"Error editing case: {str(e)}")
+        CaseDialog(self.parent, case_id=self.current_case)
     
     def delete_case(self):
         """Delete selected case"""
@@ -278,40 +228,30 @@ class CaseManagement:
         if not confirm_action(i18n.get('confirm_delete_case', 'Are you sure you want to delete this case?')):
             return
         
-        try:
-            # Get case ID similar to edit_case
-            selection = self.cases_tree.selection()
-            if not selection:
-                return
-            
-            case_id = None
-            for item in self.cases_tree.get_children():
-                if item in selection:
-                    values = self.cases_tree.item(item)['values']
-                    case_number = values[0] if values else None
-                    
-                    if case_number:
-                        with db.get_connection() as conn:
-                            cursor = conn.cursor()
-                            cursor.execute("SELECT id FROM cases WHERE case_number = ?", (case_number,))
-                            result = cursor.fetchone()
-                            if result:
-                                case_id = result['id']
-                    break
-            
-            if case_id:
-                with db.get_connection() as conn:
-                    cursor = conn.cursor()
-                    cursor.execute("DELETE FROM cases WHERE id = ?", (case_id,))
-                    conn.commit()
-                
-                show_success(i18n.get('case_deleted', 'Case deleted successfully'))
-                self.load_cases()
-            else:
-                show_warning(i18n.get('case_not_found', 'Case not found'))
-                
-        except Exception as e:
-            show_error(f"Error deleting case: {str(e)}")
+        case_id = self.current_case
+        case = self.cases_tree.get_row(case_id)
+        user_id = auth.get_current_user()['id']
+        
+        def delete():
+            if not case_repository.delete(case_id):
+                return False
+            activity_log.log('case', 'delete', case_id, f"{case.case_number} - {case.title}" if case else None, user_id)
+            return True
+        
+        get_runner(self.cases_tree).submit(
+            delete,
+            on_success=lambda deleted: self.show_deleted_case(case_id, deleted),
+            on_error=lambda e: show_error(f"Error deleting case: {str(e)}")
+        )
+    
+    def show_deleted_case(self, case_id, deleted):
+        """Report the outcome of delete_case"""
+        if not deleted:
+            show_warning(i18n.get('case_not_found', 'Case not found'))
+            return
+        
+        change_bus.publish('cases', 'delete', case_id)
+        show_success(i18n.get('case_deleted', 'Case deleted successfully'))
     
     def format_date(self, date_str):
         """Format date for display"""
@@ -334,8 +274,6 @@ class CaseDialog:
         self.parent = parent
         self.case_id = case_id
         self.callback = callback
-        self.clients = []
-        self.lawyers = []
         
         # Create dialog window
         self.dialog = tk.Toplevel(parent)
@@ -392,7 +330,7 @@ class CaseDialog:
         # Client
         StyledLabel(form_frame, text=i18n.get('client_name')).pack(anchor="e" if i18n.is_rtl() else "w")
         self.client_var = tk.StringVar()
-        self.client_combo = StyledCombobox(form_frame, textvariable=self.client_var, state="readonly")
+        self.client_combo = AutocompleteCombobox(form_frame, textvariable=self.client_var)
         self.client_combo.pack(fill="x", pady=(5, 15))
         
         # Court Name
@@ -424,7 +362,7 @@ class CaseDialog:
         # Assigned Lawyer
         StyledLabel(form_frame, text=i18n.get('assigned_lawyer')).pack(anchor="e" if i18n.is_rtl() else "w")
         self.lawyer_var = tk.StringVar()
-        self.lawyer_combo = StyledCombobox(form_frame, textvariable=self.lawyer_var, state="readonly")
+        self.lawyer_combo = AutocompleteCombobox(form_frame, textvariable=self.lawyer_var)
         self.lawyer_combo.pack(fill="x", pady=(5, 15))
         
         # Start Date
@@ -446,12 +384,13 @@ class CaseDialog:
         buttons_frame = tk.Frame(form_frame, bg="white")
         buttons_frame.pack(fill="x", pady=20)
         
-        StyledButton(
+        self.save_button = StyledButton(
             buttons_frame,
             text=i18n.get('save'),
             command=self.save_case,
             style="success"
-        ).pack(side="right" if i18n.is_rtl() else "left", padx=5)
+        )
+        self.save_button.pack(side="right" if i18n.is_rtl() else "left", padx=5)
         
         StyledButton(
             buttons_frame,
@@ -461,79 +400,75 @@ class CaseDialog:
         ).pack(side="right" if i18n.is_rtl() else "left", padx=5)
     
     def load_data(self):
-        """Load clients and lawyers data"""
-        try:
-            with db.get_connection() as conn:
-                cursor = conn.cursor()
-                
-                # Load clients
-                cursor.execute("SELECT id, name FROM clients ORDER BY name")
-                self.clients = cursor.fetchall()
-                client_names = [RTLWidget.format_text(client['name']) for client in self.clients]
-                self.client_combo['values'] = client_names
-                
-                # Load lawyers
-                cursor.execute("SELECT id, full_name FROM users WHERE role IN ('lawyer', 'admin') AND is_active = 1 ORDER BY full_name")
-                self.lawyers = cursor.fetchall()
-                lawyer_names = [RTLWidget.format_text(lawyer['full_name']) for lawyer in self.lawyers]
-                self.lawyer_combo['values'] = lawyer_names
-                
-        except Exception as e:
-            show_error(f"Error loading data: {str(e)}")
+        """Load the client and lawyer pick lists (cached until their tables change)"""
+        get_runner(self.dialog).submit(
+            lambda: (client_lookup.get(), lawyer_lookup.get()),
+            on_success=self.show_lookups,
+            on_error=lambda e: show_error(f"Error loading data: {str(e)}")
+        )
+    
+    def show_lookups(self, indexes):
+        """Fill the client and lawyer pickers"""
+        if not self.dialog.winfo_exists():
+            return
+        
+        client_index, lawyer_index = indexes
+        self.client_combo.set_index(client_index)
+        self.lawyer_combo.set_index(lawyer_index)
     
     def load_case_data(self):
         """Load existing case data for editing"""
+        get_runner(self.dialog).submit(
+            case_repository.get, self.case_id,
+            on_success=self.show_case_data,
+            on_error=lambda e: show_error(f"Error loading case data: {str(e)}")
+        )
+    
+    def show_case_data(self, case):
+        """Fill the form with a loaded case"""
+        if not self.dialog.winfo_exists():
+            return
+        
         try:
-            with db.get_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                    SELECT c.*, cl.name as client_name, u.full_name as lawyer_name
-                    FROM cases c
-                    LEFT JOIN clients cl ON c.client_id = cl.id
-                    LEFT JOIN users u ON c.assigned_lawyer_id = u.id
-                    WHERE c.id = ?
-                ''', (self.case_id,))
+            if case:
+                self.case_number_var.set(case.case_number or '')
+                self.title_var.set(case.title or '')
+                self.court_var.set(case.court_name or '')
+                self.case_type_var.set(case.case_type or '')
+                self.opponent_var.set(case.opponent_name or '')
+                
+                # Set status
+                status_map = {'open': i18n.get('open'), 'closed': i18n.get('closed'), 
+                            'pending': i18n.get('pending'), 'postponed': i18n.get('postponed')}
+                self.status_var.set(status_map.get(case.status, case.status))
+                
+                # Set client
+                if case.client_id:
+                    self.client_combo.select(case.client_id, case.client_name)
+                
+                # Set lawyer
+                if case.assigned_lawyer_id:
+                    self.lawyer_combo.select(case.assigned_lawyer_id, case.lawyer_name)
                 
-                case = cursor.fetchone()
-                if case:
-                    self.case_number_var.set(case['case_number'] or '')
-                    self.title_var.set(case['title'] or '')
-                    self.court_var.set(case['court_name'] or '')
-                    self.case_type_var.set(case['case_type'] or '')
-                    self.opponent_var.set(case['opponent_name'] or '')
-                    
-                    # Set status
-                    status_map = {'open': i18n.get('open'), 'closed': i18n.get('closed'), 
-                                'pending': i18n.get('pending'), 'postponed': i18n.get('postponed')}
-                    self.status_var.set(status_map.get(case['status'], case['status']))
-                    
-                    # Set client
-                    if case['client_name']:
-                        self.client_var.set(RTLWidget.format_text(case['client_name']))
-                    
-                    # Set lawyer
-                    if case['lawyer_name']:
-                        self.lawyer_var.set(RTLWidget.format_text(case['lawyer_name']))
-                    
-                    # Set dates
-                    if case['start_date']:
-                        try:
-                            start_date = datetime.strptime(case['start_date'], "%Y-%m-%d").date()
-                            self.start_date_picker.set_date(start_date)
-                        except:
-                            pass
-                    
-                    if case['end_date']:
-                        try:
-                            end_date = datetime.strptime(case['end_date'], "%Y-%m-%d").date()
-                            self.end_date_picker.set_date(end_date)
-                        except:
-                            pass
-                    
-                    # Set description
-                    if case['description']:
-                        self.description_text.insert("1.0", case['description'])
+                # Set dates
+                if case.start_date:
+                    try:
+                        start_date = datetime.strptime(case.start_date, "%Y-%m-%d").date()
+                        self.start_date_picker.set_date(start_date)
+                    except:
+                        pass
                 
+                if case.end_date:
+                    try:
+                        end_date = datetime.strptime(case.end_date, "%Y-%m-%d").date()
+                        self.end_date_picker.set_date(end_date)
+                    except:
+                        pass
+                
+                # Set description
+                if case.description:
+                    self.description_text.insert("1.0", case.description)
+            
         except Exception as e:
             show_error(f"Error loading case data: {str(e)}")
     
@@ -550,24 +485,14 @@ class CaseDialog:
                 return
             
             # Get client ID
-            client_id = None
-            client_name = self.client_var.get()
-            for client in self.clients:
-                if RTLWidget.format_text(client['name']) == client_name:
-                    client_id = client['id']
-                    break
+            client_id = self.client_combo.get_id()
             
             if not client_id:
                 show_error(i18n.get('client_required', 'Please select a client'))
                 return
             
             # Get lawyer ID
-            lawyer_id = None
-            lawyer_name = self.lawyer_var.get()
-            for lawyer in self.lawyers:
-                if RTLWidget.format_text(lawyer['full_name']) == lawyer_name:
-                    lawyer_id = lawyer['id']
-                    break
+            lawyer_id = self.lawyer_combo.get_id()
             
             # Get status value
             status_map = {i18n.get('open'): 'open', i18n.get('closed'): 'closed', 
@@ -587,63 +512,57 @@ class CaseDialog:
             # Get description
             description = self.description_text.get("1.0", "end-1c").strip()
             
-            with db.get_connection() as conn:
-                cursor = conn.cursor()
-                
-                if self.case_id:
-                    # Update existing case
-                    cursor.execute('''
-                        UPDATE cases SET
-                            case_number = ?, title = ?, client_id = ?, court_name = ?,
-                            case_type = ?, opponent_name = ?, status = ?, assigned_lawyer_id = ?,
-                            start_date = ?, end_date = ?, description = ?, updated_at = CURRENT_TIMESTAMP
-                        WHERE id = ?
-                    ''', (
-                        self.case_number_var.get().strip(),
-                        self.title_var.get().strip(),
-                        client_id,
-                        self.court_var.get().strip(),
-                        self.case_type_var.get().strip(),
-                        self.opponent_var.get().strip(),
-                        status,
-                        lawyer_id,
-                        start_date.strftime("%Y-%m-%d") if start_date else None,
-                        end_date.strftime("%Y-%m-%d") if end_date else None,
-                        description if description else None,
-                        self.case_id
-                    ))
-                    message = i18n.get('case_updated', 'Case updated successfully')
+            fields = {
+                'case_number': self.case_number_var.get().strip(),
+                'title': self.title_var.get().strip(),
+                'client_id': client_id,
+                'court_name': self.court_var.get().strip(),
+                'case_type': self.case_type_var.get().strip(),
+                'opponent_name': self.opponent_var.get().strip(),
+                'status': status,
+                'assigned_lawyer_id': lawyer_id,
+                'start_date': start_date.strftime("%Y-%m-%d") if start_date else None,
+                'end_date': end_date.strftime("%Y-%m-%d") if end_date else None,
+                'description': description if description else None
+            }
+            
+            case_id = self.case_id
+            user_id = auth.get_current_user()['id']
+            
+            def save():
+                if case_id:
+                    case_repository.update(case_id, fields)
+                    saved_id, action = case_id, 'update'
                 else:
-                    # Insert new case
-                    cursor.execute('''
-                        INSERT INTO cases (
-                            case_number, title, client_id, court_name, case_type,
-                            opponent_name, status, assigned_lawyer_id, start_date,
-                            end_date, description, created_by
-                        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    ''', (
-                        self.case_number_var.get().strip(),
-                        self.title_var.get().strip(),
-                        client_id,
-                        self.court_var.get().strip(),
-                        self.case_type_var.get().strip(),
-                        self.opponent_var.get().strip(),
-                        status,
-                        lawyer_id,
-                        start_date.strftime("%Y-%m-%d") if start_date else None,
-                        end_date.strftime("%Y-%m-%d") if end_date else None,
-                        description if description else None,
-                        auth.get_current_user()['id']
-                    ))
-                    message = i18n.get('case_added', 'Case added successfully')
-                
-                conn.commit()
-                show_success(message)
-                
-                if self.callback:
-                    self.callback()
-                
-                self.dialog.destroy()
-                
+                    saved_id = case_repository.create(fields, user_id)
+                    action = 'create'
+                activity_log.log('case', action, saved_id, f"{fields['case_number']} - {fields['title']}", user_id)
+                return saved_id, action
+            
+            # One save at a time
+            self.save_button.config(state="disabled")
+            get_runner(self.dialog).submit(save, on_success=self.show_saved_case, on_error=self.show_save_error)
+            
         except Exception as e:
-            show_error(f"Error saving case: {str(e)}")
\ No newline at end of file
+            show_error(f"Error saving case: {str(e)}")
+    
+    def show_saved_case(self, saved):
+        """Announce a saved case and close the dialog"""
+        case_id, action = saved
+        change_bus.publish('cases', action, case_id)
+        if action == 'update':
+            show_success(i18n.get('case_updated', 'Case updated successfully'))
+        else:
+            show_success(i18n.get('case_added', 'Case added successfully'))
+        
+        if self.callback:
+            self.callback()
+        
+        if self.dialog.winfo_exists():
+            self.dialog.destroy()
+    
+    def show_save_error(self, error):
+        """Report a failed save and allow another try"""
+        if self.dialog.winfo_exists():
+            self.save_button.config(state="normal")
+        show_error(f"Error saving case: {str(error)}")
\ No newline at end of file
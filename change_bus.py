@@ -0,0 +1,51 @@
+"""
+Change notifications for Law Office Management System
+
+Code that writes to the database publishes what it changed (table, action
+and row id) after committing; open views subscribe to the tables they show
+and update just the affected rows instead of reloading everything.
+
+Changes made by other processes sharing the database are not published;
+views pick those up through the change counters in change_tracking.
+
+Publish and subscribe from the Tk thread: callbacks run synchronously,
+in subscription order.
+"""
+
+# Matches every table in subscribe()
+ALL_TABLES = '*'
+
+class ChangeBus:
+    """In-process publish/subscribe of row changes, keyed by table"""
+
+    def __init__(self):
+        self._subscribers = {}  # table -> [callback]
+
+    def subscribe(self, table, callback, owner=None):
+        """Call callback(table, action, row_id) for each change to table.
+
+        Returns a function that cancels the subscription. With owner (a
+        widget), the subscription ends when the widget is destroyed.
+        """
+        self._subscribers.setdefault(table, []).append(callback)
+
+        def unsubscribe():
+            callbacks = self._subscribers.get(table, [])
+            if callback in callbacks:
+                callbacks.remove(callback)
+
+        if owner is not None:
+            owner.bind('<Destroy>', lambda event: unsubscribe() if event.widget is owner else None, add='+')
+        return unsubscribe
+
+    def publish(self, table, action, row_id):
+        """Announce that a row was created, updated or deleted"""
+        callbacks = self._subscribers.get(table, []) + self._subscribers.get(ALL_TABLES, [])
+        for callback in callbacks:
+            try:
+                callback(table, action, row_id)
+            except Exception as e:
+                print(f"Change notification error: {e}")
+
+# Global change bus instance
+change_bus = ChangeBus()
@@ -0,0 +1,50 @@
+"""
+Change tracking for Law Office Management System
+
+Every tracked table has a version number in table_versions that triggers
+raise on each insert, update and delete. A view remembers the versions it
+was loaded from and only reloads when one of them has moved.
+
+PRAGMA data_version is not enough here: it only reports commits made by
+other connections, and the pool hands out several connections per process.
+"""
+import sqlite3
+
+TRACKED_TABLES = [
+    'users', 'clients', 'cases', 'tasks', 'appointments',
+    'documents', 'invoices', 'case_sessions', 'activity_log'
+]
+
+def create_change_tracking(conn):
+    """Create the versions table and its triggers"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS table_versions (
+            table_name TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        ) WITHOUT ROWID
+    ''')
+
+    for table in TRACKED_TABLES:
+        conn.execute("INSERT OR IGNORE INTO table_versions (table_name) VALUES (?)", (table,))
+        for event in ('INSERT', 'UPDATE', 'DELETE'):
+            conn.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS table_versions_{table}_{event.lower()}
+                AFTER {event} ON {table} BEGIN
+                    UPDATE table_versions SET version = version + 1 WHERE table_name = '{table}';
+                END
+            ''')
+
+def get_versions(conn, tables):
+    """Get the current version of each table, or None if they are not tracked"""
+    placeholders = ", ".join("?" * len(tables))
+    try:
+        rows = conn.execute(
+            f"SELECT table_name, version FROM table_versions WHERE table_name IN ({placeholders})",
+            list(tables)
+        ).fetchall()
+    except sqlite3.OperationalError:
+        # Database without the versions table: changes cannot be detected
+        return None
+
+    versions = dict((row[0], row[1]) for row in rows)
+    return {table: versions.get(table, 0) for table in tables}
@@ -4,14 +4,22 @@ Client Management Module for Law Office Management System
 import tkinter as tk
 from tkinter import ttk
 from gui_components import *
-from database import db
 from auth import auth
 from i18n import i18n
+from search_index import IncrementalSearch, build_match_query
+from background import get_runner
+from activity_log import activity_log
+from change_bus import change_bus
+from repositories import case_repository, client_repository
 
 class ClientManagement:
+    # Kept current from the change bus (see ViewCache.sync)
+    live_tables = ('clients',)
+    
     def __init__(self, parent):
         self.parent = parent
         self.current_client = None
+        self.clients_search = IncrementalSearch(client_repository.search, self.client_document)
         self.create_interface()
         self.load_clients()
     
@@ -69,8 +77,8 @@ class ClientManagement:
         ).pack(side="right" if i18n.is_rtl() else "left", padx=5)
         
         # Search frame
-        search_frame = SearchFrame(main_frame, self.search_clients)
-        search_frame.pack(fill="x", pady=(0, 10))
+        self.search_frame = SearchFrame(main_frame, self.search_clients, incremental=True)
+        self.search_frame.pack(fill="x", pady=(0, 10))
         
         # Clients list
         list_frame = tk.Frame(main_frame, bg="white")
@@ -113,56 +121,64 @@ class ClientManagement:
         
         # Bind selection
         self.clients_tree.bind('<<TreeviewSelect>>', self.on_client_select)
+        
+        # Saved and deleted clients are applied row by row
+        change_bus.subscribe('clients', self.on_clients_changed, owner=main_frame)
     
     def load_clients(self):
-        """Load clients from database"""
-        try:
-            # Clear existing items
-            for item in self.clients_tree.get_children():
-                self.clients_tree.delete(item)
-            
-            with db.get_connection() as conn:
-                cursor = conn.cursor()
-                
-                # Get clients with case count
-                query = '''
-                    SELECT 
-                        c.id,
-                        c.name,
-                        c.phone,
-                        c.email,
-                        c.national_id,
-                        c.created_at,
-                        COUNT(cs.id) as case_count
-                    FROM clients c
-                    LEFT JOIN cases cs ON c.id = cs.client_id
-                    GROUP BY c.id, c.name, c.phone, c.email, c.national_id, c.created_at
-                    ORDER BY c.created_at DESC
-                '''
-                
-                cursor.execute(query)
-                clients = cursor.fetchall()
-                
-                for client in clients:
-                    # Format data for display
-                    client_data = [
-                        client['name'] or '',
-                        client['phone'] or '',
-                        client['email'] or '',
-                        client['national_id'] or '',
-                        str(client['case_count']) if client['case_count'] else '0',
-                        self.format_date(client['created_at']) if client['created_at'] else ''
-                    ]
-                    
-                    # Insert with RTL formatting
-                    formatted_data = [RTLWidget.format_text(str(val)) for val in client_data]
-                    item = self.clients_tree.insert("", "end", values=formatted_data)
-                    
-                    # Store client ID in item tags
-                    self.clients_tree.set(item, '#1', client['id'])
-                    
-        except Exception as e:
-            show_error(f"Error loading clients: {str(e)}")
+        """Load clients from database, a page at a time as the list scrolls"""
+        # Called after every change, so earlier search results are stale
+        self.clients_search.reset()
+        self.clients_tree.set_page_source(
+            client_repository.page,
+            client_repository.page_key,
+            self.format_client_row,
+            on_error=lambda e: show_error(f"Error loading clients: {str(e)}"),
+            row_id=lambda client: client.id
+        )
+    
+    def refresh(self):
+        """Reload after the data changed elsewhere, keeping the current search"""
+        self.clients_search.reset()
+        self.search_clients(self.search_frame.get_search_text())
+    
+    def on_clients_changed(self, table, action, client_id):
+        """Apply a change to one client without reloading the list"""
+        # Cached search results may now include or miss this client
+        self.clients_search.reset()
+        
+        if action == 'delete':
+            self.clients_tree.remove_row(client_id)
+            return
+        
+        get_runner(self.clients_tree).submit(
+            client_repository.get_summary, client_id,
+            on_success=lambda client: self.show_changed_client(action, client),
+            on_error=lambda e: print(f"Error loading client {client_id}: {e}")
+        )
+    
+    def show_changed_client(self, action, client):
+        """Redraw a saved client, or add a new one to the top of the list"""
+        if client is None or self.clients_tree.update_row(client):
+            return
+        
+        # Search results only change when the search runs again
+        if action == 'create' and not self.search_frame.get_search_text().strip():
+            self.clients_tree.prepend_row(client)
+    
+    def format_client_row(self, client):
+        """Format a client row for display"""
+        client_data = [
+            client.name or '',
+            client.phone or '',
+            client.email or '',
+            client.national_id or '',
+            str(client.case_count) if client.case_count else '0',
+            self.format_date(client.created_at) if client.created_at else ''
+        ]
+        
+        # RTL formatting
+        return [RTLWidget.format_text(str(val)) for val in client_data]
     
     def search_clients(self, search_term):
         """Search clients"""
@@ -170,75 +186,30 @@ class ClientManagement:
             self.load_clients()
             return
         
-        try:
-            # Clear existing items
-            for item in self.clients_tree.get_children():
-                self.clients_tree.delete(item)
-            
-            with db.get_connection() as conn:
-                cursor = conn.cursor()
-                
-                search_pattern = f"%{search_term}%"
-                query = '''
-                    SELECT 
-                        c.id,
-                        c.name,
-                        c.phone,
-                        c.email,
-                        c.national_id,
-                        c.created_at,
-                        COUNT(cs.id) as case_count
-                    FROM clients c
-                    LEFT JOIN cases cs ON c.id = cs.client_id
-                    WHERE c.name LIKE ? OR c.phone LIKE ? OR c.email LIKE ? OR c.national_id LIKE ?
-                    GROUP BY c.id, c.name, c.phone, c.email, c.national_id, c.created_at
-                    ORDER BY c.created_at DESC
-                '''
-                
-                cursor.execute(query, (search_pattern, search_pattern, search_pattern, search_pattern))
-                clients = cursor.fetchall()
-                
-                for client in clients:
-                    client_data = [
-                        client['name'] or '',
-                        client['phone'] or '',
-                        client['email'] or '',
-                        client['national_id'] or '',
-                        str(client['case_count']) if client['case_count'] else '0',
-                        self.format_date(client['created_at']) if client['created_at'] else ''
-                    ]
-                    
-                    formatted_data = [RTLWidget.format_text(str(val)) for val in client_data]
-                    item = self.clients_tree.insert("", "end", values=formatted_data)
-                    self.clients_tree.set(item, '#1', client['id'])
-                    
-        except Exception as e:
-            show_error(f"Error searching clients: {str(e)}")
+        if not build_match_query(search_term):
+            self.clients_tree.clear_page_source()
+            return
+        
+        # Search results replace the paged list
+        self.clients_tree.set_row_source(
+            lambda: self.clients_search.search(search_term),
+            self.format_client_row,
+            on_error=lambda e: show_error(f"Error searching clients: {str(e)}"),
+            row_id=lambda client: client.id
+        )
+    
+    def client_document(self, client):
+        """Searchable values of a search result, as indexed in clients_fts"""
+        return (client.name, client.national_id, client.phone, client.email)
     
     def on_client_select(self, event):
         """Handle client selection"""
-        selection = self.clients_tree.selection()
-        if selection:
-            item = selection[0]
-            # Get client ID from database based on client name
-            values = self.clients_tree.item(item)['values']
-            if values:
-                client_name = values[0]
-                try:
-                    with db.get_connection() as conn:
-                        cursor = conn.cursor()
-                        cursor.execute("SELECT id FROM clients WHERE name = ?", (client_name,))
-                        result = cursor.fetchone()
-                        if result:
-                            self.current_client = result['id']
-                        else:
-                            self.current_client = None
-                except:
-                    self.current_client = None
+        # Tree items are keyed by client ID
+        self.current_client = self.clients_tree.selected_id()
     
     def add_client(self):
         """Add new client"""
-        ClientDialog(self.parent, callback=self.load_clients)
+        ClientDialog(self.parent)
     
     def edit_client(self):
         """Edit selected client"""
@@ -246,7 +217,7 @@ class ClientManagement:
             show_warning(i18n.get('select_client_first', 'Please select a client first'))
             return
         
-        ClientDialog(self.parent, client_id=self.current_client, callback=self.load_clients)
+        ClientDialog(self.parent, client_id=self.current_client)
     
     def delete_client(self):
         """Delete selected client"""
@@ -254,30 +225,40 @@ class ClientManagement:
             show_warning(i18n.get('select_client_first', 'Please select a client first'))
             return
         
-        try:
-            # Check if client has associated cases
-            with db.get_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute("SELECT COUNT(*) FROM cases WHERE client_id = ?", (self.current_client,))
-                case_count = cursor.fetchone()[0]
-                
-                if case_count > 0:
-                    show_warning(i18n.get('cannot_delete_client_with_cases', 'Cannot delete client with associated cases'))
-                    return
-            
-            if not confirm_action(i18n.get('confirm_delete_client', 'Are you sure you want to delete this client?')):
-                return
-            
-            with db.get_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute("DELETE FROM clients WHERE id = ?", (self.current_client,))
-                conn.commit()
-            
-            show_success(i18n.get('client_deleted', 'Client deleted successfully'))
-            self.load_clients()
-            
-        except Exception as e:
-            show_error(f"Error deleting client: {str(e)}")
+        # Check if client has associated cases
+        client_id = self.current_client
+        get_runner(self.clients_tree).submit(
+            client_repository.case_count, client_id,
+            on_success=lambda case_count: self.confirm_delete_client(client_id, case_count),
+            on_error=lambda e: show_error(f"Error deleting client: {str(e)}")
+        )
+    
+    def confirm_delete_client(self, client_id, case_count):
+        """Delete a client without cases once the user confirms"""
+        if case_count > 0:
+            show_warning(i18n.get('cannot_delete_client_with_cases', 'Cannot delete client with associated cases'))
+            return
+        
+        if not confirm_action(i18n.get('confirm_delete_client', 'Are you sure you want to delete this client?')):
+            return
+        
+        client = self.clients_tree.get_row(client_id)
+        user_id = auth.get_current_user()['id']
+        
+        def delete():
+            client_repository.delete(client_id)
+            activity_log.log('client', 'delete', client_id, client.name if client else None, user_id)
+        
+        get_runner(self.clients_tree).submit(
+            delete,
+            on_success=lambda result: self.show_deleted_client(client_id),
+            on_error=lambda e: show_error(f"Error deleting client: {str(e)}")
+        )
+    
+    def show_deleted_client(self, client_id):
+        """Announce a deleted client"""
+        change_bus.publish('clients', 'delete', client_id)
+        show_success(i18n.get('client_deleted', 'Client deleted successfully'))
     
     def view_client_cases(self):
         """View cases for selected client"""
@@ -370,12 +351,13 @@ class ClientDialog:
         buttons_frame = tk.Frame(main_frame, bg="white")
         buttons_frame.pack(fill="x", pady=20)
         
-        StyledButton(
+        self.save_button = StyledButton(
             buttons_frame,
             text=i18n.get('save'),
             command=self.save_client,
             style="success"
-        ).pack(side="right" if i18n.is_rtl() else "left", padx=5)
+        )
+        self.save_button.pack(side="right" if i18n.is_rtl() else "left", padx=5)
         
         StyledButton(
             buttons_frame,
@@ -386,24 +368,30 @@ class ClientDialog:
     
     def load_client_data(self):
         """Load existing client data for editing"""
+        get_runner(self.dialog).submit(
+            client_repository.get, self.client_id,
+            on_success=self.show_client_data,
+            on_error=lambda e: show_error(f"Error loading client data: {str(e)}")
+        )
+    
+    def show_client_data(self, client):
+        """Fill the form with a loaded client"""
+        if not self.dialog.winfo_exists():
+            return
+        
         try:
-            with db.get_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute("SELECT * FROM clients WHERE id = ?", (self.client_id,))
-                client = cursor.fetchone()
+            if client:
+                self.name_var.set(client.name or '')
+                self.phone_var.set(client.phone or '')
+                self.email_var.set(client.email or '')
+                self.national_id_var.set(client.national_id or '')
                 
-                if client:
-                    self.name_var.set(client['name'] or '')
-                    self.phone_var.set(client['phone'] or '')
-                    self.email_var.set(client['email'] or '')
-                    self.national_id_var.set(client['national_id'] or '')
-                    
-                    if client['address']:
-                        self.address_text.insert("1.0", client['address'])
-                    
-                    if client['notes']:
-                        self.notes_text.insert("1.0", client['notes'])
+                if client.address:
+                    self.address_text.insert("1.0", client.address)
                 
+                if client.notes:
+                    self.notes_text.insert("1.0", client.notes)
+            
         except Exception as e:
             show_error(f"Error loading client data: {str(e)}")
     
@@ -419,55 +407,58 @@ class ClientDialog:
             address = self.address_text.get("1.0", "end-1c").strip()
             notes = self.notes_text.get("1.0", "end-1c").strip()
             
-            with db.get_connection() as conn:
-                cursor = conn.cursor()
-                
-                if self.client_id:
-                    # Update existing client
-                    cursor.execute('''
-                        UPDATE clients SET
-                            name = ?, phone = ?, email = ?, national_id = ?,
-                            address = ?, notes = ?, updated_at = CURRENT_TIMESTAMP
-                        WHERE id = ?
-                    ''', (
-                        self.name_var.get().strip(),
-                        self.phone_var.get().strip() if self.phone_var.get().strip() else None,
-                        self.email_var.get().strip() if self.email_var.get().strip() else None,
-                        self.national_id_var.get().strip() if self.national_id_var.get().strip() else None,
-                        address if address else None,
-                        notes if notes else None,
-                        self.client_id
-                    ))
-                    message = i18n.get('client_updated', 'Client updated successfully')
+            fields = {
+                'name': self.name_var.get().strip(),
+                'phone': self.phone_var.get().strip() or None,
+                'email': self.email_var.get().strip() or None,
+                'national_id': self.national_id_var.get().strip() or None,
+                'address': address or None,
+                'notes': notes or None
+            }
+            
+            client_id = self.client_id
+            user_id = auth.get_current_user()['id']
+            
+            def save():
+                if client_id:
+                    client_repository.update(client_id, fields)
+                    saved_id, action = client_id, 'update'
                 else:
-                    # Insert new client
-                    cursor.execute('''
-                        INSERT INTO clients (name, phone, email, national_id, address, notes, created_by)
-                        VALUES (?, ?, ?, ?, ?, ?, ?)
-                    ''', (
-                        self.name_var.get().strip(),
-                        self.phone_var.get().strip() if self.phone_var.get().strip() else None,
-                        self.email_var.get().strip() if self.email_var.get().strip() else None,
-                        self.national_id_var.get().strip() if self.national_id_var.get().strip() else None,
-                        address if address else None,
-                        notes if notes else None,
-                        auth.get_current_user()['id']
-                    ))
-                    message = i18n.get('client_added', 'Client added successfully')
-                
-                conn.commit()
-                show_success(message)
-                
-                if self.callback:
-                    self.callback()
-                
-                self.dialog.destroy()
-                
+                    saved_id = client_repository.create(fields, user_id)
+                    action = 'create'
+                activity_log.log('client', action, saved_id, fields['name'], user_id)
+                return saved_id, action
+            
+            # One save at a time
+            self.save_button.config(state="disabled")
+            get_runner(self.dialog).submit(save, on_success=self.show_saved_client, on_error=self.show_save_error)
+            
         except Exception as e:
-            if "UNIQUE constraint failed" in str(e):
-                show_error(i18n.get('client_exists', 'Client with this national ID already exists'))
-            else:
-                show_error(f"Error saving client: {str(e)}")
+            self.show_save_error(e)
+    
+    def show_saved_client(self, saved):
+        """Announce a saved client and close the dialog"""
+        client_id, action = saved
+        change_bus.publish('clients', action, client_id)
+        if action == 'update':
+            show_success(i18n.get('client_updated', 'Client updated successfully'))
+        else:
+            show_success(i18n.get('client_added', 'Client added successfully'))
+        
+        if self.callback:
+            self.callback()
+        
+        if self.dialog.winfo_exists():
+            self.dialog.destroy()
+    
+    def show_save_error(self, error):
+        """Report a failed save and allow another try"""
+        if self.dialog.winfo_exists():
+            self.save_button.config(state="normal")
+        if "UNIQUE constraint failed" in str(error):
+            show_error(i18n.get('client_exists', 'Client with this national ID already exists'))
+        else:
+            show_error(f"Error saving client: {str(error)}")
 
 class ClientCasesDialog:
     def __init__(self, parent, client_id):
@@ -490,6 +481,10 @@ class ClientCasesDialog:
         self.create_interface()
         self.load_client_info()
         self.load_cases()
+        
+        # Stay current while cases or this client are edited elsewhere
+        change_bus.subscribe('cases', self.on_cases_changed, owner=self.dialog)
+        change_bus.subscribe('clients', self.on_client_changed, owner=self.dialog)
     
     def create_interface(self):
         """Create the interface"""
@@ -552,52 +547,75 @@ class ClientCasesDialog:
     
     def load_client_info(self):
         """Load client information"""
+        get_runner(self.dialog).submit(
+            client_repository.get, self.client_id,
+            on_success=self.show_client_info,
+            on_error=lambda e: show_error(f"Error loading client info: {str(e)}"),
+            key=('client-info', str(self.dialog))
+        )
+    
+    def show_client_info(self, client):
+        """Show the loaded client's details"""
+        if not self.dialog.winfo_exists():
+            return
+        
         try:
-            with db.get_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute("SELECT name, phone, email FROM clients WHERE id = ?", (self.client_id,))
-                client = cursor.fetchone()
-                
-                if client:
-                    info_text = f"{i18n.get('client_name')}: {client['name']}"
-                    if client['phone']:
-                        info_text += f" | {i18n.get('phone')}: {client['phone']}"
-                    if client['email']:
-                        info_text += f" | {i18n.get('email')}: {client['email']}"
-                    
-                    self.client_info_label.config(text=RTLWidget.format_text(info_text))
+            if client:
+                info_text = f"{i18n.get('client_name')}: {client.name}"
+                if client.phone:
+                    info_text += f" | {i18n.get('phone')}: {client.phone}"
+                if client.email:
+                    info_text += f" | {i18n.get('email')}: {client.email}"
                 
+                self.client_info_label.config(text=RTLWidget.format_text(info_text))
+            
         except Exception as e:
             show_error(f"Error loading client info: {str(e)}")
     
     def load_cases(self):
         """Load client cases"""
-        try:
-            with db.get_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                    SELECT case_number, title, case_type, status, start_date
-                    FROM cases 
-                    WHERE client_id = ?
-                    ORDER BY created_at DESC
-                ''', (self.client_id,))
-                
-                cases = cursor.fetchall()
-                
-                for case in cases:
-                    case_data = [
-                        case['case_number'] or '',
-                        case['title'] or '',
-                        case['case_type'] or '',
-                        i18n.get(case['status'], case['status']) if case['status'] else '',
-                        self.format_date(case['start_date']) if case['start_date'] else ''
-                    ]
-                    
-                    formatted_data = [RTLWidget.format_text(str(val)) for val in case_data]
-                    self.cases_tree.insert("", "end", values=formatted_data)
-                
-        except Exception as e:
-            show_error(f"Error loading cases: {str(e)}")
+        self.cases_tree.set_row_source(
+            lambda: case_repository.for_client(self.client_id),
+            self.format_case_row,
+            on_error=lambda e: show_error(f"Error loading cases: {str(e)}"),
+            row_id=lambda case: case.id
+        )
+    
+    def on_cases_changed(self, table, action, case_id):
+        """Add, redraw or remove one case of this client"""
+        if action == 'delete':
+            self.cases_tree.remove_row(case_id)
+            return
+        
+        def show_case(case):
+            if case is None:
+                # Moved to another client
+                self.cases_tree.remove_row(case_id)
+            else:
+                self.cases_tree.prepend_row(case)
+        
+        get_runner(self.cases_tree).submit(
+            case_repository.get_client_case, case_id, self.client_id,
+            on_success=show_case,
+            on_error=lambda e: print(f"Error loading case {case_id}: {e}")
+        )
+    
+    def on_client_changed(self, table, action, client_id):
+        """Redraw the client details when this client is edited"""
+        if client_id == self.client_id and action == 'update':
+            self.load_client_info()
+    
+    def format_case_row(self, case):
+        """Format a case row for display"""
+        case_data = [
+            case.case_number or '',
+            case.title or '',
+            case.case_type or '',
+            i18n.get(case.status, case.status) if case.status else '',
+            self.format_date(case.start_date) if case.start_date else ''
+        ]
+        
+        return [RTLWidget.format_text(str(val)) for val in case_data]
     
     def format_date(self, date_str):
         """Format date for display"""
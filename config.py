@@ -11,6 +11,23 @@ APP_TITLE = "نظام إدارة مكتب المحاماة - Law Office Manageme
 # Database settings
 DB_NAME = "law_office.db"
 DB_PATH = os.path.join(os.path.dirname(__file__), "data", DB_NAME)
+DB_POOL_SIZE = 5  # Maximum number of open connections
+DB_POOL_TIMEOUT = 30  # Seconds to wait for a free connection
+DB_POOL_HEALTH_CHECK_INTERVAL = 60  # Ping connections idle longer than this (seconds)
+DB_CACHED_STATEMENTS = 256  # Prepared statements kept per connection
+FETCH_BATCH_SIZE = 500  # Rows per fetchmany when streaming large results
+
+# SQLite performance profile, applied to every new connection.
+# WAL lets readers continue while another user writes. If the database lives
+# on a network share that does not support shared memory, use 'DELETE'.
+DB_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 64 * 1024 * 1024,  # 64MB
+    'cache_size': -16000,  # Negative values are in KiB (~16MB)
+    'temp_store': 'MEMORY',
+    'busy_timeout': 5000,  # Milliseconds to wait on a locked database
+}
 
 # Directories
 DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
@@ -31,6 +48,17 @@ FONT_SIZE_NORMAL = 12
 FONT_SIZE_HEADER = 16
 FONT_SIZE_TITLE = 20
 
+# Cached Arabic reshaping/BiDi results (distinct strings)
+TEXT_SHAPING_CACHE_SIZE = 20000
+
+# Large lists (cases, clients) are shown a page at a time
+TREE_PAGE_SIZE = 200  # Rows fetched per page
+TREE_MAX_PAGES = 5  # Pages kept in the list at once
+TREE_PAGE_THRESHOLD = 0.1  # Fetch the next page when this close to an edge (fraction of the list)
+
+# Module views (dashboard, cases, ...) kept alive while hidden, most recent first
+VIEW_CACHE_SIZE = 4
+
 # Colors
 PRIMARY_COLOR = "#2C3E50"
 SECONDARY_COLOR = "#3498DB"
@@ -49,9 +77,56 @@ DISPLAY_DATE_FORMAT = "%d/%m/%Y"
 MAX_FILE_SIZE = 50 * 1024 * 1024  # 50MB
 ALLOWED_EXTENSIONS = ['.pdf', '.doc', '.docx', '.jpg', '.jpeg', '.png', '.txt']
 
+# Background workers for database work started from the UI
+WORKER_THREADS = 3
+WORKER_POLL_INTERVAL = 30  # Milliseconds between checks for finished work
+
+# Search settings
+SEARCH_RESULT_LIMIT = 500  # Maximum rows returned by a search, best matches first
+SEARCH_DEBOUNCE_MS = 250  # Typing pause before a search-as-you-type query runs
+SEARCH_CANCEL_CHECK_STEPS = 1000  # SQLite VM steps between checks for a cancelled query
+AUTOCOMPLETE_LIMIT = 50  # Suggestions shown in a client/lawyer picker as you type
+
+# Dashboard settings
+DASHBOARD_STATS_TTL = 5  # Seconds the dashboard figures are reused before querying again
+
+# Activity log settings
+ACTIVITY_LOG_BATCH_SIZE = 20  # Entries buffered before they are written
+ACTIVITY_LOG_FLUSH_INTERVAL = 2.0  # Seconds before a partial batch is written
+ACTIVITY_LOG_RETENTION_DAYS = 365  # Older entries are rolled up into daily counts
+ACTIVITY_FEED_SIZE = 20  # Entries shown on the dashboard
+
+# Backup settings
+BACKUP_COMPRESS = False  # Gzip new backups (.db.gz)
+BACKUP_PAGES_PER_STEP = 256  # Database pages copied per backup step
+BACKUP_STEP_SLEEP = 0.005  # Seconds to pause between steps so the app stays responsive
+BACKUP_MAX_RESTARTS = 3  # Copy the rest in one step after this many write-triggered restarts
+BACKUP_CHUNK_SIZE = 1024 * 1024  # Bytes per read when compressing/decompressing
+
+# Import settings
+IMPORT_BATCH_SIZE = 1000  # Rows inserted per executemany during a bulk import
+
+# PDF report settings
+PDF_FONT_FILES = [  # (regular, bold) TrueType fonts with Arabic glyphs, first found is used
+    (r"C:\Windows\Fonts\arial.ttf", r"C:\Windows\Fonts\arialbd.ttf"),
+    ("/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf", "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf"),
+]
+PDF_FONT_SIZE = 9
+PDF_TABLE_ROWS = 25  # Rows per table; small tables keep page layout fast
+
+# Password settings
+BCRYPT_ROUNDS = 12  # Cost factor; pick one with `python benchmark.py bcrypt`
+LOGIN_TARGET_MS = 250  # Login check time the bcrypt benchmark aims for
+
+# Session settings
+SESSION_TTL = 8 * 60 * 60  # Seconds a session token can reopen the app without a password
+
 # Reminder settings
 REMINDER_DAYS_BEFORE = [1, 3, 7]  # Days before deadline to show reminders
+REMINDER_MAX_WAIT = 60 * 60  # Longest sleep (seconds) before checking reminders again
+REMINDER_LIST_LIMIT = 20  # Tasks named in one reminder message
 
-# Create necessary directories
-for directory in [DATA_DIR, DOCUMENTS_DIR, BACKUPS_DIR, REPORTS_DIR]:
-    os.makedirs(directory, exist_ok=True)
\ No newline at end of file
+def ensure_directories():
+    """Create the data directories if they do not exist"""
+    for directory in [DATA_DIR, DOCUMENTS_DIR, BACKUPS_DIR, REPORTS_DIR]:
+        os.makedirs(directory, exist_ok=True)
\ No newline at end of file
@@ -0,0 +1,199 @@
+"""
+SQLite connection pooling for Law Office Management System
+"""
+import sqlite3
+import threading
+import time
+from collections import deque
+
+class PoolTimeout(sqlite3.OperationalError):
+    """Raised when no pooled connection becomes available in time"""
+
+class PooledConnection:
+    """Context manager that leases a pooled connection.
+
+    Keeps the ``with db.get_connection() as conn:`` contract of a plain
+    sqlite3 connection: the block commits on success and rolls back on error,
+    but the connection is handed back to the pool instead of being dropped.
+    Nested blocks on the same thread share the outermost block's
+    transaction; only the outermost block commits or rolls back.
+    """
+
+    def __init__(self, pool):
+        self._pool = pool
+        self._conn = None
+
+    def __enter__(self):
+        self._conn = self._pool.acquire()
+        return self._conn
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        try:
+            if self._pool.lease_depth() == 1:
+                if exc_type is None:
+                    self._conn.commit()
+                else:
+                    self._conn.rollback()
+        finally:
+            self._conn = None
+            self._pool.release()
+        return False
+
+class ConnectionPool:
+    """Bounded pool of long-lived SQLite connections.
+
+    Nested ``with`` blocks on the same thread share one connection, idle
+    connections are reused most-recently-used first, and connections that
+    sat idle longer than ``health_check_interval`` are pinged before reuse.
+    """
+
+    def __init__(self, connect, max_size=5, timeout=30.0, health_check_interval=60.0):
+        self._connect = connect
+        self.max_size = max_size
+        self.timeout = timeout
+        self.health_check_interval = health_check_interval
+
+        self._idle = deque()  # (connection, generation, last_used)
+        self._size = 0
+        self._generation = 0
+        self._cond = threading.Condition()
+        self._local = threading.local()
+        self._stats = {
+            'hits': 0,        # served from an idle connection
+            'misses': 0,      # had to open a new connection
+            'reentrant': 0,   # nested lease on the same thread
+            'waits': 0,       # had to wait for a connection to be returned
+            'timeouts': 0,
+            'discarded': 0,   # failed health check or closed pool
+        }
+
+    def connection(self):
+        """Return a context manager leasing a connection"""
+        return PooledConnection(self)
+
+    def acquire(self):
+        """Lease a connection for the current thread"""
+        lease = getattr(self._local, 'lease', None)
+        if lease is not None:
+            lease[1] += 1
+            with self._cond:
+                self._stats['reentrant'] += 1
+            return lease[0]
+
+        conn, generation = self._checkout()
+        self._local.lease = [conn, 1, generation]
+        return conn
+
+    def lease_depth(self):
+        """Number of open leases (nested with blocks) on the current thread"""
+        lease = getattr(self._local, 'lease', None)
+        return lease[1] if lease is not None else 0
+
+    def release(self):
+        """Give back the current thread's lease"""
+        lease = getattr(self._local, 'lease', None)
+        if lease is None:
+            return
+
+        lease[1] -= 1
+        if lease[1] == 0:
+            self._local.lease = None
+            self._checkin(lease[0], lease[2])
+
+    def _checkout(self):
+        """Take an idle connection or open a new one within the size bound"""
+        deadline = time.monotonic() + self.timeout
+        with self._cond:
+            while True:
+                while self._idle:
+                    conn, generation, last_used = self._idle.pop()
+                    if self._is_healthy(conn, last_used):
+                        self._stats['hits'] += 1
+                        return conn, generation
+                    self._discard(conn)
+
+                if self._size < self.max_size:
+                    self._size += 1
+                    generation = self._generation
+                    break
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._stats['timeouts'] += 1
+                    raise PoolTimeout(
+                        f"No database connection available after {self.timeout} seconds"
+                    )
+
+                self._stats['waits'] += 1
+                self._cond.wait(remaining)
+
+        # Open the connection outside the lock so other threads are not blocked
+        try:
+            conn = self._connect()
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+
+        with self._cond:
+            self._stats['misses'] += 1
+        return conn, generation
+
+    def _checkin(self, conn, generation):
+        """Return a connection to the idle set"""
+        try:
+            # Never hand out a connection with a dangling transaction
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            generation = -1
+
+        with self._cond:
+            if generation != self._generation:
+                self._discard(conn)
+            else:
+                self._idle.append((conn, generation, time.monotonic()))
+            self._cond.notify()
+
+    def _is_healthy(self, conn, last_used):
+        """Ping connections that have been idle for a while"""
+        if time.monotonic() - last_used < self.health_check_interval:
+            return True
+
+        try:
+            conn.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def _discard(self, conn):
+        """Close a connection and free its slot (caller holds the lock)"""
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+        self._size -= 1
+        self._stats['discarded'] += 1
+
+    def close_all(self):
+        """Close idle connections; leased ones are closed when returned"""
+        with self._cond:
+            self._generation += 1
+            while self._idle:
+                conn, generation, last_used = self._idle.pop()
+                self._discard(conn)
+            self._cond.notify_all()
+
+    def get_stats(self):
+        """Return pool counters for diagnostics"""
+        with self._cond:
+            stats = dict(self._stats)
+            stats['size'] = self._size
+            stats['idle'] = len(self._idle)
+            stats['in_use'] = self._size - len(self._idle)
+            stats['max_size'] = self.max_size
+
+        served = stats['hits'] + stats['misses']
+        stats['hit_rate'] = stats['hits'] / served if served else 0.0
+        return stats
@@ -0,0 +1,149 @@
+"""
+Dashboard statistics for Law Office Management System
+
+Row counts per status are kept in the statistics table by triggers, so the
+dashboard reads a handful of counters instead of scanning whole tables.
+Upcoming appointments depend on the current time and cannot be maintained
+by triggers; they are counted with a range seek on idx_appointments_status_date.
+"""
+import sqlite3
+import threading
+import time
+from config import DASHBOARD_STATS_TTL
+
+# Tables counted per status; clients are only counted in total
+_STATUS_TABLES = ['cases', 'tasks', 'appointments']
+
+_UPCOMING_APPOINTMENTS = '''
+    (SELECT COUNT(*) FROM appointments
+     WHERE status = 'scheduled' AND appointment_date >= datetime('now'))
+'''
+
+_COUNTER_QUERY = f'''
+    SELECT
+        (SELECT value FROM statistics WHERE name = 'cases.open'),
+        (SELECT value FROM statistics WHERE name = 'clients'),
+        (SELECT value FROM statistics WHERE name = 'tasks.pending'),
+        {_UPCOMING_APPOINTMENTS}
+'''
+
+# Same figures straight from the tables, for databases without counters
+_FALLBACK_QUERY = f'''
+    SELECT
+        (SELECT COUNT(*) FROM cases WHERE status = 'open'),
+        (SELECT COUNT(*) FROM clients),
+        (SELECT COUNT(*) FROM tasks WHERE status = 'pending'),
+        {_UPCOMING_APPOINTMENTS}
+'''
+
+STATISTICS = ['open_cases', 'total_clients', 'pending_tasks', 'upcoming_appointments']
+
+def _increment(name_expr):
+    """SQL adding one to a counter, creating it if needed"""
+    return f'''
+            INSERT INTO statistics (name, value) VALUES ({name_expr}, 1)
+            ON CONFLICT (name) DO UPDATE SET value = value + 1;'''
+
+def _decrement(name_expr):
+    """SQL taking one off a counter"""
+    return f'''
+            UPDATE statistics SET value = value - 1 WHERE name = {name_expr};'''
+
+def create_statistics(conn):
+    """Create the counters table and its triggers, then fill it"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS statistics (
+            name TEXT PRIMARY KEY,
+            value INTEGER NOT NULL DEFAULT 0
+        ) WITHOUT ROWID
+    ''')
+
+    for table in _STATUS_TABLES:
+        new_name = f"'{table}.' || coalesce(new.status, '')"
+        old_name = f"'{table}.' || coalesce(old.status, '')"
+
+        conn.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS statistics_{table}_insert AFTER INSERT ON {table} BEGIN
+                {_increment(new_name)}
+            END
+        ''')
+        conn.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS statistics_{table}_update
+            AFTER UPDATE OF status ON {table} WHEN old.status IS NOT new.status BEGIN
+                {_decrement(old_name)}
+                {_increment(new_name)}
+            END
+        ''')
+        conn.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS statistics_{table}_delete AFTER DELETE ON {table} BEGIN
+                {_decrement(old_name)}
+            END
+        ''')
+
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS statistics_clients_insert AFTER INSERT ON clients BEGIN
+            {_increment("'clients'")}
+        END
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS statistics_clients_delete AFTER DELETE ON clients BEGIN
+            {_decrement("'clients'")}
+        END
+    ''')
+
+    rebuild_statistics(conn)
+
+def rebuild_statistics(conn):
+    """Recount every counter from the tables"""
+    conn.execute("DELETE FROM statistics")
+    for table in _STATUS_TABLES:
+        conn.execute(f'''
+            INSERT INTO statistics (name, value)
+            SELECT '{table}.' || coalesce(status, ''), COUNT(*) FROM {table} GROUP BY status
+        ''')
+    conn.execute("INSERT INTO statistics (name, value) SELECT 'clients', COUNT(*) FROM clients")
+
+def fetch_statistics(conn):
+    """Read the dashboard figures in one query"""
+    try:
+        row = conn.execute(_COUNTER_QUERY).fetchone()
+    except sqlite3.OperationalError:
+        # No statistics table (e.g. a database opened without migrations)
+        row = conn.execute(_FALLBACK_QUERY).fetchone()
+
+    return {name: value or 0 for name, value in zip(STATISTICS, row)}
+
+class DashboardStatistics:
+    """Dashboard figures cached for a few seconds.
+
+    The dashboard is shown after every navigation; within the TTL it is
+    drawn without touching the database at all.
+    """
+
+    def __init__(self, ttl=DASHBOARD_STATS_TTL):
+        self.ttl = ttl
+        self._cached = None
+        self._loaded_at = 0
+        self._lock = threading.Lock()
+
+    def get(self, database):
+        """Get the figures, querying database only when the cache expired"""
+        with self._lock:
+            if self._cached is not None and time.monotonic() - self._loaded_at < self.ttl:
+                return dict(self._cached)
+
+        with database.get_connection() as conn:
+            statistics = fetch_statistics(conn)
+
+        with self._lock:
+            self._cached = statistics
+            self._loaded_at = time.monotonic()
+        return dict(statistics)
+
+    def invalidate(self):
+        """Drop the cached figures"""
+        with self._lock:
+            self._cached = None
+
+# Global dashboard statistics cache
+dashboard_statistics = DashboardStatistics()
@@ -4,257 +4,180 @@ Database models and management for Law Office Management System
 import sqlite3
 import hashlib
 import os
+import threading
 from datetime import datetime
-from config import DB_PATH, DATA_DIR
-import bcrypt
+from config import ensure_directories, DB_PATH, DATA_DIR, BACKUPS_DIR, DB_POOL_SIZE, DB_POOL_TIMEOUT, DB_POOL_HEALTH_CHECK_INTERVAL, DB_PRAGMAS, DB_CACHED_STATEMENTS, BACKUP_COMPRESS
+from connection_pool import ConnectionPool
+from app_context import service
+from backup import create_backup, restore_backup
+from migrations import migrate, is_up_to_date
+from activity_log import rollup_and_prune
+
+def apply_pragmas(conn, pragmas):
+    """Apply a PRAGMA profile to a connection"""
+    for name, value in pragmas.items():
+        conn.execute(f"PRAGMA {name} = {value}")
+
+def read_pragmas(conn, names):
+    """Read the effective value of each PRAGMA back from a connection.
+    
+    PRAGMAs that return no row (e.g. mmap_size on an in-memory database)
+    are reported as None.
+    """
+    values = {}
+    for name in names:
+        row = conn.execute(f"PRAGMA {name}").fetchone()
+        values[name] = row[0] if row is not None else None
+    return values
 
 class DatabaseManager:
-    def __init__(self):
-        self.db_path = DB_PATH
-        self.init_database()
+    def __init__(self, db_path=None, cached_statements=DB_CACHED_STATEMENTS):
+        """Manage the database at db_path (the application database by default).
+        
+        ':memory:' gives a private in-memory database, e.g. for tests; it
+        lives as long as this manager.
+        """
+        self.db_path = db_path or DB_PATH
+        self.pragmas = dict(DB_PRAGMAS)
+        self.cached_statements = cached_statements
+        self._memory_anchor = None
+        pool_size = DB_POOL_SIZE
+        
+        if self.db_path == ":memory:":
+            # Every connection must see the same database: use a named
+            # shared-cache database and keep one connection open so it is
+            # not dropped when the pool closes its connections
+            self.db_path = f"file:law_office_{id(self)}?mode=memory&cache=shared"
+            self._memory_anchor = self.create_connection()
+            # Shared-cache connections lock each other out instead of waiting
+            pool_size = 1
+        
+        self.pool = ConnectionPool(
+            self.create_connection,
+            max_size=pool_size,
+            timeout=DB_POOL_TIMEOUT,
+            health_check_interval=DB_POOL_HEALTH_CHECK_INTERVAL
+        )
+        # The schema is checked on first use, not at import time
+        self._initialized = False
+        self._init_lock = threading.Lock()
     
-    def get_connection(self):
-        """Get database connection"""
-        conn = sqlite3.connect(self.db_path)
+    def create_connection(self):
+        """Open a new database connection for the pool"""
+        # Pooled connections move between threads, but only one thread
+        # holds a given connection at a time
+        conn = sqlite3.connect(
+            self.db_path,
+            check_same_thread=False,
+            uri=self.db_path.startswith("file:"),
+            cached_statements=self.cached_statements
+        )
         conn.row_factory = sqlite3.Row  # Enable dict-like access
+        apply_pragmas(conn, self.pragmas)
         return conn
     
-    def init_database(self):
-        """Initialize database with all required tables"""
+    def get_connection(self):
+        """Get a pooled database connection (use as a context manager)"""
+        if not self._initialized:
+            self.ensure_initialized()
+        return self.pool.connection()
+    
+    def ensure_initialized(self):
+        """Run init_database once; other threads wait for it to finish"""
+        with self._init_lock:
+            if not self._initialized:
+                self.init_database()
+                self._initialized = True
+    
+    def get_pool_stats(self):
+        """Get connection pool hit/miss counters"""
+        return self.pool.get_stats()
+    
+    def get_pragma_profile(self):
+        """Get the PRAGMA values actually in effect, for diagnostics"""
         with self.get_connection() as conn:
-            cursor = conn.cursor()
-            
-            # Users table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS users (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    username TEXT UNIQUE NOT NULL,
-                    password_hash TEXT NOT NULL,
-                    full_name TEXT NOT NULL,
-                    role TEXT NOT NULL CHECK (role IN ('admin', 'lawyer', 'secretary')),
-                    email TEXT,
-                    phone TEXT,
-                    is_active BOOLEAN DEFAULT 1,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-            
-            # Clients table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS clients (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    name TEXT NOT NULL,
-                    phone TEXT,
-                    email TEXT,
-                    national_id TEXT UNIQUE,
-                    address TEXT,
-                    notes TEXT,
-                    created_by INTEGER,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (created_by) REFERENCES users (id)
-                )
-            ''')
-            
-            # Cases table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS cases (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    case_number TEXT UNIQUE NOT NULL,
-                    title TEXT NOT NULL,
-                    client_id INTEGER NOT NULL,
-                    court_name TEXT,
-                    case_type TEXT,
-                    opponent_name TEXT,
-                    status TEXT CHECK (status IN ('open', 'closed', 'pending', 'postponed')) DEFAULT 'open',
-                    assigned_lawyer_id INTEGER,
-                    start_date DATE,
-                    end_date DATE,
-                    description TEXT,
-                    created_by INTEGER,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (client_id) REFERENCES clients (id),
-                    FOREIGN KEY (assigned_lawyer_id) REFERENCES users (id),
-                    FOREIGN KEY (created_by) REFERENCES users (id)
-                )
-            ''')
-            
-            # Tasks table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS tasks (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    title TEXT NOT NULL,
-                    description TEXT,
-                    case_id INTEGER,
-                    client_id INTEGER,
-                    assigned_to INTEGER,
-                    priority TEXT CHECK (priority IN ('low', 'medium', 'high', 'urgent')) DEFAULT 'medium',
-                    status TEXT CHECK (status IN ('pending', 'in_progress', 'completed', 'cancelled')) DEFAULT 'pending',
-                    due_date DATE,
-                    reminder_date DATE,
-                    created_by INTEGER,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (case_id) REFERENCES cases (id),
-                    FOREIGN KEY (client_id) REFERENCES clients (id),
-                    FOREIGN KEY (assigned_to) REFERENCES users (id),
-                    FOREIGN KEY (created_by) REFERENCES users (id)
-                )
-            ''')
-            
-            # Appointments table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS appointments (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    title TEXT NOT NULL,
-                    description TEXT,
-                    case_id INTEGER,
-                    client_id INTEGER,
-                    appointment_date DATETIME NOT NULL,
-                    duration INTEGER DEFAULT 60,
-                    location TEXT,
-                    attendees TEXT,
-                    status TEXT CHECK (status IN ('scheduled', 'completed', 'cancelled', 'rescheduled')) DEFAULT 'scheduled',
-                    reminder_sent BOOLEAN DEFAULT 0,
-                    created_by INTEGER,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (case_id) REFERENCES cases (id),
-                    FOREIGN KEY (client_id) REFERENCES clients (id),
-                    FOREIGN KEY (created_by) REFERENCES users (id)
-                )
-            ''')
-            
-            # Documents table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS documents (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    filename TEXT NOT NULL,
-                    original_filename TEXT NOT NULL,
-                    file_path TEXT NOT NULL,
-                    file_size INTEGER,
-                    file_type TEXT,
-                    case_id INTEGER,
-                    client_id INTEGER,
-                    title TEXT,
-                    description TEXT,
-                    tags TEXT,
-                    uploaded_by INTEGER,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (case_id) REFERENCES cases (id),
-                    FOREIGN KEY (client_id) REFERENCES clients (id),
-                    FOREIGN KEY (uploaded_by) REFERENCES users (id)
-                )
-            ''')
-            
-            # Invoices table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS invoices (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    invoice_number TEXT UNIQUE NOT NULL,
-                    client_id INTEGER NOT NULL,
-                    case_id INTEGER,
-                    amount DECIMAL(10,2) NOT NULL,
-                    tax_amount DECIMAL(10,2) DEFAULT 0,
-                    total_amount DECIMAL(10,2) NOT NULL,
-                    description TEXT,
-                    issue_date DATE NOT NULL,
-                    due_date DATE,
-                    status TEXT CHECK (status IN ('draft', 'sent', 'paid', 'overdue', 'cancelled')) DEFAULT 'draft',
-                    payment_date DATE,
-                    payment_method TEXT,
-                    notes TEXT,
-                    created_by INTEGER,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (client_id) REFERENCES clients (id),
-                    FOREIGN KEY (case_id) REFERENCES cases (id),
-                    FOREIGN KEY (created_by) REFERENCES users (id)
-                )
-            ''')
-            
-            # Case sessions/hearings table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS case_sessions (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    case_id INTEGER NOT NULL,
-                    session_date DATETIME NOT NULL,
-                    court_name TEXT,
-                    session_type TEXT,
-                    status TEXT CHECK (status IN ('scheduled', 'completed', 'postponed', 'cancelled')) DEFAULT 'scheduled',
-                    notes TEXT,
-                    next_session_date DATETIME,
-                    created_by INTEGER,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (case_id) REFERENCES cases (id),
-                    FOREIGN KEY (created_by) REFERENCES users (id)
-                )
-            ''')
-            
-            # Settings table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS settings (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    key TEXT UNIQUE NOT NULL,
-                    value TEXT,
-                    description TEXT,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-            
-            conn.commit()
-            
-            # Create default admin user if no users exist
-            self.create_default_admin()
+            return read_pragmas(conn, self.pragmas)
+    
+    def close_connections(self):
+        """Close all pooled connections"""
+        self.pool.close_all()
+    
+    def init_database(self):
+        """Initialize database and bring the schema up to date"""
+        if self.db_path == DB_PATH:
+            ensure_directories()
+        
+        # Uses the pool directly: get_connection() would wait for this method
+        with self.pool.connection() as conn:
+            # An up-to-date schema needs no DDL at all
+            if not is_up_to_date(conn):
+                migrate(conn)
+            # Keep the activity log to its retention window
+            rollup_and_prune(conn)
+        
+        # Create default admin user if no users exist
+        self.create_default_admin()
     
     def create_default_admin(self):
         """Create default admin user if no users exist"""
-        with self.get_connection() as conn:
+        with self.pool.connection() as conn:
             cursor = conn.cursor()
-            cursor.execute("SELECT COUNT(*) FROM users")
-            user_count = cursor.fetchone()[0]
+            cursor.execute("SELECT EXISTS (SELECT 1 FROM users)")
+            has_users = cursor.fetchone()[0]
             
-            if user_count == 0:
+            if not has_users:
+                from passwords import hash_password
+                
                 # Create default admin user
                 password = "admin123"
-                password_hash = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
+                password_hash = hash_password(password)
                 
                 cursor.execute('''
                     INSERT INTO users (username, password_hash, full_name, role, email)
                     VALUES (?, ?, ?, ?, ?)
                 ''', ("admin", password_hash, "System Administrator", "admin", "admin@lawoffice.com"))
                 
-                conn.commit()
                 print("Default admin user created: username=admin, password=admin123")
     
-    def backup_database(self, backup_path=None):
-        """Create a backup of the database"""
+    def backup_database(self, backup_path=None, progress=None, compress=BACKUP_COMPRESS):
+        """Create a backup of the database while it stays in use.
+        
+        progress(phase, done, total) is called as the backup advances, see
+        backup.create_backup. Returns the backup path, or None on failure.
+        """
         if backup_path is None:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            backup_filename = f"law_office_backup_{timestamp}.db"
-            backup_path = os.path.join(os.path.dirname(__file__), "data", "backups", backup_filename)
+            extension = ".db.gz" if compress else ".db"
+            backup_path = os.path.join(BACKUPS_DIR, f"law_office_backup_{timestamp}{extension}")
         
         try:
-            # Copy database file
-            import shutil
-            shutil.copy2(self.db_path, backup_path)
-            return backup_path
+            return create_backup(self.create_connection, backup_path, compress=compress, progress=progress)
         except Exception as e:
             print(f"Backup failed: {e}")
             return None
     
-    def restore_database(self, backup_path):
-        """Restore database from backup"""
+    def restore_database(self, backup_path, progress=None):
+        """Restore database from a backup (.db or .db.gz).
+        
+        progress(phase, done, total) is called as the restore advances, see
+        backup.restore_backup. Returns True on success.
+        """
         try:
-            import shutil
-            shutil.copy2(backup_path, self.db_path)
+            # Drop idle connections so nothing reads half-restored pages
+            self.close_connections()
+            
+            conn = self.create_connection()
+            try:
+                restore_backup(backup_path, conn, progress=progress)
+            finally:
+                conn.close()
+            
+            # Bring an older backup up to the current schema
+            self.init_database()
             return True
         except Exception as e:
             print(f"Restore failed: {e}")
             return False
 
-# Global database instance
-db = DatabaseManager()
\ No newline at end of file
+# Global database, created on first use (see app_context)
+db = service('db', DatabaseManager)
\ No newline at end of file
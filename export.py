@@ -0,0 +1,153 @@
+"""
+Streaming export of case, client and invoice lists to Excel or CSV
+
+Rows are read from the repositories in FETCH_BATCH_SIZE batches and
+written as they arrive: CSV through the csv module, Excel through an
+openpyxl write_only workbook, which writes rows out instead of keeping a
+cell object per value. Memory use stays flat however long the list is.
+Files go to REPORTS_DIR by default.
+"""
+import csv
+import os
+import time
+from collections import namedtuple
+from datetime import datetime
+from operator import attrgetter
+from i18n import i18n
+from repositories import case_repository, client_repository, invoice_repository
+from config import REPORTS_DIR
+
+EXPORT_FORMATS = ('xlsx', 'csv')
+
+# Columns of each list: (row field, translation key, default header)
+EXPORTS = {
+    'cases': (case_repository, [
+        ('case_number', 'case_number', 'Case Number'),
+        ('title', 'case_title', 'Case Title'),
+        ('client_name', 'client_name', 'Client Name'),
+        ('court_name', 'court_name', 'Court Name'),
+        ('case_type', 'case_type', 'Case Type'),
+        ('status', 'case_status', 'Status'),
+        ('lawyer_name', 'assigned_lawyer', 'Assigned Lawyer'),
+        ('start_date', 'start_date', 'Start Date'),
+        ('created_at', 'created_at', 'Created Date'),
+    ]),
+    'clients': (client_repository, [
+        ('name', 'client_name', 'Client Name'),
+        ('phone', 'phone', 'Phone'),
+        ('email', 'email', 'Email'),
+        ('national_id', 'national_id', 'National ID'),
+        ('case_count', 'total_cases', 'Total Cases'),
+        ('created_at', 'created_at', 'Created Date'),
+    ]),
+    'invoices': (invoice_repository, [
+        ('invoice_number', 'invoice_number', 'Invoice Number'),
+        ('client_name', 'client_name', 'Client Name'),
+        ('case_number', 'case_number', 'Case Number'),
+        ('amount', 'amount', 'Amount'),
+        ('tax_amount', 'tax_amount', 'Tax Amount'),
+        ('total_amount', 'total_amount', 'Total Amount'),
+        ('issue_date', 'issue_date', 'Issue Date'),
+        ('due_date', 'due_date', 'Due Date'),
+        ('status', 'invoice_status', 'Status'),
+        ('payment_date', 'payment_date', 'Payment Date'),
+    ]),
+}
+
+# Fields holding a status code, exported in the current language
+TRANSLATED_FIELDS = ('status',)
+
+class ExportResult(namedtuple('ExportResult', ['path', 'rows', 'seconds'])):
+    """Outcome of an export"""
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.seconds if self.seconds > 0 else 0.0
+
+def default_export_path(entity, file_format):
+    """REPORTS_DIR/cases_20240120_153000.xlsx"""
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    return os.path.join(REPORTS_DIR, f"{entity}_{timestamp}.{file_format}")
+
+def export_list(entity, file_format='xlsx', path=None, progress=None):
+    """Write every row of a list ('cases', 'clients', 'invoices') to a file.
+
+    progress(done, total) is called after each batch. The file is written
+    under a temporary name and only renamed into place when complete.
+    """
+    if entity not in EXPORTS:
+        raise ValueError(f"Unknown export: {entity}")
+    if file_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format: {file_format}")
+
+    if path is None:
+        os.makedirs(REPORTS_DIR, exist_ok=True)
+        path = default_export_path(entity, file_format)
+
+    start = time.perf_counter()
+    repository, columns = EXPORTS[entity]
+    headers = [i18n.get(key, default) for field, key, default in columns]
+    fields = [field for field, key, default in columns]
+    total = repository.count() if progress else None
+    written = [0]
+
+    def rows():
+        values_of = attrgetter(*fields)
+        translated = [i for i, field in enumerate(fields) if field in TRANSLATED_FIELDS]
+        labels = {}
+        for batch in repository.iter_summaries():
+            for row in batch:
+                values = list(values_of(row))
+                for i in translated:
+                    code = values[i]
+                    if code not in labels:
+                        labels[code] = i18n.get(code, code) if code else code
+                    values[i] = labels[code]
+                yield values
+            written[0] += len(batch)
+            if progress:
+                progress(written[0], max(total, written[0]))
+
+    temporary_path = path + ".part"
+    try:
+        WRITERS[file_format](temporary_path, entity, headers, rows())
+        os.replace(temporary_path, path)
+    except Exception:
+        if os.path.exists(temporary_path):
+            os.remove(temporary_path)
+        raise
+
+    return ExportResult(path, written[0], time.perf_counter() - start)
+
+def write_csv(path, title, headers, rows):
+    """Write rows to a CSV file Excel opens as UTF-8 (Arabic included)"""
+    with open(path, "w", newline="", encoding="utf-8-sig") as f:
+        writer = csv.writer(f)
+        writer.writerow(headers)
+        writer.writerows(rows)
+
+def write_xlsx(path, title, headers, rows):
+    """Write rows to a one-sheet Excel workbook in write_only mode"""
+    # openpyxl is only needed for imports and exports
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(title=title)
+    sheet.sheet_view.rightToLeft = i18n.is_rtl()
+    sheet.freeze_panes = "A2"
+
+    header_font = Font(bold=True)
+    header_cells = []
+    for header in headers:
+        cell = WriteOnlyCell(sheet, value=header)
+        cell.font = header_font
+        header_cells.append(cell)
+    sheet.append(header_cells)
+
+    for row in rows:
+        sheet.append(row)
+    workbook.save(path)
+
+WRITERS = {'xlsx': write_xlsx, 'csv': write_csv}
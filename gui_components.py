@@ -4,11 +4,12 @@ GUI Components and Widgets with Arabic/RTL support
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 import tkinter.font as tkFont
+from collections import OrderedDict
 from datetime import datetime, date
-import arabic_reshaper
-from bidi.algorithm import get_display
 from config import *
 from i18n import i18n
+from background import get_runner
+from text_shaping import shape_text, get_cache_stats as get_text_cache_stats
 
 class RTLWidget:
     """Base class for RTL (Right-to-Left) widget support"""
@@ -20,15 +21,15 @@ class RTLWidget:
             return ""
         
         if i18n.is_rtl():
-            try:
-                # Reshape Arabic text and apply BiDi algorithm
-                reshaped_text = arabic_reshaper.reshape(str(text))
-                bidi_text = get_display(reshaped_text)
-                return bidi_text
-            except:
-                return str(text)
+            # Reshape Arabic text and apply BiDi algorithm (cached)
+            return shape_text(text, i18n.current_language)
         return str(text)
     
+    @staticmethod
+    def get_cache_stats():
+        """Get format_text cache hit/miss counters"""
+        return get_text_cache_stats()
+    
     @staticmethod
     def get_font(size=FONT_SIZE_NORMAL, weight="normal"):
         """Get appropriate font based on current language"""
@@ -167,11 +168,86 @@ class StyledCombobox(ttk.Combobox):
         font = RTLWidget.get_font()
         self.configure(font=font)
 
+class AutocompleteCombobox(StyledCombobox):
+    """Combobox that lists only the entries starting with the typed text.
+    
+    Entries come from a lookups.LookupIndex; only the first
+    AUTOCOMPLETE_LIMIT matches are formatted and put in the dropdown, so
+    large pick lists stay fast to open and filter.
+    """
+    
+    IGNORED_KEYS = ('Up', 'Down', 'Return', 'KP_Enter', 'Escape', 'Tab')
+    
+    def __init__(self, parent, limit=AUTOCOMPLETE_LIMIT, **kwargs):
+        super().__init__(parent, **kwargs)
+        self.limit = limit
+        self.index = None
+        self._shown = {}
+        self._selected = None
+        self.bind('<KeyRelease>', self._on_key_release, add='+')
+    
+    def set_index(self, index):
+        """Use a LookupIndex and show its first entries"""
+        self.index = index
+        # A preselected entry is not a filter: list everything
+        if self._selected and self.get() == self._selected[0]:
+            self.filter("")
+        else:
+            self.filter(self._typed_text())
+    
+    def filter(self, text):
+        """Show the entries starting with text"""
+        if self.index is None:
+            return
+        labels = self.index.complete(text, self.limit)
+        self._shown = dict((RTLWidget.format_text(label), label) for label in labels)
+        self['values'] = list(self._shown)
+    
+    def select(self, row_id, label=None):
+        """Show the entry for row_id; label is used before the index is loaded"""
+        if label is None and self.index is not None:
+            label = self.index.label_for(row_id)
+        display = RTLWidget.format_text(label)
+        self._selected = (display, row_id)
+        self.set(display)
+    
+    def get_id(self):
+        """Get the ID of the chosen entry, or None if the text matches none"""
+        text = self.get()
+        if self._selected and text == self._selected[0]:
+            return self._selected[1]
+        if self.index is None:
+            return None
+        return self.index.id_for(self._shown.get(text, text))
+    
+    def _typed_text(self):
+        """The text as the user typed it (a shown entry maps back to its label)"""
+        text = self.get()
+        return self._shown.get(text, text)
+    
+    def _on_key_release(self, event):
+        """Narrow the entries to the typed prefix"""
+        if event.keysym not in self.IGNORED_KEYS:
+            self.filter(self._typed_text())
+
 class DataTreeview(ttk.Treeview):
     """Enhanced Treeview with RTL support and additional features"""
     
     def __init__(self, parent, columns=None, **kwargs):
-        super().__init__(parent, columns=columns, **kwargs)
+        # Scroll notifications go through _on_yscroll so windowed mode can page
+        self._yscroll_target = kwargs.pop('yscrollcommand', None)
+        self._page_source = None
+        self._pages = []
+        self._at_start = True
+        self._at_end = True
+        self._window_check_pending = False
+        self._loading = False
+        self._generation = 0
+        self._row_id = None
+        self._render_row = None
+        self._rows = {}  # item id -> source row
+        
+        super().__init__(parent, columns=columns, yscrollcommand=self._on_yscroll, **kwargs)
         
         # Configure font
         font = RTLWidget.get_font()
@@ -185,6 +261,15 @@ class DataTreeview(ttk.Treeview):
                 anchor = "e" if i18n.is_rtl() else "w"
                 self.column(col, anchor=anchor)
     
+    def configure(self, cnf=None, **kwargs):
+        """Configure the widget, keeping scroll notifications routed through the pager"""
+        if 'yscrollcommand' in kwargs:
+            self._yscroll_target = kwargs['yscrollcommand']
+            kwargs['yscrollcommand'] = self._on_yscroll
+        return super().configure(cnf, **kwargs)
+    
+    config = configure
+    
     def insert_data(self, data_list, format_rtl=True):
         """Insert data with RTL formatting"""
         for item in data_list:
@@ -194,6 +279,257 @@ class DataTreeview(ttk.Treeview):
                 formatted_item = [str(val) if val else "" for val in item]
             
             self.insert("", "end", values=formatted_item)
+    
+    def set_page_source(self, fetch_page, row_key, render_row, page_size=TREE_PAGE_SIZE,
+                        max_pages=TREE_MAX_PAGES, on_error=None, row_id=None):
+        """Show rows in windowed mode, fetching pages as the user scrolls.
+        
+        fetch_page(key, limit, forward) returns up to limit rows in display
+        order that come after key (forward) or before it (backward); key None
+        means the top of the list. It runs on a background worker. row_key(row)
+        gives the key of a row and render_row(row) its display values. At most
+        max_pages pages are kept in the tree, so memory stays flat however long
+        the list is. row_id(row), if given, becomes the row's item id; see
+        get_row().
+        """
+        self.clear_page_source()
+        self._row_id = row_id
+        self._render_row = render_row
+        self._page_source = (fetch_page, row_key, render_row, on_error)
+        self._page_size = page_size
+        self._max_pages = max_pages
+        self._at_start = True
+        self._at_end = False
+        
+        # Further pages are requested by _on_yscroll once the first is drawn
+        self._load_page(forward=True)
+    
+    def set_row_source(self, fetch_rows, render_row, on_error=None, row_id=None):
+        """Replace all rows with the result of fetch_rows(), run on a background worker"""
+        self.clear_page_source()
+        self._row_id = row_id
+        self._render_row = render_row
+        generation = self._generation
+        
+        def insert_rows(rows):
+            if generation != self._generation:
+                return
+            for row in rows:
+                self._insert_row("end", row, render_row)
+        
+        self.run_in_background(fetch_rows, on_success=insert_rows, on_error=on_error)
+    
+    def clear_page_source(self):
+        """Leave windowed mode and remove all rows"""
+        # Results of requests made before this point are ignored
+        self._generation += 1
+        self._loading = False
+        self._page_source = None
+        self._pages = []
+        self._at_start = True
+        self._at_end = True
+        self._row_id = None
+        self._render_row = None
+        self._rows = {}
+        self.delete(*self.get_children())
+    
+    def get_row(self, item):
+        """Get the source row shown as item (an item id or a row_id value)"""
+        return self._rows.get(str(item))
+    
+    def selected_row(self):
+        """Get the source row of the first selected item, or None"""
+        selection = self.selection()
+        return self._rows.get(selection[0]) if selection else None
+    
+    def selected_id(self):
+        """Get the row_id of the first selected row, or None"""
+        row = self.selected_row()
+        if row is None or self._row_id is None:
+            return None
+        return self._row_id(row)
+    
+    def remove_row(self, item):
+        """Remove one row without reloading the list"""
+        item = str(item)
+        if item not in self._rows:
+            return
+        
+        del self._rows[item]
+        self._remove_from_pages(item)
+        self.delete(item)
+    
+    def update_row(self, row):
+        """Redraw the shown row with row's row_id; False if it is not shown"""
+        if self._row_id is None:
+            return False
+        
+        item = str(self._row_id(row))
+        if item not in self._rows:
+            return False
+        
+        self._rows[item] = row
+        self.item(item, values=self._render_row(row))
+        return True
+    
+    def prepend_row(self, row):
+        """Show a new row at the top of the list (or redraw it if shown).
+        
+        In windowed mode this only happens while the first page is loaded;
+        further down, the row will come with the first page when scrolling
+        back up. Returns True if the row is shown.
+        """
+        if self._row_id is None or self._render_row is None:
+            return False
+        if self.update_row(row):
+            return True
+        if not self._at_start:
+            return False
+        
+        item = self._insert_row(0, row, self._render_row)
+        if self._pages:
+            page = self._pages[0]
+            page['items'].insert(0, item)
+            page['first'] = self._page_source[1](row)
+        return True
+    
+    def _insert_row(self, index, row, render_row):
+        """Insert a source row, using row_id(row) as its item id if set.
+        
+        A row that is already shown, e.g. one prepended while its page was
+        loading, is moved to index and redrawn instead.
+        """
+        iid = str(self._row_id(row)) if self._row_id else None
+        if iid is not None and iid in self._rows:
+            self._remove_from_pages(iid)
+            self.move(iid, "", index)
+            self.item(iid, values=render_row(row))
+            item = iid
+        else:
+            item = self.insert("", index, iid=iid, values=render_row(row))
+        self._rows[item] = row
+        return item
+    
+    def _remove_from_pages(self, item):
+        """Take an item out of the window's page that holds it, if any"""
+        for page in self._pages:
+            if item in page['items']:
+                page['items'].remove(item)
+                break
+    
+    def run_in_background(self, func, *args, on_success=None, on_error=None):
+        """Run func on a worker; a newer request for this tree supersedes older ones"""
+        get_runner(self).submit(
+            func, *args,
+            on_success=on_success,
+            on_error=on_error,
+            key=('tree', str(self))
+        )
+    
+    def _on_yscroll(self, first, last):
+        """Forward scroll position to the scrollbar and page if near an edge"""
+        if self._yscroll_target:
+            self._yscroll_target(first, last)
+        
+        if self._page_source and not self._window_check_pending:
+            self._window_check_pending = True
+            self.after_idle(self._check_window)
+    
+    def _check_window(self):
+        """Fetch the next/previous page when the view nears the end of the window"""
+        self._window_check_pending = False
+        if not self._page_source or self._loading:
+            return
+        
+        top, bottom = self.yview()
+        
+        if bottom >= 1 - TREE_PAGE_THRESHOLD and not self._at_end:
+            self._load_page(forward=True)
+        elif top <= TREE_PAGE_THRESHOLD and not self._at_start:
+            self._load_page(forward=False)
+    
+    def _load_page(self, forward):
+        """Request the page after the bottom (or before the top) of the window"""
+        fetch_page, row_key, render_row, on_error = self._page_source
+        
+        if forward:
+            key = self._pages[-1]['last'] if self._pages else None
+        else:
+            key = self._pages[0]['first']
+        
+        generation = self._generation
+        
+        def page_loaded(rows):
+            if generation == self._generation:
+                self._loading = False
+                self._insert_page(rows, forward)
+        
+        def page_failed(error):
+            if generation == self._generation:
+                self._loading = False
+                if on_error:
+                    on_error(error)
+        
+        self._loading = True
+        self.run_in_background(
+            fetch_page, key, self._page_size, forward,
+            on_success=page_loaded,
+            on_error=page_failed
+        )
+    
+    def _insert_page(self, rows, forward):
+        """Insert a fetched page and drop the page furthest from the view"""
+        row_key, render_row = self._page_source[1:3]
+        
+        if len(rows) < self._page_size:
+            if forward:
+                self._at_end = True
+            else:
+                self._at_start = True
+        
+        if not rows:
+            return
+        
+        top = self.yview()[0]
+        first_visible = top * len(self.get_children())
+        
+        items = []
+        for offset, row in enumerate(rows):
+            index = "end" if forward else offset
+            items.append(self._insert_row(index, row, render_row))
+        
+        page = {'first': row_key(rows[0]), 'last': row_key(rows[-1]), 'items': items}
+        shifted = False
+        if forward:
+            self._pages.append(page)
+        else:
+            self._pages.insert(0, page)
+            first_visible += len(items)
+            shifted = True
+        
+        if len(self._pages) > self._max_pages:
+            removed = self._drop_page(first=forward)
+            if forward:
+                first_visible -= removed
+                shifted = True
+        
+        # Keep the rows the user is looking at in place
+        if shifted:
+            self.yview_moveto(max(first_visible, 0) / len(self.get_children()))
+    
+    def _drop_page(self, first):
+        """Remove the top or bottom page from the window"""
+        page = self._pages.pop(0 if first else -1)
+        for item in page['items']:
+            del self._rows[item]
+        self.delete(*page['items'])
+        
+        if first:
+            self._at_start = False
+        else:
+            self._at_end = False
+        
+        return len(page['items'])
 
 class DatePicker(tk.Frame):
     """Date picker widget with RTL support"""
@@ -288,12 +624,20 @@ class DatePicker(tk.Frame):
         return self.date_var.get()
 
 class SearchFrame(tk.Frame):
-    """Search frame with RTL support"""
+    """Search frame with RTL support.
+
+    With incremental=True the search also runs while typing, once the user
+    pauses for debounce_ms.
+    """
     
-    def __init__(self, parent, search_callback=None, **kwargs):
+    def __init__(self, parent, search_callback=None, incremental=False, debounce_ms=SEARCH_DEBOUNCE_MS, **kwargs):
         super().__init__(parent, **kwargs)
         
         self.search_callback = search_callback
+        self.incremental = incremental
+        self.debounce_ms = debounce_ms
+        self._after_id = None
+        self._last_term = None
         
         # Search label
         StyledLabel(self, text=i18n.get('search')).pack(
@@ -321,11 +665,33 @@ class SearchFrame(tk.Frame):
         
         # Bind Enter key to search
         self.search_entry.bind('<Return>', lambda e: self.perform_search())
+        
+        if incremental:
+            self.search_var.trace_add('write', lambda *args: self.schedule_search())
+    
+    def schedule_search(self):
+        """Restart the debounce timer"""
+        self.cancel_scheduled_search()
+        self._after_id = self.after(self.debounce_ms, self._debounced_search)
+    
+    def cancel_scheduled_search(self):
+        """Stop a pending debounced search"""
+        if self._after_id is not None:
+            self.after_cancel(self._after_id)
+            self._after_id = None
+    
+    def _debounced_search(self):
+        """Search unless the text is back to what was last searched"""
+        self._after_id = None
+        if self.search_var.get() != self._last_term:
+            self.perform_search()
     
     def perform_search(self):
         """Perform search"""
+        self.cancel_scheduled_search()
+        self._last_term = self.search_var.get()
         if self.search_callback:
-            self.search_callback(self.search_var.get())
+            self.search_callback(self._last_term)
     
     def get_search_text(self):
         """Get search text"""
@@ -334,6 +700,11 @@ class SearchFrame(tk.Frame):
     def clear_search(self):
         """Clear search text"""
         self.search_var.set("")
+    
+    def destroy(self):
+        """Drop the pending search with the widget"""
+        self.cancel_scheduled_search()
+        super().destroy()
 
 class StatusBar(tk.Frame):
     """Status bar widget"""
@@ -355,6 +726,181 @@ class StatusBar(tk.Frame):
         """Clear status message"""
         self.status_var.set(i18n.get('ready', 'Ready'))
 
+class _CachedView:
+    """A built module view, the table versions its data was loaded from and its language"""
+    
+    def __init__(self, frame, module, versions):
+        self.frame = frame
+        self.module = module
+        self.versions = versions
+        self.language = i18n.current_language
+
+class ViewCache:
+    """Keeps recently shown module views alive so switching back is instant.
+    
+    Views are hidden with pack_forget instead of being destroyed; beyond
+    capacity the least recently shown one is destroyed. get_versions(tables)
+    returns the current versions of the tables a view reads (see
+    change_tracking); a cached view whose tables changed is refreshed when
+    it is shown again, and one built in another language is built again.
+    """
+    
+    def __init__(self, parent, get_versions, capacity=VIEW_CACHE_SIZE):
+        self.parent = parent
+        self.get_versions = get_versions
+        self.capacity = capacity
+        self._views = OrderedDict()  # name -> _CachedView, least recent first
+        self.current = None
+    
+    def show(self, name, build, tables=()):
+        """Show a view, building it with build(frame) if it is not cached.
+        
+        build returns the module object. The table versions are read on a
+        worker: a cached view is shown at once and, if its tables have
+        changed, its module's refresh() is called (modules without one are
+        built again); a new view is built once its versions are known, so
+        they never postdate the data it loads.
+        """
+        view = self._views.get(name)
+        if view is not None and view.language != i18n.current_language:
+            view.frame.destroy()
+            del self._views[name]
+            view = None
+        
+        if view is not None:
+            self._place(name, view)
+        
+        # Versions read for a view shown earlier are no longer wanted
+        runner = get_runner(self.parent)
+        key = ('view-cache', str(self.parent))
+        if not tables:
+            runner.cancel(key)
+            if view is None:
+                self._build(name, build, {})
+            return
+        
+        runner.submit(
+            self.get_versions, tables,
+            on_success=lambda versions: self._apply_versions(name, build, versions),
+            on_error=lambda e: print(f"Error reading table versions: {e}"),
+            key=key
+        )
+    
+    def _apply_versions(self, name, build, versions):
+        """Build a view, or bring a cached one up to date with versions"""
+        view = self._views.get(name)
+        if view is None:
+            self._build(name, build, versions)
+            return
+        
+        if versions is not None and versions == view.versions:
+            return
+        
+        refresh = getattr(view.module, 'refresh', None)
+        if refresh is not None:
+            refresh()
+            view.versions = versions
+        else:
+            view.frame.destroy()
+            del self._views[name]
+            if self.current == name:
+                self.current = None
+            self._build(name, build, versions)
+    
+    def _build(self, name, build, versions):
+        """Build a view and show it"""
+        frame = tk.Frame(self.parent, bg="white")
+        self._place(name, _CachedView(frame, build(frame), versions))
+    
+    def _place(self, name, view):
+        """Make view the visible one, evicting the least recently shown beyond capacity"""
+        if self.current is not None and self.current != name and self.current in self._views:
+            self._views[self.current].frame.pack_forget()
+        
+        self._views.pop(name, None)
+        self._views[name] = view
+        view.frame.pack(fill="both", expand=True)
+        self.current = name
+        
+        while len(self._views) > self.capacity:
+            _, oldest = self._views.popitem(last=False)
+            oldest.frame.destroy()
+    
+    def sync(self, table):
+        """Note that live views already show the latest change to table.
+        
+        Modules that keep themselves current from the change bus list the
+        tables concerned in live_tables; after such a change, showing them
+        again should not reload them.
+        """
+        views = [
+            view for view in self._views.values()
+            if view.versions and table in view.versions and table in getattr(view.module, 'live_tables', ())
+        ]
+        if not views:
+            return
+        
+        def apply(versions):
+            if versions is None:
+                return
+            for view in views:
+                view.versions[table] = versions[table]
+        
+        get_runner(self.parent).submit(
+            self.get_versions, [table],
+            on_success=apply,
+            on_error=lambda e: print(f"Error reading table versions: {e}")
+        )
+    
+    def clear(self):
+        """Destroy every cached view"""
+        for view in self._views.values():
+            view.frame.destroy()
+        self._views.clear()
+        self.current = None
+
+class ProgressDialog(tk.Toplevel):
+    """Modal progress window for long-running background work"""
+    
+    def __init__(self, parent, title, message=""):
+        super().__init__(parent)
+        self.title(RTLWidget.format_text(title))
+        self.geometry("400x120")
+        self.resizable(False, False)
+        self.transient(parent)
+        self.grab_set()
+        # The work cannot be interrupted halfway
+        self.protocol("WM_DELETE_WINDOW", lambda: None)
+        
+        # Center the window
+        self.update_idletasks()
+        x = (self.winfo_screenwidth() // 2) - 200
+        y = (self.winfo_screenheight() // 2) - 60
+        self.geometry(f"400x120+{x}+{y}")
+        
+        frame = tk.Frame(self, bg=BACKGROUND_COLOR)
+        frame.pack(fill="both", expand=True, padx=20, pady=20)
+        
+        self.message_var = tk.StringVar(value=RTLWidget.format_text(message))
+        StyledLabel(frame, textvariable=self.message_var).pack(fill="x")
+        
+        self.progressbar = ttk.Progressbar(frame, mode="determinate", maximum=100)
+        self.progressbar.pack(fill="x", pady=(10, 0))
+    
+    def set_progress(self, done, total, message=None):
+        """Show done out of total"""
+        if not self.winfo_exists():
+            return
+        self.progressbar['value'] = 100 * done / total if total else 0
+        if message is not None:
+            self.message_var.set(RTLWidget.format_text(message))
+    
+    def close(self):
+        """Close the dialog"""
+        if self.winfo_exists():
+            self.grab_release()
+            self.destroy()
+
 def show_message(title, message, msg_type="info"):
     """Show message dialog with RTL support"""
     formatted_title = RTLWidget.format_text(title)
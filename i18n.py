@@ -4,6 +4,7 @@ Internationalization (i18n) support for Arabic and English
 import os
 import json
 from config import DEFAULT_LANGUAGE, SUPPORTED_LANGUAGES
+from app_context import service
 
 class I18n:
     def __init__(self):
@@ -110,6 +111,19 @@ class I18n:
             'in_progress': 'قيد التنفيذ',
             'completed': 'مكتمل',
             'cancelled': 'ملغي',
+            'mark_completed': 'تم الإنجاز',
+            'select_task_first': 'يرجى اختيار مهمة أولاً',
+            'task_not_found': 'المهمة غير موجودة',
+            'confirm_delete_task': 'هل أنت متأكد من حذف هذه المهمة؟',
+            'task_deleted': 'تم حذف المهمة بنجاح',
+            'task_title_required': 'عنوان المهمة مطلوب',
+            'task_added': 'تمت إضافة المهمة بنجاح',
+            'task_updated': 'تم تحديث المهمة بنجاح',
+            'task_reminders': 'تذكير بالمهام',
+            'due_today': 'مستحقة اليوم',
+            'due_in': 'مستحقة خلال',
+            'days': 'أيام',
+            'more_tasks': 'مهام أخرى',
             
             # Appointments
             'appointment_management': 'إدارة المواعيد',
@@ -188,6 +202,60 @@ class I18n:
             'required_field': 'حقل مطلوب',
             'backup_created': 'تم إنشاء النسخة الاحتياطية بنجاح',
             'backup_restored': 'تم استعادة النسخة الاحتياطية بنجاح',
+            'backup_in_progress': 'جاري إنشاء النسخة الاحتياطية...',
+            'backup_verifying': 'جاري التحقق من النسخة الاحتياطية...',
+            'backup_compressing': 'جاري ضغط النسخة الاحتياطية...',
+            'restore_in_progress': 'جاري استعادة النسخة الاحتياطية...',
+            'restore_decompressing': 'جاري فك ضغط النسخة الاحتياطية...',
+            'import_clients': 'استيراد العملاء',
+            'import_cases': 'استيراد القضايا',
+            'import_in_progress': 'جاري الاستيراد...',
+            'import_imported': 'تم استيراد',
+            'import_rejected': 'صفوف مرفوضة',
+            'import_rejects_saved': 'تم حفظ الصفوف المرفوضة في',
+            'import_failed': 'فشل الاستيراد',
+            'rows_per_second': 'صف/ثانية',
+            'rows': 'صف',
+            'export_data': 'تصدير البيانات',
+            'export_excel': 'Excel',
+            'export_csv': 'CSV',
+            'export_in_progress': 'جاري التصدير...',
+            'export_saved': 'تم حفظ الملف في',
+            'export_failed': 'فشل التصدير',
+            'pdf_reports': 'تقارير PDF',
+            'cases_by_lawyer': 'القضايا حسب المحامي',
+            'cases_by_court': 'القضايا حسب المحكمة',
+            'cases_by_status': 'القضايا حسب الحالة',
+            'client_statements': 'كشوف حسابات العملاء',
+            'not_specified': 'غير محدد',
+            'outstanding': 'المتبقي',
+            'grand_total': 'الإجمالي العام',
+            'report_in_progress': 'جاري إنشاء التقرير...',
+            'report_saved': 'تم حفظ التقرير في',
+            'report_failed': 'فشل إنشاء التقرير',
+            'pages': 'صفحة',
+            'statistics': 'الإحصائيات',
+            'all_years': 'كل السنوات',
+            'cases_by_type': 'القضايا حسب النوع',
+            'cases_by_month': 'القضايا حسب الشهر',
+            'invoices_by_status': 'الفواتير حسب الحالة',
+            'invoices_by_client': 'الفواتير حسب العميل',
+            'invoices_by_month': 'الفواتير حسب الشهر',
+            'invoice_count': 'عدد الفواتير',
+            'court': 'المحكمة',
+            'type': 'النوع',
+            'month': 'الشهر',
+            'status': 'الحالة',
+            'client': 'العميل',
+            
+            # Activity log
+            'activity_case': 'قضية',
+            'activity_client': 'عميل',
+            'activity_user': 'مستخدم',
+            'activity_task': 'مهمة',
+            'activity_create': 'إضافة',
+            'activity_update': 'تعديل',
+            'activity_delete': 'حذف',
         }
         
         # English translations
@@ -287,6 +355,19 @@ class I18n:
             'in_progress': 'In Progress',
             'completed': 'Completed',
             'cancelled': 'Cancelled',
+            'mark_completed': 'Mark Completed',
+            'select_task_first': 'Please select a task first',
+            'task_not_found': 'Task not found',
+            'confirm_delete_task': 'Are you sure you want to delete this task?',
+            'task_deleted': 'Task deleted successfully',
+            'task_title_required': 'Task title is required',
+            'task_added': 'Task added successfully',
+            'task_updated': 'Task updated successfully',
+            'task_reminders': 'Task Reminders',
+            'due_today': 'due today',
+            'due_in': 'due in',
+            'days': 'days',
+            'more_tasks': 'more tasks',
             
             # Appointments
             'appointment_management': 'Appointment Management',
@@ -365,6 +446,60 @@ class I18n:
             'required_field': 'Required field',
             'backup_created': 'Backup created successfully',
             'backup_restored': 'Backup restored successfully',
+            'backup_in_progress': 'Creating backup...',
+            'backup_verifying': 'Verifying backup...',
+            'backup_compressing': 'Compressing backup...',
+            'restore_in_progress': 'Restoring backup...',
+            'restore_decompressing': 'Decompressing backup...',
+            'import_clients': 'Import Clients',
+            'import_cases': 'Import Cases',
+            'import_in_progress': 'Importing...',
+            'import_imported': 'Imported',
+            'import_rejected': 'Rejected rows',
+            'import_rejects_saved': 'Rejected rows saved to',
+            'import_failed': 'Import failed',
+            'rows_per_second': 'rows/s',
+            'rows': 'rows',
+            'export_data': 'Export Data',
+            'export_excel': 'Excel',
+            'export_csv': 'CSV',
+            'export_in_progress': 'Exporting...',
+            'export_saved': 'Export saved to',
+            'export_failed': 'Export failed',
+            'pdf_reports': 'PDF Reports',
+            'cases_by_lawyer': 'Cases by Lawyer',
+            'cases_by_court': 'Cases by Court',
+            'cases_by_status': 'Cases by Status',
+            'client_statements': 'Client Statements',
+            'not_specified': 'Not specified',
+            'outstanding': 'Outstanding',
+            'grand_total': 'Grand Total',
+            'report_in_progress': 'Creating report...',
+            'report_saved': 'Report saved to',
+            'report_failed': 'Report failed',
+            'pages': 'pages',
+            'statistics': 'Statistics',
+            'all_years': 'All years',
+            'cases_by_type': 'Cases by Type',
+            'cases_by_month': 'Cases by Month',
+            'invoices_by_status': 'Invoices by Status',
+            'invoices_by_client': 'Invoices by Client',
+            'invoices_by_month': 'Invoices by Month',
+            'invoice_count': 'Invoices',
+            'court': 'Court',
+            'type': 'Type',
+            'month': 'Month',
+            'status': 'Status',
+            'client': 'Client',
+            
+            # Activity log
+            'activity_case': 'Case',
+            'activity_client': 'Client',
+            'activity_user': 'User',
+            'activity_task': 'Task',
+            'activity_create': 'Added',
+            'activity_update': 'Updated',
+            'activity_delete': 'Deleted',
         }
     
     def set_language(self, language_code):
@@ -382,5 +517,5 @@ class I18n:
         """Check if current language is right-to-left"""
         return self.current_language == 'ar'
 
-# Global i18n instance
-i18n = I18n()
\ No newline at end of file
+# Global i18n instance, created on first use (see app_context)
+i18n = service('i18n', I18n)
\ No newline at end of file
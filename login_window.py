@@ -4,15 +4,28 @@ Login Window for Law Office Management System
 import tkinter as tk
 from tkinter import ttk
 from gui_components import *
-from auth import auth
 from i18n import i18n
 from config import *
+from background import get_runner
 
 class LoginWindow:
-    def __init__(self):
+    def __init__(self, session_token=None):
+        self.authenticating = False
+        
+        # A valid session token skips the login form (and bcrypt) entirely
+        self.authenticated = bool(session_token) and self.resume_session(session_token)
+        if self.authenticated:
+            self.root = None
+            return
+        
         self.root = tk.Tk()
         self.setup_window()
         self.create_widgets()
+    
+    def resume_session(self, session_token):
+        """Log the token's user back in without a password"""
+        from auth import auth
+        return auth.resume_session(session_token)
         
     def setup_window(self):
         """Setup the login window"""
@@ -129,6 +142,9 @@ class LoginWindow:
         )
         self.login_button.pack(fill="x", ipady=10)
         
+        # Shown while the password is being checked
+        self.progress = ttk.Progressbar(buttons_frame, mode="indeterminate")
+        
         # Error message label
         self.error_label = StyledLabel(
             main_frame,
@@ -155,16 +171,27 @@ class LoginWindow:
         ).pack()
     
     def change_language(self, event=None):
-        """Change application language"""
+        """Change application language, redrawing the form in place"""
         new_lang = self.language_var.get()
         i18n.set_language(new_lang)
         
-        # Recreate the window with new language
-        self.root.destroy()
-        self.__init__()
+        # Keep what was typed; only the widgets are rebuilt
+        username = self.username_var.get()
+        password = self.password_var.get()
+        
+        for widget in self.root.winfo_children():
+            widget.destroy()
+        
+        self.root.title(RTLWidget.format_text(i18n.get('app_title')))
+        self.create_widgets()
+        self.username_var.set(username)
+        self.password_var.set(password)
     
     def login(self):
         """Handle login attempt"""
+        if self.authenticating:
+            return
+        
         username = self.username_var.get().strip()
         password = self.password_var.get().strip()
         
@@ -176,22 +203,43 @@ class LoginWindow:
             self.show_error(i18n.get('invalid_input'))
             return
         
-        # Disable login button during authentication
-        self.login_button.config(state="disabled")
-        self.root.update()
+        # Password hashing is slow on purpose, so it runs on a worker thread
+        self.set_busy(True)
         
-        try:
-            # Attempt authentication
-            if auth.authenticate(username, password):
-                self.root.destroy()
-                # Import and start main application
-                from main_window import MainWindow
-                MainWindow()
-            else:
-                self.show_error(i18n.get('invalid_credentials'))
-        except Exception as e:
-            self.show_error(f"{i18n.get('login_failed')}: {str(e)}")
-        finally:
+        # Imported here so the database layer loads after the window is up
+        from auth import auth
+        
+        get_runner(self.root).submit(
+            auth.authenticate, username, password,
+            on_success=self.on_authenticated,
+            on_error=self.on_login_error
+        )
+    
+    def on_authenticated(self, success):
+        """Handle the result of the background authentication"""
+        self.set_busy(False)
+        if success:
+            # The main window is opened by run() once this one is gone
+            self.authenticated = True
+            self.root.destroy()
+        else:
+            self.show_error(i18n.get('invalid_credentials'))
+    
+    def on_login_error(self, error):
+        """Handle an exception raised during authentication"""
+        self.set_busy(False)
+        self.show_error(f"{i18n.get('login_failed')}: {str(error)}")
+    
+    def set_busy(self, busy):
+        """Show or hide the progress bar and lock the login button"""
+        self.authenticating = busy
+        if busy:
+            self.login_button.config(state="disabled")
+            self.progress.pack(fill="x", pady=(10, 0))
+            self.progress.start(15)
+        else:
+            self.progress.stop()
+            self.progress.pack_forget()
             self.login_button.config(state="normal")
     
     def show_error(self, message):
@@ -200,7 +248,12 @@ class LoginWindow:
     
     def run(self):
         """Start the login window"""
-        self.root.mainloop()
+        if self.root is not None:
+            self.root.mainloop()
+        
+        if self.authenticated:
+            from main_window import MainWindow
+            MainWindow()
 
 if __name__ == "__main__":
     app = LoginWindow()
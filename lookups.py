@@ -0,0 +1,104 @@
+"""
+Cached pick lists (clients, lawyers, cases) for Law Office Management System
+
+A lookup loads its rows once and keeps them until one of its tables
+changes, as recorded by the change counters (see change_tracking), so
+opening a form costs one small version query instead of reading every
+client again. Each load is indexed for name -> ID mapping and for prefix
+completion with bisect over normalized names.
+"""
+import bisect
+import threading
+from search_index import normalize_text
+from repositories import client_repository, user_repository, case_repository
+from config import AUTOCOMPLETE_LIMIT
+
+class LookupIndex:
+    """Labels of one load of a lookup, by ID and by normalized prefix"""
+
+    def __init__(self, rows):
+        # rows are (id, label) tuples; equal labels get their ID appended
+        # so every label maps back to exactly one row
+        rows = [(row_id, label or "") for row_id, label in rows]
+        counts = {}
+        for row_id, label in rows:
+            counts[label] = counts.get(label, 0) + 1
+
+        self.ids = {}
+        self.labels = {}
+        keys = []
+        for row_id, label in rows:
+            if counts[label] > 1:
+                label = f"{label} ({row_id})"
+            self.ids[label] = row_id
+            self.labels[row_id] = label
+            keys.append((normalize_text(label), label))
+
+        keys.sort()
+        self._keys = keys
+        self._folded = [key for key, label in keys]
+
+    def __len__(self):
+        return len(self._keys)
+
+    def id_for(self, label):
+        """Get the ID of a label, or None"""
+        return self.ids.get(label)
+
+    def label_for(self, row_id):
+        """Get the label of an ID, or None"""
+        return self.labels.get(row_id)
+
+    def complete(self, prefix, limit=AUTOCOMPLETE_LIMIT):
+        """Labels starting with prefix (ignoring case and Arabic letter variants), in order"""
+        folded = normalize_text(prefix or "")
+        start = bisect.bisect_left(self._folded, folded)
+        matches = []
+        for key, label in self._keys[start:start + limit]:
+            if not key.startswith(folded):
+                break
+            matches.append(label)
+        return matches
+
+class Lookup:
+    """A pick list loaded by load() and reloaded when its tables change"""
+
+    def __init__(self, load, tables, database=None):
+        self.load = load
+        self.tables = tuple(tables)
+        self.database = database
+        self._index = None
+        self._versions = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        """Get the current LookupIndex, reloading it if its tables changed.
+
+        Safe to call from worker threads.
+        """
+        with self._lock:
+            versions = self._get_versions()
+            if self._index is None or versions is None or versions != self._versions:
+                self._index = LookupIndex(self.load())
+                self._versions = versions
+            return self._index
+
+    def invalidate(self):
+        """Drop the cached rows; the next get() reloads them"""
+        with self._lock:
+            self._index = None
+            self._versions = None
+
+    def _get_versions(self):
+        """Change counters of the lookup's tables, or None if unknown"""
+        from database import db
+        from change_tracking import get_versions
+
+        database = self.database if self.database is not None else db
+        with database.get_connection() as conn:
+            return get_versions(conn, self.tables)
+
+# Global lookup instances
+client_lookup = Lookup(client_repository.names, ('clients',))
+lawyer_lookup = Lookup(user_repository.lawyers, ('users',))
+case_lookup = Lookup(case_repository.labels, ('cases',))
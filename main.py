@@ -23,32 +23,30 @@ Version: 1.0.0
 
 import sys
 import os
+from startup import profiler
+
+# Import timing has to start before anything else is imported
+if "--profile-startup" in sys.argv:
+    profiler.enable()
+
+import importlib.util
 import tkinter as tk
 from tkinter import messagebox
 
+# (import name, package to install)
+REQUIRED_MODULES = [
+    ("sqlite3", "sqlite3"),
+    ("bcrypt", "bcrypt"),
+    ("arabic_reshaper", "arabic-reshaper"),
+    ("bidi", "python-bidi"),
+]
+
 def check_dependencies():
-    """Check if all required dependencies are available"""
-    missing_deps = []
-    
-    try:
-        import sqlite3
-    except ImportError:
-        missing_deps.append("sqlite3")
-    
-    try:
-        import bcrypt
-    except ImportError:
-        missing_deps.append("bcrypt")
-    
-    try:
-        import arabic_reshaper
-    except ImportError:
-        missing_deps.append("arabic-reshaper")
-    
-    try:
-        import bidi
-    except ImportError:
-        missing_deps.append("python-bidi")
+    """Check if all required dependencies are available, without importing them"""
+    missing_deps = [
+        package for module, package in REQUIRED_MODULES
+        if importlib.util.find_spec(module) is None
+    ]
     
     if missing_deps:
         error_msg = f"Missing required dependencies: {', '.join(missing_deps)}\n"
@@ -67,18 +65,43 @@ def check_dependencies():
     
     return True
 
+def finish_startup(app):
+    """Work deferred until the login window has been drawn"""
+    profiler.mark("first paint")
+    
+    from background import get_runner
+    from database import db
+    
+    def database_ready(result):
+        profiler.mark("database ready")
+        profiler.report()
+    
+    def database_failed(error):
+        print(f"Database initialization failed: {error}")
+        profiler.report()
+    
+    # Login waits for this if the user is quicker than the schema check
+    get_runner(app.root).submit(db.ensure_initialized, on_success=database_ready, on_error=database_failed)
+
 def main():
     """Main application entry point"""
     try:
         # Check dependencies first
-        if not check_dependencies():
-            sys.exit(1)
+        with profiler.phase("dependency check"):
+            if not check_dependencies():
+                sys.exit(1)
         
         # Import and initialize the application
-        from login_window import LoginWindow
+        with profiler.phase("import login window"):
+            from login_window import LoginWindow
+        
+        with profiler.phase("build login window"):
+            app = LoginWindow()
+        
+        # Schema checks and the like wait until the window is on screen
+        app.root.after_idle(lambda: finish_startup(app))
         
         # Start the application
-        app = LoginWindow()
         app.run()
         
     except ImportError as e:
@@ -7,6 +7,8 @@ from gui_components import *
 from auth import auth
 from i18n import i18n
 from config import *
+from background import get_runner
+from change_bus import change_bus, ALL_TABLES
 import os
 
 class MainWindow:
@@ -17,11 +19,12 @@ class MainWindow:
         self.create_menu()
         self.create_main_interface()
         self.show_dashboard()
+        self.start_reminders()
         self.root.mainloop()
     
     def setup_window(self):
         """Setup the main window"""
-        self.root.title(RTLWidget.format_text(f"{i18n.get('app_title')} - {auth.get_current_user()['full_name']}"))
+        self.set_title()
         self.root.geometry(f"{WINDOW_WIDTH}x{WINDOW_HEIGHT}")
         self.root.configure(bg=BACKGROUND_COLOR)
         
@@ -34,16 +37,25 @@ class MainWindow:
         # Handle window close
         self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
     
+    def set_title(self):
+        """Set the window title for the current language and user"""
+        self.root.title(RTLWidget.format_text(f"{i18n.get('app_title')} - {auth.get_current_user()['full_name']}"))
+    
     def create_menu(self):
         """Create application menu bar"""
         menubar = tk.Menu(self.root)
         self.root.config(menu=menubar)
+        self.menubar = menubar
         
         # File menu
         file_menu = tk.Menu(menubar, tearoff=0)
         menubar.add_cascade(label=RTLWidget.format_text(i18n.get('file', 'File')), menu=file_menu)
         file_menu.add_command(label=RTLWidget.format_text(i18n.get('backup_database', 'Backup Database')), command=self.backup_database)
         file_menu.add_command(label=RTLWidget.format_text(i18n.get('restore_database', 'Restore Database')), command=self.restore_database)
+        if auth.can_manage_cases():
+            file_menu.add_separator()
+            file_menu.add_command(label=RTLWidget.format_text(i18n.get('import_clients', 'Import Clients')), command=lambda: self.import_data('clients'))
+            file_menu.add_command(label=RTLWidget.format_text(i18n.get('import_cases', 'Import Cases')), command=lambda: self.import_data('cases'))
         file_menu.add_separator()
         file_menu.add_command(label=RTLWidget.format_text(i18n.get('logout')), command=self.logout)
         file_menu.add_command(label=RTLWidget.format_text(i18n.get('exit', 'Exit')), command=self.on_closing)
@@ -68,17 +80,33 @@ class MainWindow:
         
         # Create sidebar for navigation
         self.sidebar = tk.Frame(main_container, bg=PRIMARY_COLOR, width=250)
-        self.sidebar.pack(side="right" if i18n.is_rtl() else "left", fill="y", padx=(0, 10) if not i18n.is_rtl() else (10, 0))
         self.sidebar.pack_propagate(False)
         
         # Create content area
         self.content_frame = tk.Frame(main_container, bg="white", relief="solid", bd=1)
+        
+        # Module views are kept alive while hidden and reused
+        self.views = ViewCache(self.content_frame, self.get_table_versions)
+        change_bus.subscribe(ALL_TABLES, lambda table, action, row_id: self.views.sync(table), owner=self.content_frame)
+        
+        self.status_bar = None
+        self.layout_main_interface()
+    
+    def layout_main_interface(self):
+        """Place the sidebar for the language direction, and fill it and the status bar"""
+        self.sidebar.pack_forget()
+        self.content_frame.pack_forget()
+        self.sidebar.pack(side="right" if i18n.is_rtl() else "left", fill="y", padx=(0, 10) if not i18n.is_rtl() else (10, 0))
         self.content_frame.pack(side="left" if i18n.is_rtl() else "right", fill="both", expand=True)
         
         # Create sidebar content
+        for widget in self.sidebar.winfo_children():
+            widget.destroy()
         self.create_sidebar()
         
         # Create status bar
+        if self.status_bar is not None:
+            self.status_bar.destroy()
         self.status_bar = StatusBar(self.root)
         self.status_bar.pack(side="bottom", fill="x")
     
@@ -170,19 +198,61 @@ class MainWindow:
         btn.bind("<Enter>", on_enter)
         btn.bind("<Leave>", on_leave)
     
-    def clear_content(self):
-        """Clear the content frame"""
-        for widget in self.content_frame.winfo_children():
-            widget.destroy()
+    def show_view(self, name, status, build, tables=()):
+        """Show a module view, reloading its data only if tables changed"""
+        self.current_module = name
+        self.status_bar.set_status(status)
+        self.views.show(name, build, tables)
+    
+    def get_table_versions(self, tables):
+        """Get the change counters of tables (see change_tracking); called on a worker"""
+        from database import db
+        from change_tracking import get_versions
+        
+        with db.get_connection() as conn:
+            return get_versions(conn, tables)
+    
+    def start_reminders(self):
+        """Remind the user of their open tasks as the reminders fall due (see reminders)"""
+        from reminders import ReminderScheduler
+        
+        # Lives as long as the root window, across language changes
+        self.reminders = ReminderScheduler(self.root, auth.get_current_user()['id'], self.show_reminders)
+        self.reminders.start()
+    
+    def show_reminders(self, reminders):
+        """Show the task reminders that came due"""
+        lines = []
+        for reminder in reminders[:REMINDER_LIST_LIMIT]:
+            if reminder.days_left is None:
+                lines.append(f"• {reminder.task.title}")
+            elif reminder.days_left < 0:
+                lines.append(f"• {reminder.task.title}: {i18n.get('overdue', 'Overdue')}")
+            elif reminder.days_left == 0:
+                lines.append(f"• {reminder.task.title}: {i18n.get('due_today', 'due today')}")
+            else:
+                lines.append(f"• {reminder.task.title}: {i18n.get('due_in', 'due in')} {reminder.days_left} {i18n.get('days', 'days')}")
+        if len(reminders) > REMINDER_LIST_LIMIT:
+            lines.append(f"+ {len(reminders) - REMINDER_LIST_LIMIT} {i18n.get('more_tasks', 'more tasks')}")
+        
+        self.status_bar.set_status(f"{i18n.get('task_reminders', 'Task Reminders')}: {len(reminders)}")
+        show_message(i18n.get('task_reminders', 'Task Reminders'), "\n".join(lines))
     
     def show_dashboard(self):
         """Show dashboard"""
-        self.clear_content()
-        self.current_module = "dashboard"
-        self.status_bar.set_status(i18n.get('dashboard'))
+        self.show_view(
+            'dashboard', i18n.get('dashboard'), self.build_dashboard,
+            ['cases', 'clients', 'tasks', 'appointments', 'users', 'activity_log']
+        )
+    
+    def build_dashboard(self, parent):
+        """Create the dashboard in parent"""
+        from dashboard_stats import dashboard_statistics
         
-        # Create dashboard
-        dashboard = tk.Frame(self.content_frame, bg="white")
+        # Only rebuilt when the counted tables changed, so cached figures are stale
+        dashboard_statistics.invalidate()
+        
+        dashboard = tk.Frame(parent, bg="white")
         dashboard.pack(fill="both", expand=True, padx=20, pady=20)
         
         # Header
@@ -217,47 +287,44 @@ class MainWindow:
         self.load_recent_activities(activities_list)
     
     def create_stats_cards(self, parent):
-        """Create statistics cards"""
+        """Create statistics cards; the counts are filled in from a background query"""
+        cards_data = [
+            ('open_cases', i18n.get('open_cases', 'Open Cases'), SUCCESS_COLOR, "⚖️"),
+            ('total_clients', i18n.get('total_clients', 'Total Clients'), SECONDARY_COLOR, "👥"),
+            ('pending_tasks', i18n.get('pending_tasks', 'Pending Tasks'), WARNING_COLOR, "📝"),
+            ('upcoming_appointments', i18n.get('upcoming_appointments', 'Upcoming Appointments'), PRIMARY_COLOR, "📅")
+        ]
+        
+        value_labels = {}
+        for i, (key, title, color, icon) in enumerate(cards_data):
+            card, value_labels[key] = self.create_stat_card(parent, title, "…", color, icon)
+            card.grid(row=0, column=i, padx=10, sticky="ew")
+        
+        # Configure grid weights
+        for i in range(len(cards_data)):
+            parent.grid_columnconfigure(i, weight=1)
+        
+        def show_statistics(stats):
+            for key, label in value_labels.items():
+                if label.winfo_exists():
+                    label.config(text=str(stats[key]))
+        
+        get_runner(self.root).submit(
+            self.fetch_statistics,
+            on_success=show_statistics,
+            on_error=lambda e: print(f"Error loading statistics: {e}"),
+            key='dashboard-statistics'
+        )
+    
+    def fetch_statistics(self):
+        """Get open cases, clients, pending tasks and upcoming appointments counts"""
         from database import db
+        from dashboard_stats import dashboard_statistics
         
-        try:
-            with db.get_connection() as conn:
-                cursor = conn.cursor()
-                
-                # Get statistics
-                cursor.execute("SELECT COUNT(*) FROM cases WHERE status = 'open'")
-                open_cases = cursor.fetchone()[0]
-                
-                cursor.execute("SELECT COUNT(*) FROM clients")
-                total_clients = cursor.fetchone()[0]
-                
-                cursor.execute("SELECT COUNT(*) FROM tasks WHERE status = 'pending'")
-                pending_tasks = cursor.fetchone()[0]
-                
-                cursor.execute("SELECT COUNT(*) FROM appointments WHERE appointment_date >= datetime('now') AND status = 'scheduled'")
-                upcoming_appointments = cursor.fetchone()[0]
-                
-                # Create cards
-                cards_data = [
-                    (i18n.get('open_cases', 'Open Cases'), open_cases, SUCCESS_COLOR, "⚖️"),
-                    (i18n.get('total_clients', 'Total Clients'), total_clients, SECONDARY_COLOR, "👥"),
-                    (i18n.get('pending_tasks', 'Pending Tasks'), pending_tasks, WARNING_COLOR, "📝"),
-                    (i18n.get('upcoming_appointments', 'Upcoming Appointments'), upcoming_appointments, PRIMARY_COLOR, "📅")
-                ]
-                
-                for i, (title, value, color, icon) in enumerate(cards_data):
-                    card = self.create_stat_card(parent, title, value, color, icon)
-                    card.grid(row=0, column=i, padx=10, sticky="ew")
-                
-                # Configure grid weights
-                for i in range(len(cards_data)):
-                    parent.grid_columnconfigure(i, weight=1)
-                    
-        except Exception as e:
-            print(f"Error loading statistics: {e}")
+        return dashboard_statistics.get(db)
     
     def create_stat_card(self, parent, title, value, color, icon):
-        """Create a single statistics card"""
+        """Create a single statistics card, returning it and its value label"""
         card = tk.Frame(parent, bg=color, relief="solid", bd=1)
         
         # Icon and value
@@ -272,13 +339,14 @@ class MainWindow:
             font=RTLWidget.get_font(24)
         ).pack(side="right" if i18n.is_rtl() else "left")
         
-        tk.Label(
+        value_label = tk.Label(
             top_frame,
             text=str(value),
             bg=color,
             fg="white",
             font=RTLWidget.get_font(28, "bold")
-        ).pack(side="left" if i18n.is_rtl() else "right")
+        )
+        value_label.pack(side="left" if i18n.is_rtl() else "right")
         
         # Title
         tk.Label(
@@ -290,126 +358,197 @@ class MainWindow:
             anchor="e" if i18n.is_rtl() else "w"
         ).pack(fill="x", padx=15, pady=(0, 15))
         
-        return card
+        return card, value_label
     
     def load_recent_activities(self, tree):
-        """Load recent activities into the tree"""
-        # Mock data for now - in real implementation, this would load from database
-        activities = [
-            ('Case', 'New case added: Commercial Dispute', '2024-01-20'),
-            ('Client', 'New client registered: Ahmed Hassan', '2024-01-19'),
-            ('Task', 'Task completed: Document review', '2024-01-18'),
-            ('Appointment', 'Appointment scheduled with client', '2024-01-17'),
+        """Load the newest activity log entries into the tree"""
+        from activity_log import activity_log
+        
+        tree.set_row_source(
+            activity_log.recent,
+            self.format_activity_row,
+            on_error=lambda e: print(f"Error loading recent activities: {e}"),
+            row_id=lambda entry: entry['id']
+        )
+    
+    def format_activity_row(self, entry):
+        """Format an activity log entry for display"""
+        action = i18n.get(f"activity_{entry['action']}", entry['action'])
+        description = f"{action}: {entry['description']}" if entry['description'] else action
+        if entry['user_name']:
+            description += f" ({entry['user_name']})"
+        
+        values = [
+            i18n.get(f"activity_{entry['entity_type']}", entry['entity_type']),
+            description,
+            entry['created_at'][:16]
         ]
-        
-        for activity in activities:
-            tree.insert("", "end", values=[RTLWidget.format_text(str(val)) for val in activity])
+        return [RTLWidget.format_text(str(val)) for val in values]
     
     def show_cases(self):
         """Show cases management"""
-        self.clear_content()
-        self.current_module = "cases"
-        self.status_bar.set_status(i18n.get('case_management'))
-        
         from case_management import CaseManagement
-        CaseManagement(self.content_frame)
+        self.show_view('cases', i18n.get('case_management'), CaseManagement, ['cases', 'clients', 'users'])
     
     def show_clients(self):
         """Show clients management"""
-        self.clear_content()
-        self.current_module = "clients"
-        self.status_bar.set_status(i18n.get('client_management'))
-        
         from client_management import ClientManagement
-        ClientManagement(self.content_frame)
+        self.show_view('clients', i18n.get('client_management'), ClientManagement, ['clients', 'cases'])
     
     def show_tasks(self):
         """Show tasks management"""
-        self.clear_content()
-        self.current_module = "tasks"
-        self.status_bar.set_status(i18n.get('task_management'))
-        
         from task_management import TaskManagement
-        TaskManagement(self.content_frame)
+        self.show_view('tasks', i18n.get('task_management'), TaskManagement, ['tasks', 'cases', 'clients', 'users'])
     
     def show_appointments(self):
         """Show appointments management"""
-        self.clear_content()
-        self.current_module = "appointments"
-        self.status_bar.set_status(i18n.get('appointment_management'))
-        
         from appointment_management import AppointmentManagement
-        AppointmentManagement(self.content_frame)
+        self.show_view('appointments', i18n.get('appointment_management'), AppointmentManagement)
     
     def show_documents(self):
         """Show documents management"""
-        self.clear_content()
-        self.current_module = "documents"
-        self.status_bar.set_status(i18n.get('document_management'))
-        
         from document_management import DocumentManagement
-        DocumentManagement(self.content_frame)
+        self.show_view('documents', i18n.get('document_management'), DocumentManagement)
     
     def show_billing(self):
         """Show billing management"""
-        self.clear_content()
-        self.current_module = "billing"
-        self.status_bar.set_status(i18n.get('billing_management'))
-        
         from billing_management import BillingManagement
-        BillingManagement(self.content_frame)
+        self.show_view('billing', i18n.get('billing_management'), BillingManagement)
     
     def show_reports(self):
         """Show reports"""
-        self.clear_content()
-        self.current_module = "reports"
-        self.status_bar.set_status(i18n.get('reports_statistics'))
-        
         from reports import ReportsModule
-        ReportsModule(self.content_frame)
+        self.show_view('reports', i18n.get('reports_statistics'), ReportsModule, ['cases', 'invoices', 'users', 'clients'])
     
     def show_user_management(self):
         """Show user management"""
-        self.clear_content()
-        self.current_module = "users"
-        self.status_bar.set_status(i18n.get('user_management'))
-        
         from user_management_ui import UserManagementUI
-        UserManagementUI(self.content_frame)
+        self.show_view('users', i18n.get('user_management'), UserManagementUI)
     
     def backup_database(self):
-        """Create database backup"""
-        try:
-            from database import db
-            backup_path = db.backup_database()
+        """Create database backup in the background, showing its progress"""
+        from database import db
+        
+        runner = get_runner(self.root)
+        dialog = ProgressDialog(self.root, i18n.get('create_backup'), i18n.get('backup_in_progress', 'Creating backup...'))
+        phases = {
+            'copy': i18n.get('backup_in_progress', 'Creating backup...'),
+            'verify': i18n.get('backup_verifying', 'Verifying backup...'),
+            'compress': i18n.get('backup_compressing', 'Compressing backup...')
+        }
+        
+        def progress(phase, done, total):
+            # Called on the worker thread
+            runner.post(dialog.set_progress, done, total, phases[phase])
+        
+        def finished(backup_path):
+            dialog.close()
             if backup_path:
                 show_success(f"{i18n.get('backup_created')}\n{backup_path}")
             else:
                 show_error(i18n.get('backup_failed', 'Backup failed'))
-        except Exception as e:
+        
+        def failed(e):
+            dialog.close()
             show_error(f"{i18n.get('backup_failed', 'Backup failed')}: {str(e)}")
+        
+        runner.submit(db.backup_database, None, progress, on_success=finished, on_error=failed)
     
-    def restore_database(self):
-        """Restore database from backup"""
-        try:
-            filename = filedialog.askopenfilename(
-                title=RTLWidget.format_text(i18n.get('select_backup_file', 'Select Backup File')),
-                filetypes=[("Database files", "*.db"), ("All files", "*.*")]
+    def import_data(self, entity):
+        """Import clients or cases from a CSV or Excel file in the background"""
+        import bulk_import
+        
+        filename = filedialog.askopenfilename(
+            title=RTLWidget.format_text(i18n.get(f'import_{entity}')),
+            filetypes=[("CSV / Excel", "*.csv *.xlsx"), ("All files", "*.*")]
+        )
+        if not filename:
+            return
+        
+        importers = {'clients': bulk_import.import_clients, 'cases': bulk_import.import_cases}
+        runner = get_runner(self.root)
+        dialog = ProgressDialog(self.root, i18n.get(f'import_{entity}'), i18n.get('import_in_progress', 'Importing...'))
+        
+        def progress(done, total):
+            # Called on the worker thread
+            runner.post(dialog.set_progress, done, total)
+        
+        def finished(result):
+            dialog.close()
+            if result.imported:
+                from activity_log import activity_log
+                entity_type = 'client' if entity == 'clients' else 'case'
+                activity_log.log(entity_type, 'create', None, f"{result.imported} {entity} imported from {os.path.basename(filename)}")
+                # The change counters moved, so this reloads the open list
+                self.show_module(self.current_module)
+            
+            message = (
+                f"{i18n.get('import_imported', 'Imported')}: {result.imported}\n"
+                f"{i18n.get('import_rejected', 'Rejected')}: {result.rejected}\n"
+                f"{result.rows_per_second:.0f} {i18n.get('rows_per_second', 'rows/s')}"
             )
+            if result.reject_path:
+                message += f"\n\n{i18n.get('import_rejects_saved', 'Rejected rows saved to')}:\n{result.reject_path}"
+            show_success(message)
+        
+        def failed(e):
+            dialog.close()
+            show_error(f"{i18n.get('import_failed', 'Import failed')}: {str(e)}")
+        
+        user = auth.get_current_user()
+        runner.submit(importers[entity], filename, user['id'] if user else None, None, progress, on_success=finished, on_error=failed)
+    
+    def restore_database(self):
+        """Restore database from backup in the background, showing its progress"""
+        from database import db
+        
+        filename = filedialog.askopenfilename(
+            title=RTLWidget.format_text(i18n.get('select_backup_file', 'Select Backup File')),
+            filetypes=[("Database files", "*.db *.db.gz"), ("All files", "*.*")]
+        )
+        if not filename:
+            return
+        if not confirm_action(i18n.get('confirm_restore', 'This will replace current data. Continue?')):
+            return
+        
+        runner = get_runner(self.root)
+        dialog = ProgressDialog(self.root, i18n.get('restore_backup'), i18n.get('restore_in_progress', 'Restoring backup...'))
+        phases = {
+            'decompress': i18n.get('restore_decompressing', 'Decompressing backup...'),
+            'verify': i18n.get('backup_verifying', 'Verifying backup...'),
+            'copy': i18n.get('restore_in_progress', 'Restoring backup...')
+        }
+        
+        def progress(phase, done, total):
+            # Called on the worker thread
+            runner.post(dialog.set_progress, done, total, phases[phase])
+        
+        def finished(restored):
+            dialog.close()
+            if not restored:
+                show_error(i18n.get('restore_failed', 'Restore failed'))
+                return
             
-            if filename:
-                if confirm_action(i18n.get('confirm_restore', 'This will replace current data. Continue?')):
-                    from database import db
-                    if db.restore_database(filename):
-                        show_success(i18n.get('backup_restored'))
-                        # Restart application
-                        self.root.destroy()
-                        from login_window import LoginWindow
-                        LoginWindow()
-                    else:
-                        show_error(i18n.get('restore_failed', 'Restore failed'))
-        except Exception as e:
+            # The backup brings back its own change counters, so caches
+            # checked against them could look current while stale
+            from lookups import client_lookup, lawyer_lookup, case_lookup
+            from dashboard_stats import dashboard_statistics
+            for cache in (client_lookup, lawyer_lookup, case_lookup, dashboard_statistics):
+                cache.invalidate()
+            
+            show_success(i18n.get('backup_restored'))
+            # Restart application; the session token skips the
+            # password unless the user is gone from the restored data
+            session_token = auth.session_token
+            self.root.destroy()
+            from login_window import LoginWindow
+            LoginWindow(session_token).run()
+        
+        def failed(e):
+            dialog.close()
             show_error(f"{i18n.get('restore_failed', 'Restore failed')}: {str(e)}")
+        
+        runner.submit(db.restore_database, filename, progress, on_success=finished, on_error=failed)
     
     def change_language(self):
         """Change application language"""
@@ -438,13 +577,38 @@ class MainWindow:
         def apply_language():
             i18n.set_language(lang_var.get())
             lang_window.destroy()
-            # Restart application
-            self.root.destroy()
-            from login_window import LoginWindow
-            LoginWindow()
+            self.rebuild_interface()
         
         StyledButton(frame, text=i18n.get('apply', 'Apply'), command=apply_language).pack(pady=10)
     
+    def rebuild_interface(self):
+        """Redraw the window in the current language, keeping the open module.
+        
+        The menu, sidebar and status bar are rebuilt on the same root. Cached
+        module views stay in the ViewCache; each is rebuilt in the new
+        language when it is next shown, starting with the open one.
+        """
+        self.set_title()
+        self.menubar.destroy()
+        self.create_menu()
+        self.layout_main_interface()
+        self.show_module(self.current_module)
+    
+    def show_module(self, name):
+        """Show a module by name (the dashboard if unknown)"""
+        modules = {
+            'dashboard': self.show_dashboard,
+            'cases': self.show_cases,
+            'clients': self.show_clients,
+            'tasks': self.show_tasks,
+            'appointments': self.show_appointments,
+            'documents': self.show_documents,
+            'billing': self.show_billing,
+            'reports': self.show_reports,
+            'users': self.show_user_management
+        }
+        modules.get(name, self.show_dashboard)()
+    
     def show_about(self):
         """Show about dialog"""
         about_text = f"""{i18n.get('app_title')}
@@ -460,11 +624,12 @@ class MainWindow:
             auth.logout()
             self.root.destroy()
             from login_window import LoginWindow
-            LoginWindow()
+            LoginWindow().run()
     
     def on_closing(self):
         """Handle window close event"""
         if confirm_action(i18n.get('confirm_exit', 'Are you sure you want to exit?')):
+            get_runner(self.root).shutdown()
             self.root.quit()
 
 if __name__ == "__main__":
@@ -0,0 +1,337 @@
+"""
+Versioned schema migrations for Law Office Management System
+
+Each migration is applied once, in order, inside its own transaction. The
+current schema version is stored in the database header (PRAGMA user_version),
+so an up-to-date database is detected without touching any table.
+"""
+from search_index import create_search_index, create_search_triggers, rebuild_search_index
+from dashboard_stats import create_statistics
+from activity_log import create_activity_log
+from change_tracking import create_change_tracking
+from report_aggregates import create_aggregates, create_aggregate_triggers, rebuild_aggregates
+
+# Baseline schema. Uses IF NOT EXISTS so databases created before migrations
+# existed are adopted as version 1 without changes.
+INITIAL_SCHEMA = [
+    # Users table
+    '''
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT UNIQUE NOT NULL,
+            password_hash TEXT NOT NULL,
+            full_name TEXT NOT NULL,
+            role TEXT NOT NULL CHECK (role IN ('admin', 'lawyer', 'secretary')),
+            email TEXT,
+            phone TEXT,
+            is_active BOOLEAN DEFAULT 1,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''',
+
+    # Clients table
+    '''
+        CREATE TABLE IF NOT EXISTS clients (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            phone TEXT,
+            email TEXT,
+            national_id TEXT UNIQUE,
+            address TEXT,
+            notes TEXT,
+            created_by INTEGER,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (created_by) REFERENCES users (id)
+        )
+    ''',
+
+    # Cases table
+    '''
+        CREATE TABLE IF NOT EXISTS cases (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            case_number TEXT UNIQUE NOT NULL,
+            title TEXT NOT NULL,
+            client_id INTEGER NOT NULL,
+            court_name TEXT,
+            case_type TEXT,
+            opponent_name TEXT,
+            status TEXT CHECK (status IN ('open', 'closed', 'pending', 'postponed')) DEFAULT 'open',
+            assigned_lawyer_id INTEGER,
+            start_date DATE,
+            end_date DATE,
+            description TEXT,
+            created_by INTEGER,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (client_id) REFERENCES clients (id),
+            FOREIGN KEY (assigned_lawyer_id) REFERENCES users (id),
+            FOREIGN KEY (created_by) REFERENCES users (id)
+        )
+    ''',
+
+    # Tasks table
+    '''
+        CREATE TABLE IF NOT EXISTS tasks (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            title TEXT NOT NULL,
+            description TEXT,
+            case_id INTEGER,
+            client_id INTEGER,
+            assigned_to INTEGER,
+            priority TEXT CHECK (priority IN ('low', 'medium', 'high', 'urgent')) DEFAULT 'medium',
+            status TEXT CHECK (status IN ('pending', 'in_progress', 'completed', 'cancelled')) DEFAULT 'pending',
+            due_date DATE,
+            reminder_date DATE,
+            created_by INTEGER,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (case_id) REFERENCES cases (id),
+            FOREIGN KEY (client_id) REFERENCES clients (id),
+            FOREIGN KEY (assigned_to) REFERENCES users (id),
+            FOREIGN KEY (created_by) REFERENCES users (id)
+        )
+    ''',
+
+    # Appointments table
+    '''
+        CREATE TABLE IF NOT EXISTS appointments (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            title TEXT NOT NULL,
+            description TEXT,
+            case_id INTEGER,
+            client_id INTEGER,
+            appointment_date DATETIME NOT NULL,
+            duration INTEGER DEFAULT 60,
+            location TEXT,
+            attendees TEXT,
+            status TEXT CHECK (status IN ('scheduled', 'completed', 'cancelled', 'rescheduled')) DEFAULT 'scheduled',
+            reminder_sent BOOLEAN DEFAULT 0,
+            created_by INTEGER,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (case_id) REFERENCES cases (id),
+            FOREIGN KEY (client_id) REFERENCES clients (id),
+            FOREIGN KEY (created_by) REFERENCES users (id)
+        )
+    ''',
+
+    # Documents table
+    '''
+        CREATE TABLE IF NOT EXISTS documents (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            filename TEXT NOT NULL,
+            original_filename TEXT NOT NULL,
+            file_path TEXT NOT NULL,
+            file_size INTEGER,
+            file_type TEXT,
+            case_id INTEGER,
+            client_id INTEGER,
+            title TEXT,
+            description TEXT,
+            tags TEXT,
+            uploaded_by INTEGER,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (case_id) REFERENCES cases (id),
+            FOREIGN KEY (client_id) REFERENCES clients (id),
+            FOREIGN KEY (uploaded_by) REFERENCES users (id)
+        )
+    ''',
+
+    # Invoices table
+    '''
+        CREATE TABLE IF NOT EXISTS invoices (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            invoice_number TEXT UNIQUE NOT NULL,
+            client_id INTEGER NOT NULL,
+            case_id INTEGER,
+            amount DECIMAL(10,2) NOT NULL,
+            tax_amount DECIMAL(10,2) DEFAULT 0,
+            total_amount DECIMAL(10,2) NOT NULL,
+            description TEXT,
+            issue_date DATE NOT NULL,
+            due_date DATE,
+            status TEXT CHECK (status IN ('draft', 'sent', 'paid', 'overdue', 'cancelled')) DEFAULT 'draft',
+            payment_date DATE,
+            payment_method TEXT,
+            notes TEXT,
+            created_by INTEGER,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (client_id) REFERENCES clients (id),
+            FOREIGN KEY (case_id) REFERENCES cases (id),
+            FOREIGN KEY (created_by) REFERENCES users (id)
+        )
+    ''',
+
+    # Case sessions/hearings table
+    '''
+        CREATE TABLE IF NOT EXISTS case_sessions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            case_id INTEGER NOT NULL,
+            session_date DATETIME NOT NULL,
+            court_name TEXT,
+            session_type TEXT,
+            status TEXT CHECK (status IN ('scheduled', 'completed', 'postponed', 'cancelled')) DEFAULT 'scheduled',
+            notes TEXT,
+            next_session_date DATETIME,
+            created_by INTEGER,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (case_id) REFERENCES cases (id),
+            FOREIGN KEY (created_by) REFERENCES users (id)
+        )
+    ''',
+
+    # Settings table
+    '''
+        CREATE TABLE IF NOT EXISTS settings (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            key TEXT UNIQUE NOT NULL,
+            value TEXT,
+            description TEXT,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''',
+]
+
+# Secondary indexes for the foreign keys, filters and sort orders the
+# case/client lists, client case view and dashboard counts rely on
+SECONDARY_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS idx_cases_client_id ON cases (client_id, created_at)",
+    "CREATE INDEX IF NOT EXISTS idx_cases_assigned_lawyer_id ON cases (assigned_lawyer_id)",
+    "CREATE INDEX IF NOT EXISTS idx_cases_created_at ON cases (created_at)",
+    "CREATE INDEX IF NOT EXISTS idx_cases_status ON cases (status)",
+    "CREATE INDEX IF NOT EXISTS idx_clients_created_at ON clients (created_at)",
+    "CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks (status)",
+    "CREATE INDEX IF NOT EXISTS idx_appointments_status_date ON appointments (status, appointment_date)",
+    "CREATE INDEX IF NOT EXISTS idx_invoices_client_id ON invoices (client_id)",
+    "CREATE INDEX IF NOT EXISTS idx_case_sessions_case_id ON case_sessions (case_id)",
+    # Refresh planner statistics for the new indexes
+    "ANALYZE",
+]
+
+# Open tasks by due date, for the task list and the reminder scheduler.
+# idx_tasks_status is a prefix of the new index, so it is dropped.
+TASK_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS idx_tasks_status_due_date ON tasks (status, due_date)",
+    "DROP INDEX IF EXISTS idx_tasks_status",
+    "ANALYZE",
+]
+
+# (version, description, steps). A step is an SQL string or a callable
+# taking the connection. Never edit a released migration; append a new one.
+MIGRATIONS = [
+    (1, "Initial schema", INITIAL_SCHEMA),
+    (2, "Secondary indexes", SECONDARY_INDEXES),
+    (3, "Full-text search index", [create_search_index]),
+    (4, "Dashboard statistics counters", [create_statistics]),
+    (5, "Activity log", [create_activity_log]),
+    (6, "Table change counters", [create_change_tracking]),
+    (7, "Reporting aggregates", [create_aggregates]),
+    (8, "Task due-date index", TASK_INDEXES),
+    (9, "Search triggers without Python functions", [create_search_triggers, rebuild_search_index]),
+    (10, "Client invoice aggregates over all time", [create_aggregate_triggers, rebuild_aggregates]),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+# Queries that must be answered through an index: (description, sql, index name)
+INDEX_USAGE_CHECKS = [
+    ("Client cases list",
+     "SELECT case_number FROM cases WHERE client_id = ? ORDER BY created_at DESC",
+     "idx_cases_client_id"),
+    ("Cases per lawyer",
+     "SELECT id FROM cases WHERE assigned_lawyer_id = ?",
+     "idx_cases_assigned_lawyer_id"),
+    ("Cases list order",
+     "SELECT c.id, cl.name, u.full_name FROM cases c "
+     "LEFT JOIN clients cl ON c.client_id = cl.id "
+     "LEFT JOIN users u ON c.assigned_lawyer_id = u.id "
+     "ORDER BY c.created_at DESC",
+     "idx_cases_created_at"),
+    ("Open cases count",
+     "SELECT COUNT(*) FROM cases WHERE status = 'open'",
+     "idx_cases_status"),
+    ("Clients list order",
+     "SELECT id FROM clients ORDER BY created_at DESC",
+     "idx_clients_created_at"),
+    ("Pending tasks count",
+     "SELECT COUNT(*) FROM tasks WHERE status = 'pending'",
+     "idx_tasks_status_due_date"),
+    ("Tasks list order",
+     "SELECT id FROM tasks WHERE status = ? AND (due_date, id) > (?, ?) ORDER BY due_date, id",
+     "idx_tasks_status_due_date"),
+    ("Task reminders",
+     "SELECT id FROM tasks WHERE status IN ('pending', 'in_progress') "
+     "AND (due_date >= ? OR reminder_date >= ?) AND coalesce(assigned_to, created_by) = ?",
+     "idx_tasks_status_due_date"),
+    ("Upcoming appointments count",
+     "SELECT COUNT(*) FROM appointments WHERE appointment_date >= datetime('now') AND status = 'scheduled'",
+     "idx_appointments_status_date"),
+    ("Client invoices",
+     "SELECT id FROM invoices WHERE client_id = ?",
+     "idx_invoices_client_id"),
+    ("Case sessions",
+     "SELECT id FROM case_sessions WHERE case_id = ?",
+     "idx_case_sessions_case_id"),
+    ("Activity log pruning",
+     "DELETE FROM activity_log WHERE created_at < ?",
+     "idx_activity_log_created_at"),
+]
+
+def get_schema_version(conn):
+    """Get the schema version stored in the database"""
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+def is_up_to_date(conn):
+    """Check if all migrations have been applied"""
+    return get_schema_version(conn) >= SCHEMA_VERSION
+
+def migrate(conn):
+    """Apply all pending migrations, returning the versions applied"""
+    current = get_schema_version(conn)
+    applied = []
+    
+    if conn.in_transaction:
+        conn.commit()
+    
+    for version, description, steps in MIGRATIONS:
+        if version <= current:
+            continue
+        
+        try:
+            # DDL does not open a transaction implicitly, so be explicit
+            conn.execute("BEGIN")
+            for step in steps:
+                if callable(step):
+                    step(conn)
+                else:
+                    conn.execute(step)
+            conn.execute(f"PRAGMA user_version = {version}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        
+        applied.append(version)
+    
+    return applied
+
+def explain_query_plan(conn, sql):
+    """Get the EXPLAIN QUERY PLAN detail lines for a query"""
+    params = (None,) * sql.count("?")
+    return [row[-1] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+
+def verify_index_usage(conn):
+    """Check that each INDEX_USAGE_CHECKS query uses its index.
+    
+    Returns a list of (description, plan) for the queries that do not.
+    """
+    failures = []
+    for description, sql, index_name in INDEX_USAGE_CHECKS:
+        plan = explain_query_plan(conn, sql)
+        if not any(index_name in detail for detail in plan):
+            failures.append((description, plan))
+    return failures
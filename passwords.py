@@ -0,0 +1,44 @@
+"""
+Password hashing for Law Office Management System
+
+All hashes use bcrypt with BCRYPT_ROUNDS. Hashes made with another cost
+factor still verify and are replaced on the next successful login.
+"""
+import bcrypt
+from config import BCRYPT_ROUNDS
+
+# Checked for unknown users. checkpw's cost comes from the salt part
+# ($2b$<rounds>$<salt>), so a fresh salt with a filler checksum costs
+# exactly one real check, and building it at import costs nothing.
+_DUMMY_HASH = bcrypt.gensalt(BCRYPT_ROUNDS) + b"." * 31
+
+def hash_password(password, rounds=BCRYPT_ROUNDS):
+    """Hash a password with the configured cost factor"""
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds))
+
+def get_rounds(password_hash):
+    """Get the cost factor of a bcrypt hash, or None if it is not one"""
+    if isinstance(password_hash, str):
+        password_hash = password_hash.encode('utf-8')
+    try:
+        return int(password_hash.split(b'$')[2])
+    except (IndexError, ValueError):
+        return None
+
+def needs_rehash(password_hash, rounds=BCRYPT_ROUNDS):
+    """Check if a hash was made with a different cost factor"""
+    return get_rounds(password_hash) != rounds
+
+def verify_password(password, password_hash):
+    """Check a password against a hash.
+
+    With no hash (unknown user) a dummy hash is checked instead, so the
+    answer takes as long as for a real user and reveals nothing.
+    """
+    if password_hash is None:
+        bcrypt.checkpw(password.encode('utf-8'), _DUMMY_HASH)
+        return False
+
+    if isinstance(password_hash, str):
+        password_hash = password_hash.encode('utf-8')
+    return bcrypt.checkpw(password.encode('utf-8'), password_hash)
@@ -0,0 +1,374 @@
+"""
+PDF reports (reportlab platypus) for Law Office Management System
+
+Case lists grouped by lawyer, court or status, and client financial
+statements. Rows are read from the repositories in FETCH_BATCH_SIZE
+batches and turned into tables of at most PDF_TABLE_ROWS rows only when
+the page layout asks for more content (see build_streamed), so a report
+of any length keeps a few hundred rows in memory at a time, and small
+tables keep page splitting cheap.
+
+Arabic text is reshaped through the cached shaper (text_shaping) and set
+in the first TrueType font of PDF_FONT_FILES that exists.
+"""
+import os
+import re
+import time
+import threading
+from collections import namedtuple
+from datetime import datetime
+from i18n import i18n
+from text_shaping import shape_text
+from repositories import case_repository, invoice_repository
+from config import REPORTS_DIR, PDF_FONT_FILES, PDF_TABLE_ROWS, PDF_FONT_SIZE
+
+_ARABIC = re.compile('[\u0600-\u06ff\u0750-\u077f\ufb50-\ufdff\ufe70-\ufeff]')
+
+_fonts = None
+_fonts_lock = threading.Lock()
+
+# Columns of the case reports: (row field, translation key, default header, relative width)
+CASE_COLUMNS = [
+    ('case_number', 'case_number', 'Case Number', 1.2),
+    ('title', 'case_title', 'Case Title', 2.5),
+    ('client_name', 'client_name', 'Client Name', 1.8),
+    ('court_name', 'court_name', 'Court Name', 1.8),
+    ('case_type', 'case_type', 'Case Type', 1.0),
+    ('status', 'case_status', 'Status', 0.9),
+    ('lawyer_name', 'assigned_lawyer', 'Assigned Lawyer', 1.5),
+    ('start_date', 'start_date', 'Start Date', 1.0),
+]
+
+STATEMENT_COLUMNS = [
+    ('invoice_number', 'invoice_number', 'Invoice Number', 1.2),
+    ('case_number', 'case_number', 'Case Number', 1.2),
+    ('issue_date', 'issue_date', 'Issue Date', 1.0),
+    ('due_date', 'due_date', 'Due Date', 1.0),
+    ('status', 'invoice_status', 'Status', 0.9),
+    ('amount', 'amount', 'Amount', 1.0),
+    ('tax_amount', 'tax_amount', 'Tax Amount', 1.0),
+    ('total_amount', 'total_amount', 'Total Amount', 1.1),
+]
+
+MONEY_FIELDS = ('amount', 'tax_amount', 'total_amount')
+
+# Case report groupings: report name -> (grouping field, translation key, default title)
+CASE_REPORTS = {
+    'cases_by_lawyer': ('lawyer_name', 'cases_by_lawyer', 'Cases by Lawyer'),
+    'cases_by_court': ('court_name', 'cases_by_court', 'Cases by Court'),
+    'cases_by_status': ('status', 'cases_by_status', 'Cases by Status'),
+}
+
+REPORTS = tuple(CASE_REPORTS) + ('client_statements',)
+
+class ReportResult(namedtuple('ReportResult', ['path', 'rows', 'pages', 'seconds'])):
+    """Outcome of rendering a report"""
+
+    @property
+    def pages_per_second(self):
+        return self.pages / self.seconds if self.seconds > 0 else 0.0
+
+def get_fonts():
+    """Register the report fonts once; returns (regular, bold) font names"""
+    global _fonts
+    with _fonts_lock:
+        if _fonts is None:
+            from reportlab.pdfbase import pdfmetrics
+            from reportlab.pdfbase.ttfonts import TTFont
+
+            _fonts = ('Helvetica', 'Helvetica-Bold')
+            for regular, bold in PDF_FONT_FILES:
+                if os.path.exists(regular):
+                    pdfmetrics.registerFont(TTFont('ReportFont', regular))
+                    pdfmetrics.registerFont(TTFont('ReportFont-Bold', bold if os.path.exists(bold) else regular))
+                    _fonts = ('ReportFont', 'ReportFont-Bold')
+                    break
+            else:
+                print("No PDF font with Arabic glyphs found (PDF_FONT_FILES); using Helvetica")
+        return _fonts
+
+def pdf_text(value):
+    """Text as drawn in a PDF: Arabic runs reshaped and put in visual order (cached)"""
+    if value is None:
+        return ""
+    text = str(value)
+    if _ARABIC.search(text):
+        return shape_text(text, 'ar')
+    return text
+
+def build_streamed(doc, flowables, low_water=4):
+    """Lay out flowables from a generator into doc, pulling them as needed.
+
+    Drives the build loop of BaseDocTemplate.build through its own steps
+    (_startBuild, handle_flowable, _endBuild) on a short list that is
+    topped up to low_water flowables before each one is placed, so
+    keepWithNext still sees what follows and a document of any length is
+    laid out without the whole list existing at once.
+    """
+    source = iter(flowables)
+    pending = []
+    doc._startBuild()
+    canv = doc.canv
+    canv._doctemplate = doc
+    try:
+        while True:
+            while source is not None and len(pending) < low_water:
+                try:
+                    pending.append(next(source))
+                except StopIteration:
+                    source = None
+            if not pending:
+                break
+            doc.clean_hanging()
+            doc.handle_flowable(pending)
+    finally:
+        del canv._doctemplate
+    doc._endBuild()
+
+class ReportBuilder:
+    """Styles and building blocks shared by the reports"""
+
+    def __init__(self, title, pagesize):
+        from reportlab.lib import colors
+        from reportlab.lib.enums import TA_LEFT, TA_RIGHT
+        from reportlab.lib.styles import ParagraphStyle
+
+        self.colors = colors
+        self.title = title
+        self.rtl = i18n.is_rtl()
+        self.font, self.bold_font = get_fonts()
+        self.width = pagesize[0] - 72
+        alignment = TA_RIGHT if self.rtl else TA_LEFT
+
+        self.title_style = ParagraphStyle('ReportTitle', fontName=self.bold_font, fontSize=PDF_FONT_SIZE + 8,
+                                          leading=PDF_FONT_SIZE + 12, alignment=alignment, spaceAfter=6)
+        self.heading_style = ParagraphStyle('ReportHeading', fontName=self.bold_font, fontSize=PDF_FONT_SIZE + 3,
+                                            leading=PDF_FONT_SIZE + 6, alignment=alignment, spaceBefore=10,
+                                            spaceAfter=4, keepWithNext=True)
+        self.text_style = ParagraphStyle('ReportText', fontName=self.font, fontSize=PDF_FONT_SIZE,
+                                         leading=PDF_FONT_SIZE + 3, alignment=alignment, spaceAfter=4)
+        self.labels = {}
+        self.footer = pdf_text(f"{title} - {datetime.now().strftime('%d/%m/%Y')}")
+
+    def paragraph(self, text, style):
+        """A paragraph of plain (not markup) text"""
+        from reportlab.platypus import Paragraph
+        from xml.sax.saxutils import escape
+
+        return Paragraph(escape(pdf_text(text)), style)
+
+    def label(self, code):
+        """Status code in the current language (cached)"""
+        if code not in self.labels:
+            self.labels[code] = i18n.get(code, code) if code else code
+        return self.labels[code]
+
+    def column_widths(self, columns):
+        """Absolute widths for columns' relative widths"""
+        total = sum(column[3] for column in columns)
+        return [self.width * column[3] / total for column in columns]
+
+    def cell(self, field, value, width):
+        """Cell text for a value, cut to fit its column"""
+        from reportlab.pdfbase.pdfmetrics import stringWidth
+
+        if field in MONEY_FIELDS:
+            return f"{value or 0:,.2f}"
+        if field == 'status':
+            value = self.label(value)
+        text = pdf_text(value)
+        limit = width - 6
+        text_width = stringWidth(text, self.font, PDF_FONT_SIZE)
+        if text_width > limit:
+            # Cut the logical text in proportion and shape it again
+            value = str(value)
+            text = pdf_text(value[:max(int(len(value) * limit / text_width) - 1, 0)] + "…")
+        return text
+
+    def table(self, columns, rows, header=True, bold_rows=()):
+        """A table of row value lists under the columns' headers"""
+        from reportlab.platypus import Table, TableStyle
+
+        widths = self.column_widths(columns)
+        data = []
+        if header:
+            data.append([pdf_text(i18n.get(key, default)) for field, key, default, width in columns])
+        data.extend(rows)
+        if self.rtl:
+            data = [row[::-1] for row in data]
+            widths = widths[::-1]
+
+        style = [
+            ('FONTNAME', (0, 0), (-1, -1), self.font),
+            ('FONTSIZE', (0, 0), (-1, -1), PDF_FONT_SIZE),
+            ('ALIGN', (0, 0), (-1, -1), 'RIGHT' if self.rtl else 'LEFT'),
+            ('LINEBELOW', (0, 0), (-1, -1), 0.25, self.colors.lightgrey),
+            ('TOPPADDING', (0, 0), (-1, -1), 2),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 2),
+        ]
+        if header:
+            style += [
+                ('FONTNAME', (0, 0), (-1, 0), self.bold_font),
+                ('BACKGROUND', (0, 0), (-1, 0), self.colors.HexColor('#2C3E50')),
+                ('TEXTCOLOR', (0, 0), (-1, 0), self.colors.white),
+            ]
+        for index in bold_rows:
+            style.append(('FONTNAME', (0, index), (-1, index), self.bold_font))
+        return Table(data, colWidths=widths, repeatRows=1 if header else 0, style=TableStyle(style))
+
+    def draw_page(self, canvas, doc):
+        """Footer with the report title, date and page number"""
+        canvas.saveState()
+        canvas.setFont(self.font, PDF_FONT_SIZE - 1)
+        page = f"{doc.page}"
+        if self.rtl:
+            canvas.drawRightString(doc.pagesize[0] - 36, 20, self.footer)
+            canvas.drawString(36, 20, page)
+        else:
+            canvas.drawString(36, 20, self.footer)
+            canvas.drawRightString(doc.pagesize[0] - 36, 20, page)
+        canvas.restoreState()
+
+def case_report_flowables(builder, field, counter, progress=None):
+    """Flowables of a case list grouped by field"""
+    columns = [column for column in CASE_COLUMNS if column[0] != field]
+    widths = builder.column_widths(columns)
+    total = case_repository.count() if progress else None
+    yield builder.paragraph(builder.title, builder.title_style)
+
+    group = object()
+    group_size = 0
+    rows = []
+    for batch in case_repository.iter_grouped(field):
+        for case in batch:
+            value = getattr(case, field)
+            if value != group:
+                if rows:
+                    yield builder.table(columns, rows, header=group_size == len(rows))
+                    rows = []
+                if group_size:
+                    yield builder.paragraph(f"{group_size} {i18n.get('cases')}", builder.text_style)
+                group, group_size = value, 0
+                heading = builder.label(value) if field == 'status' else value
+                yield builder.paragraph(heading or i18n.get('not_specified', 'Not specified'), builder.heading_style)
+
+            rows.append([builder.cell(column[0], getattr(case, column[0]), width) for column, width in zip(columns, widths)])
+            group_size += 1
+            if len(rows) >= PDF_TABLE_ROWS:
+                yield builder.table(columns, rows, header=group_size == len(rows))
+                rows = []
+
+        counter[0] += len(batch)
+        if progress:
+            progress(counter[0], max(total, counter[0]))
+
+    if rows:
+        yield builder.table(columns, rows, header=group_size == len(rows))
+    if group_size:
+        yield builder.paragraph(f"{group_size} {i18n.get('cases')}", builder.text_style)
+
+def statement_flowables(builder, counter, client_id=None, progress=None):
+    """Flowables of the clients' financial statements, with totals"""
+    columns = STATEMENT_COLUMNS
+    widths = builder.column_widths(columns)
+    total = invoice_repository.count() if progress and client_id is None else None
+    yield builder.paragraph(builder.title, builder.title_style)
+
+    def totals_table(label, invoiced, paid):
+        # Invoiced, paid and outstanding amounts under the total column
+        rows = []
+        for name, amount in ((label, invoiced), (i18n.get('paid'), paid), (i18n.get('outstanding', 'Outstanding'), invoiced - paid)):
+            row = [""] * len(columns)
+            row[0] = pdf_text(name)
+            row[-1] = f"{amount:,.2f}"
+            rows.append(row)
+        return builder.table(columns, rows, header=False, bold_rows=range(len(rows)))
+
+    client = object()
+    client_invoices = 0
+    invoiced = paid = 0
+    all_invoiced = all_paid = 0
+    rows = []
+    for batch in invoice_repository.iter_statements(client_id):
+        for invoice in batch:
+            if invoice.client_id != client:
+                if rows:
+                    yield builder.table(columns, rows, header=client_invoices == len(rows))
+                    rows = []
+                if client_invoices:
+                    yield totals_table(i18n.get('total_amount'), invoiced, paid)
+                client, client_invoices = invoice.client_id, 0
+                invoiced = paid = 0
+                yield builder.paragraph(invoice.client_name, builder.heading_style)
+
+            rows.append([builder.cell(column[0], getattr(invoice, column[0]), width) for column, width in zip(columns, widths)])
+            client_invoices += 1
+            if invoice.status != 'cancelled':
+                invoiced += invoice.total_amount or 0
+                all_invoiced += invoice.total_amount or 0
+                if invoice.status == 'paid':
+                    paid += invoice.total_amount or 0
+                    all_paid += invoice.total_amount or 0
+            if len(rows) >= PDF_TABLE_ROWS:
+                yield builder.table(columns, rows, header=client_invoices == len(rows))
+                rows = []
+
+        counter[0] += len(batch)
+        if progress:
+            progress(counter[0], max(total, counter[0]) if total is not None else counter[0])
+
+    if rows:
+        yield builder.table(columns, rows, header=client_invoices == len(rows))
+    if client_invoices:
+        yield totals_table(i18n.get('total_amount'), invoiced, paid)
+    if client_id is None:
+        yield builder.paragraph(i18n.get('grand_total', 'Grand Total'), builder.heading_style)
+        yield totals_table(i18n.get('total_amount'), all_invoiced, all_paid)
+
+def default_report_path(report):
+    """REPORTS_DIR/cases_by_lawyer_20240120_153000.pdf"""
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    return os.path.join(REPORTS_DIR, f"{report}_{timestamp}.pdf")
+
+def render_report(report, path=None, progress=None, client_id=None):
+    """Render a report (see REPORTS) to a PDF file.
+
+    progress(done, total) is called as rows are read. client_id limits
+    'client_statements' to one client. The file is written under a
+    temporary name and only renamed into place when complete.
+    """
+    from reportlab.lib.pagesizes import A4, landscape
+    from reportlab.platypus import BaseDocTemplate, Frame, PageTemplate
+
+    if report not in REPORTS:
+        raise ValueError(f"Unknown report: {report}")
+
+    if path is None:
+        os.makedirs(REPORTS_DIR, exist_ok=True)
+        path = default_report_path(report)
+
+    start = time.perf_counter()
+    pagesize = landscape(A4)
+    counter = [0]
+    if report in CASE_REPORTS:
+        field, key, default = CASE_REPORTS[report]
+        builder = ReportBuilder(i18n.get(key, default), pagesize)
+        flowables = case_report_flowables(builder, field, counter, progress)
+    else:
+        builder = ReportBuilder(i18n.get('client_statements', 'Client Statements'), pagesize)
+        flowables = statement_flowables(builder, counter, client_id, progress)
+
+    temporary_path = path + ".part"
+    doc = BaseDocTemplate(temporary_path, pagesize=pagesize, title=builder.title,
+                          leftMargin=36, rightMargin=36, topMargin=36, bottomMargin=36)
+    frame = Frame(doc.leftMargin, doc.bottomMargin, doc.width, doc.height, id='normal')
+    doc.addPageTemplates([PageTemplate(id='Report', frames=[frame], onPage=builder.draw_page, pagesize=pagesize)])
+    try:
+        build_streamed(doc, flowables)
+        os.replace(temporary_path, path)
+    except Exception:
+        if os.path.exists(temporary_path):
+            os.remove(temporary_path)
+        raise
+
+    return ReportResult(path, counter[0], doc.page, time.perf_counter() - start)
@@ -0,0 +1,182 @@
+"""
+Task reminders for Law Office Management System
+
+The signed-in user's open tasks are read once, in the background, into a
+heap of (reminder time, task ID) entries: one at the start of each day
+REMINDER_DAYS_BEFORE days before a task's due date, and one on its
+reminder date. The scheduler then sleeps with root.after until the
+earliest entry is due, shows the reminders that have come due and sleeps
+again, so the tasks table is never polled.
+
+Saved and deleted tasks arrive through the change bus. A changed task gets
+new entries; its old ones stay in the heap and are skipped when they reach
+the top, which keeps every change O(log n) however many tasks are open.
+"""
+import heapq
+from collections import namedtuple
+from datetime import datetime, date, time, timedelta
+from change_bus import change_bus
+from background import get_runner
+from repositories import task_repository
+from config import REMINDER_DAYS_BEFORE, REMINDER_MAX_WAIT
+
+# A reminder that came due: the task and the days left until it is due
+DueReminder = namedtuple('DueReminder', ['task', 'days_left'])
+
+def parse_date(value):
+    """YYYY-MM-DD text as a date, or None"""
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(value[:10])
+    except ValueError:
+        return None
+
+def reminder_dates(task, today):
+    """Dates from today on when a task should be brought up"""
+    due_date = parse_date(task.due_date)
+    dates = set()
+    if due_date:
+        dates.update(due_date - timedelta(days=days) for days in REMINDER_DAYS_BEFORE)
+    reminder_date = parse_date(task.reminder_date)
+    if reminder_date:
+        dates.add(reminder_date)
+    return sorted(day for day in dates if day >= today)
+
+class ReminderScheduler:
+    """Shows a user's task reminders when they fall due, waking only for the next one"""
+
+    def __init__(self, root, user_id, notify):
+        # notify(reminders) is called on the Tk thread with a list of DueReminder
+        self.root = root
+        self.user_id = user_id
+        self.notify = notify
+        self._heap = []  # (when, task ID, version)
+        self._tasks = {}  # task ID -> (version, TaskReminder); loaded tasks are version 0
+        self._version = 0
+        self._changed = set()  # tasks changed while loading
+        self._loading = False
+        self._after_id = None
+        self._unsubscribe = None
+
+    def start(self):
+        """Load the user's open tasks in the background and start waiting"""
+        self._unsubscribe = change_bus.subscribe('tasks', self.on_task_changed, owner=self.root)
+        self._loading = True
+        get_runner(self.root).submit(
+            self.load, self.user_id,
+            on_success=self.schedule_all,
+            on_error=lambda e: print(f"Error loading task reminders: {e}")
+        )
+
+    def stop(self):
+        """Stop waiting and forget every reminder"""
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+            self._after_id = None
+        if self._unsubscribe is not None:
+            self._unsubscribe()
+            self._unsubscribe = None
+        self._heap = []
+        self._tasks = {}
+
+    @staticmethod
+    def load(user_id):
+        """Worker side: a user's open tasks and the heap of their reminders"""
+        today = date.today()
+        tasks = task_repository.reminders(user_id, today.isoformat())
+        heap = [
+            (datetime.combine(day, time()), task.id, 0)
+            for task in tasks for day in reminder_dates(task, today)
+        ]
+        heapq.heapify(heap)
+        return tasks, heap
+
+    def schedule_all(self, loaded):
+        """Take over the loaded reminders, keeping those of tasks changed meanwhile"""
+        tasks, heap = loaded
+        self._loading = False
+        for task in tasks:
+            if task.id not in self._changed:
+                self._tasks[task.id] = (0, task)
+        self._changed = set()
+
+        if self._heap:
+            heap.extend(self._heap)
+            heapq.heapify(heap)
+        self._heap = heap
+        self._arm()
+
+    def schedule(self, task):
+        """Add or replace one task's reminders"""
+        self._version += 1
+        self._tasks[task.id] = (self._version, task)
+        for day in reminder_dates(task, date.today()):
+            heapq.heappush(self._heap, (datetime.combine(day, time()), task.id, self._version))
+        self._arm()
+
+    def unschedule(self, task_id):
+        """Drop a task's reminders; its heap entries become stale"""
+        self._tasks.pop(task_id, None)
+
+    def on_task_changed(self, table, action, task_id):
+        """Reschedule a saved task, or drop a deleted one"""
+        if self._loading:
+            self._changed.add(task_id)
+        self.unschedule(task_id)
+        if action == 'delete':
+            return
+
+        def show(task):
+            if task is not None:
+                self.schedule(task)
+
+        # Completed, cancelled, past and other users' tasks come back as None
+        get_runner(self.root).submit(
+            task_repository.get_reminder, task_id, self.user_id, date.today().isoformat(),
+            on_success=show,
+            on_error=lambda e: print(f"Error loading task {task_id} reminders: {e}")
+        )
+
+    def pending(self):
+        """Number of reminders still to come"""
+        return sum(1 for entry in self._heap if self._is_current(entry))
+
+    def _is_current(self, entry):
+        """Whether a heap entry belongs to its task's latest schedule"""
+        current = self._tasks.get(entry[1])
+        return current is not None and current[0] == entry[2]
+
+    def _arm(self):
+        """Wait until the earliest reminder is due (at most REMINDER_MAX_WAIT)"""
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+            self._after_id = None
+
+        while self._heap and not self._is_current(self._heap[0]):
+            heapq.heappop(self._heap)
+        if not self._heap:
+            return
+
+        # Long waits are cut short so a changed system clock is noticed
+        wait = (self._heap[0][0] - datetime.now()).total_seconds()
+        wait = min(max(wait, 0), REMINDER_MAX_WAIT)
+        self._after_id = self.root.after(int(wait * 1000), self._wake)
+
+    def _wake(self):
+        """Show the reminders that are due, then wait for the next one"""
+        self._after_id = None
+        now = datetime.now()
+        today = now.date()
+        due = {}
+        while self._heap and self._heap[0][0] <= now:
+            entry = heapq.heappop(self._heap)
+            if self._is_current(entry) and entry[1] not in due:
+                task = self._tasks[entry[1]][1]
+                due_date = parse_date(task.due_date)
+                due[entry[1]] = DueReminder(task, (due_date - today).days if due_date else None)
+
+        self._arm()
+        if due:
+            reminders = sorted(due.values(), key=lambda reminder: (reminder.task.due_date or "", reminder.task.id))
+            self.notify(reminders)
@@ -0,0 +1,157 @@
+"""
+Pre-summed reporting tables for Law Office Management System
+
+Case counts and invoice totals are kept per (dimension, member, period)
+by triggers, where member is the dimension's value (a status, a court, a
+lawyer or client ID) and period the month (YYYY-MM) the case started or
+the invoice was issued. Clients are summed over all time (period '') as
+a row per client and month would be about as many rows as invoices.
+Statistics screens then read a few hundred rows instead of scanning
+cases and invoices. rebuild_aggregates recomputes everything from the
+tables, e.g. after bulk repairs.
+"""
+
+CASE_PERIOD = "coalesce(substr(coalesce({row}.start_date, {row}.created_at), 1, 7), '')"
+INVOICE_PERIOD = "coalesce(substr({row}.issue_date, 1, 7), '')"
+ALL_TIME = "''"
+
+# Case dimensions: name -> (member, period) expressions over a cases row ({row} is new or old)
+CASE_DIMENSIONS = {
+    'status': ("coalesce({row}.status, '')", CASE_PERIOD),
+    'court': ("coalesce({row}.court_name, '')", CASE_PERIOD),
+    'type': ("coalesce({row}.case_type, '')", CASE_PERIOD),
+    'lawyer': ("coalesce({row}.assigned_lawyer_id, '')", CASE_PERIOD),
+}
+CASE_COLUMNS = ('status', 'court_name', 'case_type', 'assigned_lawyer_id', 'start_date', 'created_at')
+
+INVOICE_DIMENSIONS = {
+    'status': ("coalesce({row}.status, '')", INVOICE_PERIOD),
+    'client': ("coalesce({row}.client_id, '')", ALL_TIME),
+}
+INVOICE_COLUMNS = ('status', 'client_id', 'issue_date', 'amount', 'tax_amount', 'total_amount')
+INVOICE_AMOUNTS = ('amount', 'tax_amount', 'total_amount')
+
+def _keys(dimensions, row):
+    """VALUES rows of (dimension, member, period) for one table row"""
+    return ", ".join(
+        f"('{name}', {member.format(row=row)}, {period.format(row=row)})"
+        for name, (member, period) in dimensions.items()
+    )
+
+def _case_add(row):
+    """SQL counting a cases row in every dimension"""
+    values = ", ".join(
+        f"('{name}', {member.format(row=row)}, {period.format(row=row)}, 1)"
+        for name, (member, period) in CASE_DIMENSIONS.items()
+    )
+    return f'''
+            INSERT INTO case_aggregates (dimension, member, period, cases) VALUES {values}
+            ON CONFLICT (dimension, member, period) DO UPDATE SET cases = cases + 1;'''
+
+def _case_remove(row):
+    """SQL uncounting a cases row, dropping groups left empty"""
+    keys = _keys(CASE_DIMENSIONS, row)
+    return f'''
+            UPDATE case_aggregates SET cases = cases - 1
+            WHERE (dimension, member, period) IN (VALUES {keys});
+            DELETE FROM case_aggregates
+            WHERE (dimension, member, period) IN (VALUES {keys}) AND cases <= 0;'''
+
+def _invoice_add(row):
+    """SQL adding an invoices row to every dimension"""
+    amounts = ", ".join(f"coalesce({row}.{amount}, 0)" for amount in INVOICE_AMOUNTS)
+    values = ", ".join(
+        f"('{name}', {member.format(row=row)}, {period.format(row=row)}, 1, {amounts})"
+        for name, (member, period) in INVOICE_DIMENSIONS.items()
+    )
+    updates = ", ".join(f"{amount} = {amount} + excluded.{amount}" for amount in INVOICE_AMOUNTS)
+    return f'''
+            INSERT INTO invoice_aggregates (dimension, member, period, invoices, {", ".join(INVOICE_AMOUNTS)})
+            VALUES {values}
+            ON CONFLICT (dimension, member, period) DO UPDATE SET invoices = invoices + 1, {updates};'''
+
+def _invoice_remove(row):
+    """SQL taking an invoices row off every dimension, dropping groups left empty"""
+    keys = _keys(INVOICE_DIMENSIONS, row)
+    updates = ", ".join(f"{amount} = {amount} - coalesce({row}.{amount}, 0)" for amount in INVOICE_AMOUNTS)
+    return f'''
+            UPDATE invoice_aggregates SET invoices = invoices - 1, {updates}
+            WHERE (dimension, member, period) IN (VALUES {keys});
+            DELETE FROM invoice_aggregates
+            WHERE (dimension, member, period) IN (VALUES {keys}) AND invoices <= 0;'''
+
+def _changed(columns):
+    """Trigger WHEN clause: any of columns changed"""
+    return " OR ".join(f"old.{column} IS NOT new.{column}" for column in columns)
+
+def create_aggregates(conn):
+    """Create the aggregate tables and their triggers, then fill them"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS case_aggregates (
+            dimension TEXT NOT NULL,
+            member TEXT NOT NULL,
+            period TEXT NOT NULL,
+            cases INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (dimension, member, period)
+        ) WITHOUT ROWID
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS invoice_aggregates (
+            dimension TEXT NOT NULL,
+            member TEXT NOT NULL,
+            period TEXT NOT NULL,
+            invoices INTEGER NOT NULL DEFAULT 0,
+            amount REAL NOT NULL DEFAULT 0,
+            tax_amount REAL NOT NULL DEFAULT 0,
+            total_amount REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (dimension, member, period)
+        ) WITHOUT ROWID
+    ''')
+
+    create_aggregate_triggers(conn)
+    rebuild_aggregates(conn)
+
+def create_aggregate_triggers(conn):
+    """(Re)create the triggers keeping the aggregates in step with cases and invoices"""
+    for table, add, remove, columns in (
+        ('cases', _case_add, _case_remove, CASE_COLUMNS),
+        ('invoices', _invoice_add, _invoice_remove, INVOICE_COLUMNS),
+    ):
+        for event in ('insert', 'update', 'delete'):
+            conn.execute(f"DROP TRIGGER IF EXISTS aggregates_{table}_{event}")
+        conn.execute(f'''
+            CREATE TRIGGER aggregates_{table}_insert AFTER INSERT ON {table} BEGIN
+                {add('new')}
+            END
+        ''')
+        conn.execute(f'''
+            CREATE TRIGGER aggregates_{table}_update
+            AFTER UPDATE OF {", ".join(columns)} ON {table} WHEN {_changed(columns)} BEGIN
+                {remove('old')}
+                {add('new')}
+            END
+        ''')
+        conn.execute(f'''
+            CREATE TRIGGER aggregates_{table}_delete AFTER DELETE ON {table} BEGIN
+                {remove('old')}
+            END
+        ''')
+
+def rebuild_aggregates(conn):
+    """Recompute every aggregate from the cases and invoices tables"""
+    conn.execute("DELETE FROM case_aggregates")
+    for name, (member, period) in CASE_DIMENSIONS.items():
+        conn.execute(f'''
+            INSERT INTO case_aggregates (dimension, member, period, cases)
+            SELECT '{name}', {member.format(row='c')}, {period.format(row='c')}, COUNT(*)
+            FROM cases c GROUP BY 2, 3
+        ''')
+
+    conn.execute("DELETE FROM invoice_aggregates")
+    sums = ", ".join(f"coalesce(SUM(i.{amount}), 0)" for amount in INVOICE_AMOUNTS)
+    for name, (member, period) in INVOICE_DIMENSIONS.items():
+        conn.execute(f'''
+            INSERT INTO invoice_aggregates (dimension, member, period, invoices, {", ".join(INVOICE_AMOUNTS)})
+            SELECT '{name}', {member.format(row='i')}, {period.format(row='i')}, COUNT(*), {sums}
+            FROM invoices i GROUP BY 2, 3
+        ''')
@@ -3,11 +3,19 @@ Reports Module for Law Office Management System
 """
 import tkinter as tk
 from gui_components import *
+from auth import auth
 from i18n import i18n
+from background import get_runner
+from repositories import statistics_repository, CASE_STATISTICS, INVOICE_STATISTICS, ALL_TIME_INVOICE_STATISTICS
+
+# Statistics screens: (translation key, 'cases' or 'invoices', dimension)
+CASE_STATISTIC_SCREENS = [(f'cases_by_{dimension}', 'cases', dimension) for dimension in CASE_STATISTICS]
+INVOICE_STATISTIC_SCREENS = [(f'invoices_by_{dimension}', 'invoices', dimension) for dimension in INVOICE_STATISTICS]
 
 class ReportsModule:
     def __init__(self, parent):
         self.parent = parent
+        self.years = []
         self.create_interface()
     
     def create_interface(self):
@@ -21,17 +29,208 @@ class ReportsModule:
             anchor="e" if i18n.is_rtl() else "w", pady=(0, 20)
         )
         
-        # Placeholder content
-        placeholder_frame = tk.Frame(main_frame, bg="white", relief="solid", bd=1)
-        placeholder_frame.pack(fill="both", expand=True, padx=50, pady=50)
+        self.create_statistics_section(main_frame)
+        self.create_pdf_section(main_frame)
+        self.create_export_section(main_frame)
+        
+        self.refresh()
+    
+    def refresh(self):
+        """Reload the years and the shown statistic after cases or invoices changed"""
+        self.load_years()
+        self.load_statistic()
+    
+    def create_statistics_section(self, parent):
+        """Statistic and year pickers over a table read from the reporting aggregates"""
+        stats_frame = tk.Frame(parent, bg="white", relief="solid", bd=1)
+        stats_frame.pack(fill="x", pady=(0, 10))
+        
+        StyledLabel(stats_frame, text=i18n.get('statistics', 'Statistics'), style="header").pack(
+            anchor="e" if i18n.is_rtl() else "w", padx=10, pady=10
+        )
+        
+        self.statistics = list(CASE_STATISTIC_SCREENS)
+        if auth.can_view_financial_reports():
+            self.statistics.extend(INVOICE_STATISTIC_SCREENS)
+        
+        side = "right" if i18n.is_rtl() else "left"
+        controls = tk.Frame(stats_frame, bg="white")
+        controls.pack(fill="x", padx=10, pady=(0, 10))
+        
+        self.statistic_combo = StyledCombobox(
+            controls, values=[i18n.get(key) for key, kind, dimension in self.statistics],
+            state="readonly", width=30
+        )
+        self.statistic_combo.current(0)
+        self.statistic_combo.pack(side=side, padx=5)
+        self.statistic_combo.bind('<<ComboboxSelected>>', lambda e: self.load_statistic())
+        
+        self.year_combo = StyledCombobox(controls, values=[i18n.get('all_years', 'All years')], state="readonly", width=12)
+        self.year_combo.current(0)
+        self.year_combo.pack(side=side, padx=5)
+        self.year_combo.bind('<<ComboboxSelected>>', lambda e: self.load_statistic())
+        
+        self.statistics_tree = DataTreeview(stats_frame, show='headings', height=10)
+        self.statistics_tree.pack(fill="x", padx=10, pady=(0, 10))
+    
+    def selected_year(self):
+        """Year picked in the year list, or None for all years"""
+        index = self.year_combo.current()
+        return self.years[index - 1] if index > 0 else None
+    
+    def load_years(self):
+        """Fill the year list from the aggregates, keeping the picked year"""
+        def show_years(years):
+            year = self.selected_year()
+            self.years = years
+            self.year_combo['values'] = [i18n.get('all_years', 'All years')] + years
+            self.year_combo.current(years.index(year) + 1 if year in years else 0)
+        
+        get_runner(self.parent).submit(
+            statistics_repository.years,
+            on_success=show_years,
+            on_error=lambda e: print(f"Error loading statistics years: {e}")
+        )
+    
+    def load_statistic(self):
+        """Show the picked statistic for the picked year"""
+        key, kind, dimension = self.statistics[self.statistic_combo.current()]
+        year = self.selected_year()
+        all_time = kind == 'invoices' and dimension in ALL_TIME_INVOICE_STATISTICS
+        self.year_combo.configure(state="disabled" if all_time else "readonly")
+        
+        if kind == 'cases':
+            columns = (i18n.get(dimension, dimension), i18n.get('total_cases', 'Total Cases'))
+            fetch = lambda: statistics_repository.cases_by(dimension, year)
+        else:
+            columns = (
+                i18n.get(dimension, dimension), i18n.get('invoice_count', 'Invoices'),
+                i18n.get('amount'), i18n.get('tax_amount'), i18n.get('total_amount')
+            )
+            fetch = lambda: statistics_repository.invoices_by(dimension, year)
+        
+        tree = self.statistics_tree
+        tree.clear_page_source()
+        tree['columns'] = columns
+        for col in columns:
+            tree.heading(col, text=RTLWidget.format_text(col))
+            tree.column(col, width=150, anchor="center")
+        
+        def render(row):
+            label = row.label
+            if not label:
+                label = i18n.get('not_specified')
+            elif dimension == 'status':
+                label = i18n.get(label, label)
+            values = [RTLWidget.format_text(label)] + list(row[1:])
+            if kind == 'invoices':
+                values[2:] = [f"{value:,.2f}" for value in values[2:]]
+            return values
+        
+        tree.set_row_source(
+            fetch, render,
+            on_error=lambda e: show_error(f"{i18n.get('statistics', 'Statistics')}: {str(e)}")
+        )
+    
+    def create_pdf_section(self, parent):
+        """Buttons rendering each PDF report"""
+        pdf_frame = tk.Frame(parent, bg="white", relief="solid", bd=1)
+        pdf_frame.pack(fill="x", pady=(0, 10))
+        
+        StyledLabel(pdf_frame, text=i18n.get('pdf_reports', 'PDF Reports'), style="header").pack(
+            anchor="e" if i18n.is_rtl() else "w", padx=10, pady=10
+        )
+        
+        reports = ['cases_by_lawyer', 'cases_by_court', 'cases_by_status']
+        if auth.can_view_financial_reports():
+            reports.append('client_statements')
+        
+        row = tk.Frame(pdf_frame, bg="white")
+        row.pack(fill="x", padx=10, pady=(0, 10))
+        for report in reports:
+            StyledButton(
+                row,
+                text=i18n.get(report),
+                command=lambda report=report: self.render_pdf(report),
+                style="primary"
+            ).pack(side="right" if i18n.is_rtl() else "left", padx=5)
+    
+    def create_export_section(self, parent):
+        """Buttons exporting each list to Excel or CSV"""
+        export_frame = tk.Frame(parent, bg="white", relief="solid", bd=1)
+        export_frame.pack(fill="x", pady=(0, 10))
+        
+        StyledLabel(export_frame, text=i18n.get('export_data', 'Export Data'), style="header").pack(
+            anchor="e" if i18n.is_rtl() else "w", padx=10, pady=10
+        )
+        
+        lists = [('cases', i18n.get('cases')), ('clients', i18n.get('clients'))]
+        if auth.can_view_financial_reports():
+            lists.append(('invoices', i18n.get('billing')))
+        
+        side = "right" if i18n.is_rtl() else "left"
+        for entity, label in lists:
+            row = tk.Frame(export_frame, bg="white")
+            row.pack(fill="x", padx=10, pady=(0, 10))
+            
+            StyledLabel(row, text=label, width=15).pack(side=side)
+            StyledButton(
+                row,
+                text=i18n.get('export_excel', 'Excel'),
+                command=lambda entity=entity: self.export(entity, 'xlsx'),
+                style="primary"
+            ).pack(side=side, padx=5)
+            StyledButton(
+                row,
+                text=i18n.get('export_csv', 'CSV'),
+                command=lambda entity=entity: self.export(entity, 'csv'),
+                style="secondary"
+            ).pack(side=side, padx=5)
+    
+    def render_pdf(self, report):
+        """Render a PDF report to REPORTS_DIR in the background, showing its progress"""
+        from pdf_reports import render_report
+        
+        runner = get_runner(self.parent)
+        dialog = ProgressDialog(self.parent, i18n.get(report), i18n.get('report_in_progress', 'Creating report...'))
+        
+        def progress(done, total):
+            # Called on the worker thread
+            runner.post(dialog.set_progress, done, total)
+        
+        def finished(result):
+            dialog.close()
+            show_success(
+                f"{i18n.get('report_saved', 'Report saved to')}:\n{result.path}\n\n"
+                f"{result.pages} {i18n.get('pages', 'pages')}, {result.rows} {i18n.get('rows', 'rows')}"
+            )
+        
+        def failed(e):
+            dialog.close()
+            show_error(f"{i18n.get('report_failed', 'Report failed')}: {str(e)}")
+        
+        runner.submit(render_report, report, None, progress, on_success=finished, on_error=failed)
+    
+    def export(self, entity, file_format):
+        """Export a list to REPORTS_DIR in the background, showing its progress"""
+        from export import export_list
+        
+        runner = get_runner(self.parent)
+        dialog = ProgressDialog(self.parent, i18n.get('export_data', 'Export Data'), i18n.get('export_in_progress', 'Exporting...'))
+        
+        def progress(done, total):
+            # Called on the worker thread
+            runner.post(dialog.set_progress, done, total)
+        
+        def finished(result):
+            dialog.close()
+            show_success(
+                f"{i18n.get('export_saved', 'Export saved to')}:\n{result.path}\n\n"
+                f"{result.rows} {i18n.get('rows', 'rows')}, {result.rows_per_second:.0f} {i18n.get('rows_per_second', 'rows/s')}"
+            )
         
-        StyledLabel(
-            placeholder_frame, 
-            text=i18n.get('coming_soon', 'Reports & Statistics - Coming Soon'),
-            style="header"
-        ).pack(expand=True)
+        def failed(e):
+            dialog.close()
+            show_error(f"{i18n.get('export_failed', 'Export failed')}: {str(e)}")
         
-        StyledLabel(
-            placeholder_frame,
-            text=i18n.get('reports_desc', 'This module will include case reports, financial reports, and performance statistics.')
-        ).pack(expand=True, pady=10)
\ No newline at end of file
+        runner.submit(export_list, entity, file_format, None, progress, on_success=finished, on_error=failed)
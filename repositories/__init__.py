@@ -0,0 +1,28 @@
+"""
+Data access layer for Law Office Management System
+
+UI modules read and write cases, clients, users, invoices and tasks
+through these repositories rather than inlining SQL. Rows come back as
+named tuples (``case.title``), and the global instances use the shared
+``db`` service, so they follow app_context overrides:
+
+    from repositories import case_repository
+    for batch in case_repository.iter_summaries():
+        ...
+"""
+from repositories.base import Repository, row_factory
+from repositories.cases import (
+    CaseRepository, case_repository, CaseSummary, CaseSearchResult, Case, ClientCase, CaseLabel, CASE_FIELDS
+)
+from repositories.clients import (
+    ClientRepository, client_repository, ClientSummary, Client, ClientName, CLIENT_FIELDS
+)
+from repositories.users import UserRepository, user_repository, UserName
+from repositories.tasks import (
+    TaskRepository, task_repository, TaskSummary, Task, TaskReminder, TASK_FIELDS, OPEN_STATUSES
+)
+from repositories.invoices import InvoiceRepository, invoice_repository, InvoiceSummary
+from repositories.statistics import (
+    StatisticsRepository, statistics_repository, CaseStatistic, InvoiceStatistic, CASE_STATISTICS, INVOICE_STATISTICS,
+    ALL_TIME_INVOICE_STATISTICS
+)
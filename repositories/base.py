@@ -0,0 +1,83 @@
+"""
+Base class for the repositories
+
+SQL is kept in module-level constants so every call runs the same statement
+text; sqlite3 then reuses the prepared statement from the connection's
+statement cache (DB_CACHED_STATEMENTS) instead of parsing it again, and
+pooled connections keep that cache between calls.
+"""
+from contextlib import nullcontext
+from database import db
+from background import interruptible
+from config import FETCH_BATCH_SIZE
+
+def row_factory(row_type):
+    """Cursor row factory that builds row_type tuples instead of sqlite3.Row"""
+    make = row_type._make
+    return lambda cursor, row: make(row)
+
+class Repository:
+    """Runs a repository's statements against a DatabaseManager"""
+
+    def __init__(self, database=None):
+        # The db proxy follows app_context overrides
+        self.database = database if database is not None else db
+
+    def fetch_one(self, sql, params, row_type):
+        """Run a query and return its first row as row_type, or None"""
+        with self.database.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = row_factory(row_type)
+            cursor.execute(sql, params)
+            return cursor.fetchone()
+
+    def fetch_all(self, sql, params, row_type, cancellable=False):
+        """Run a query and return all rows as row_type.
+
+        With cancellable=True the query stops early when the background
+        request running it is cancelled (see background.interruptible).
+        """
+        with self.database.get_connection() as conn:
+            with interruptible(conn) if cancellable else nullcontext():
+                cursor = conn.cursor()
+                cursor.row_factory = row_factory(row_type)
+                cursor.execute(sql, params)
+                return cursor.fetchall()
+
+    def iter_batches(self, sql, params, row_type, batch_size=FETCH_BATCH_SIZE):
+        """Yield the rows of a query in lists of up to batch_size.
+
+        Rows are read with fetchmany, so memory stays flat however many rows
+        match. The pooled connection is held until the iteration finishes.
+        """
+        with self.database.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = row_factory(row_type)
+            cursor.execute(sql, params)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield rows
+
+    def fetch_value(self, sql, params):
+        """Run a query and return the first column of its first row"""
+        with self.database.get_connection() as conn:
+            row = conn.execute(sql, params).fetchone()
+            return row[0] if row else None
+
+    def execute(self, sql, params):
+        """Run a write; returns the cursor (lastrowid, rowcount).
+
+        Commits when the connection's outermost block ends, so a write made
+        inside a caller's get_connection() joins the caller's transaction.
+        """
+        with self.database.get_connection() as conn:
+            return conn.execute(sql, params)
+
+    def execute_many(self, conn, sql, rows):
+        """Run a write once per row on conn, without committing.
+
+        For bulk writes whose transaction the caller owns (see bulk_import).
+        """
+        return conn.executemany(sql, rows)
@@ -0,0 +1,246 @@
+"""
+Case data access for Law Office Management System
+"""
+from collections import namedtuple
+from repositories.base import Repository
+from config import SEARCH_RESULT_LIMIT, FETCH_BATCH_SIZE
+
+# A case as listed in the cases table
+CaseSummary = namedtuple('CaseSummary', [
+    'id', 'case_number', 'title', 'client_name', 'court_name', 'case_type',
+    'status', 'lawyer_name', 'start_date', 'created_at'
+])
+
+# A search hit, with the other values the search matches on
+CaseSearchResult = namedtuple('CaseSearchResult', CaseSummary._fields + (
+    'description', 'client_national_id', 'client_phone', 'client_email'
+))
+
+# A case with every editable field, for the case form
+Case = namedtuple('Case', [
+    'id', 'case_number', 'title', 'client_id', 'client_name', 'court_name',
+    'case_type', 'opponent_name', 'status', 'assigned_lawyer_id', 'lawyer_name',
+    'start_date', 'end_date', 'description'
+])
+
+# A case for pick lists
+CaseLabel = namedtuple('CaseLabel', ['id', 'label'])
+
+# A case as listed for one client
+ClientCase = namedtuple('ClientCase', ['id', 'case_number', 'title', 'case_type', 'status', 'start_date'])
+
+# Columns the case form writes, in statement parameter order
+CASE_FIELDS = (
+    'case_number', 'title', 'client_id', 'court_name', 'case_type', 'opponent_name',
+    'status', 'assigned_lawyer_id', 'start_date', 'end_date', 'description'
+)
+
+_SUMMARY_SELECT = '''
+    SELECT 
+        c.id,
+        c.case_number,
+        c.title,
+        cl.name as client_name,
+        c.court_name,
+        c.case_type,
+        c.status,
+        u.full_name as lawyer_name,
+        c.start_date,
+        c.created_at
+    FROM cases c
+    LEFT JOIN clients cl ON c.client_id = cl.id
+    LEFT JOIN users u ON c.assigned_lawyer_id = u.id
+'''
+
+# Keyset pagination on (created_at, id), newest first
+_FIRST_PAGE = _SUMMARY_SELECT + '''
+    ORDER BY c.created_at DESC, c.id DESC
+    LIMIT ?
+'''
+
+_NEXT_PAGE = _SUMMARY_SELECT + '''
+    WHERE (c.created_at, c.id) < (?, ?)
+    ORDER BY c.created_at DESC, c.id DESC
+    LIMIT ?
+'''
+
+_PREVIOUS_PAGE = _SUMMARY_SELECT + '''
+    WHERE (c.created_at, c.id) > (?, ?)
+    ORDER BY c.created_at ASC, c.id ASC
+    LIMIT ?
+'''
+
+_SUMMARY_BY_ID = _SUMMARY_SELECT + '''
+    WHERE c.id = ?
+'''
+
+_ALL_SUMMARIES = _SUMMARY_SELECT + '''
+    ORDER BY c.created_at DESC, c.id DESC
+'''
+
+# Every case grouped by a listed field (unassigned last), newest first in each group
+_GROUPED_SUMMARIES = dict((field, _SUMMARY_SELECT + f'''
+    ORDER BY {field} IS NULL, {field}, c.created_at DESC, c.id DESC
+''') for field in ('lawyer_name', 'court_name', 'c.status'))
+
+# Full-text index lookup, best matches first
+_SEARCH = '''
+    SELECT 
+        c.id,
+        c.case_number,
+        c.title,
+        cl.name as client_name,
+        c.court_name,
+        c.case_type,
+        c.status,
+        u.full_name as lawyer_name,
+        c.start_date,
+        c.created_at,
+        c.description,
+        cl.national_id as client_national_id,
+        cl.phone as client_phone,
+        cl.email as client_email
+    FROM (
+        SELECT rowid, rank FROM cases_fts
+        WHERE cases_fts MATCH ?
+        ORDER BY rank
+        LIMIT ?
+    ) f
+    JOIN cases c ON c.id = f.rowid
+    LEFT JOIN clients cl ON c.client_id = cl.id
+    LEFT JOIN users u ON c.assigned_lawyer_id = u.id
+    ORDER BY f.rank
+'''
+
+_BY_ID = '''
+    SELECT 
+        c.id,
+        c.case_number,
+        c.title,
+        c.client_id,
+        cl.name as client_name,
+        c.court_name,
+        c.case_type,
+        c.opponent_name,
+        c.status,
+        c.assigned_lawyer_id,
+        u.full_name as lawyer_name,
+        c.start_date,
+        c.end_date,
+        c.description
+    FROM cases c
+    LEFT JOIN clients cl ON c.client_id = cl.id
+    LEFT JOIN users u ON c.assigned_lawyer_id = u.id
+    WHERE c.id = ?
+'''
+
+_FOR_CLIENT = '''
+    SELECT id, case_number, title, case_type, status, start_date
+    FROM cases 
+    WHERE client_id = ?
+    ORDER BY created_at DESC
+'''
+
+_CLIENT_CASE = '''
+    SELECT id, case_number, title, case_type, status, start_date
+    FROM cases 
+    WHERE id = ? AND client_id = ?
+'''
+
+_INSERT = f'''
+    INSERT INTO cases ({", ".join(CASE_FIELDS)}, created_by)
+    VALUES ({", ".join("?" * (len(CASE_FIELDS) + 1))})
+'''
+
+_UPDATE = f'''
+    UPDATE cases SET
+        {", ".join(f"{field} = ?" for field in CASE_FIELDS)}, updated_at = CURRENT_TIMESTAMP
+    WHERE id = ?
+'''
+
+_DELETE = "DELETE FROM cases WHERE id = ?"
+
+_CASE_NUMBERS = "SELECT case_number FROM cases"
+
+_LABELS = "SELECT id, case_number || ' - ' || title FROM cases ORDER BY case_number"
+
+_COUNT = "SELECT COUNT(*) FROM cases"
+
+class CaseRepository(Repository):
+    """Reads and writes cases"""
+
+    def page(self, key, limit, forward=True):
+        """One page of the cases list in display order (see DataTreeview.set_page_source)"""
+        if key is None:
+            return self.fetch_all(_FIRST_PAGE, (limit,), CaseSummary)
+        if forward:
+            return self.fetch_all(_NEXT_PAGE, (*key, limit), CaseSummary)
+        return self.fetch_all(_PREVIOUS_PAGE, (*key, limit), CaseSummary)[::-1]
+
+    def page_key(self, case):
+        """Keyset pagination key of a listed case"""
+        return (case.created_at, case.id)
+
+    def get_summary(self, case_id):
+        """Get one case as listed, or None"""
+        return self.fetch_one(_SUMMARY_BY_ID, (case_id,), CaseSummary)
+
+    def iter_summaries(self, batch_size=FETCH_BATCH_SIZE):
+        """Yield every case as listed, newest first, in batches"""
+        return self.iter_batches(_ALL_SUMMARIES, (), CaseSummary, batch_size)
+
+    def iter_grouped(self, field, batch_size=FETCH_BATCH_SIZE):
+        """Yield every case as listed, in batches, ordered by 'lawyer_name', 'court_name' or 'status'"""
+        sql = _GROUPED_SUMMARIES['c.status' if field == 'status' else field]
+        return self.iter_batches(sql, (), CaseSummary, batch_size)
+
+    def search(self, match_query, limit=SEARCH_RESULT_LIMIT):
+        """Cases matching a full-text query; stops if the request is cancelled"""
+        return self.fetch_all(_SEARCH, (match_query, limit), CaseSearchResult, cancellable=True)
+
+    def get(self, case_id):
+        """Get a case with all its editable fields, or None"""
+        return self.fetch_one(_BY_ID, (case_id,), Case)
+
+    def for_client(self, client_id):
+        """A client's cases, newest first"""
+        return self.fetch_all(_FOR_CLIENT, (client_id,), ClientCase)
+
+    def get_client_case(self, case_id, client_id):
+        """Get one case if it belongs to client_id, or None"""
+        return self.fetch_one(_CLIENT_CASE, (case_id, client_id), ClientCase)
+
+    def create(self, fields, created_by):
+        """Insert a case from a CASE_FIELDS dict, returning its ID"""
+        values = [fields.get(field) for field in CASE_FIELDS]
+        return self.execute(_INSERT, values + [created_by]).lastrowid
+
+    def insert_many(self, conn, rows, created_by):
+        """Insert CASE_FIELDS dicts on conn in one executemany (not committed)"""
+        values = ([fields.get(field) for field in CASE_FIELDS] + [created_by] for fields in rows)
+        self.execute_many(conn, _INSERT, values)
+
+    def count(self):
+        """Number of cases"""
+        return self.fetch_value(_COUNT, ())
+
+    def labels(self):
+        """Every case's ID and 'number - title', by case number"""
+        return self.fetch_all(_LABELS, (), CaseLabel)
+
+    def case_numbers(self):
+        """Set of every case number in use"""
+        with self.database.get_connection() as conn:
+            return set(row[0] for row in conn.execute(_CASE_NUMBERS))
+
+    def update(self, case_id, fields):
+        """Update a case from a CASE_FIELDS dict"""
+        values = [fields.get(field) for field in CASE_FIELDS]
+        self.execute(_UPDATE, values + [case_id])
+
+    def delete(self, case_id):
+        """Delete a case, returning whether it existed"""
+        return self.execute(_DELETE, (case_id,)).rowcount > 0
+
+# Global case repository instance
+case_repository = CaseRepository()
@@ -0,0 +1,178 @@
+"""
+Client data access for Law Office Management System
+"""
+from collections import namedtuple
+from repositories.base import Repository
+from config import SEARCH_RESULT_LIMIT, FETCH_BATCH_SIZE
+
+# A client as listed in the clients table (search hits have the same shape)
+ClientSummary = namedtuple('ClientSummary', [
+    'id', 'name', 'phone', 'email', 'national_id', 'created_at', 'case_count'
+])
+
+# A client with every editable field, for the client form
+Client = namedtuple('Client', ['id', 'name', 'phone', 'email', 'national_id', 'address', 'notes'])
+
+# A client for pick lists
+ClientName = namedtuple('ClientName', ['id', 'name'])
+
+# Columns the client form writes, in statement parameter order
+CLIENT_FIELDS = ('name', 'phone', 'email', 'national_id', 'address', 'notes')
+
+# Case counts come per row through the client_id index
+_SUMMARY_SELECT = '''
+    SELECT 
+        c.id,
+        c.name,
+        c.phone,
+        c.email,
+        c.national_id,
+        c.created_at,
+        (SELECT COUNT(*) FROM cases cs WHERE cs.client_id = c.id) as case_count
+    FROM clients c
+'''
+
+# Keyset pagination on (created_at, id), newest first
+_FIRST_PAGE = _SUMMARY_SELECT + '''
+    ORDER BY c.created_at DESC, c.id DESC
+    LIMIT ?
+'''
+
+_NEXT_PAGE = _SUMMARY_SELECT + '''
+    WHERE (c.created_at, c.id) < (?, ?)
+    ORDER BY c.created_at DESC, c.id DESC
+    LIMIT ?
+'''
+
+_PREVIOUS_PAGE = _SUMMARY_SELECT + '''
+    WHERE (c.created_at, c.id) > (?, ?)
+    ORDER BY c.created_at ASC, c.id ASC
+    LIMIT ?
+'''
+
+_SUMMARY_BY_ID = _SUMMARY_SELECT + '''
+    WHERE c.id = ?
+'''
+
+_ALL_SUMMARIES = _SUMMARY_SELECT + '''
+    ORDER BY c.created_at DESC, c.id DESC
+'''
+
+# Full-text index lookup, best matches first
+_SEARCH = '''
+    SELECT 
+        c.id,
+        c.name,
+        c.phone,
+        c.email,
+        c.national_id,
+        c.created_at,
+        COUNT(cs.id) as case_count
+    FROM (
+        SELECT rowid, rank FROM clients_fts
+        WHERE clients_fts MATCH ?
+        ORDER BY rank
+        LIMIT ?
+    ) f
+    JOIN clients c ON c.id = f.rowid
+    LEFT JOIN cases cs ON c.id = cs.client_id
+    GROUP BY c.id, c.name, c.phone, c.email, c.national_id, c.created_at
+    ORDER BY MIN(f.rank)
+'''
+
+_BY_ID = '''
+    SELECT id, name, phone, email, national_id, address, notes
+    FROM clients
+    WHERE id = ?
+'''
+
+_NAMES = "SELECT id, name FROM clients ORDER BY name"
+
+_CASE_COUNT = "SELECT COUNT(*) FROM cases WHERE client_id = ?"
+
+_NATIONAL_IDS = "SELECT national_id, id FROM clients WHERE national_id IS NOT NULL"
+
+_COUNT = "SELECT COUNT(*) FROM clients"
+
+_INSERT = f'''
+    INSERT INTO clients ({", ".join(CLIENT_FIELDS)}, created_by)
+    VALUES ({", ".join("?" * (len(CLIENT_FIELDS) + 1))})
+'''
+
+_UPDATE = f'''
+    UPDATE clients SET
+        {", ".join(f"{field} = ?" for field in CLIENT_FIELDS)}, updated_at = CURRENT_TIMESTAMP
+    WHERE id = ?
+'''
+
+_DELETE = "DELETE FROM clients WHERE id = ?"
+
+class ClientRepository(Repository):
+    """Reads and writes clients"""
+
+    def page(self, key, limit, forward=True):
+        """One page of the clients list in display order (see DataTreeview.set_page_source)"""
+        if key is None:
+            return self.fetch_all(_FIRST_PAGE, (limit,), ClientSummary)
+        if forward:
+            return self.fetch_all(_NEXT_PAGE, (*key, limit), ClientSummary)
+        return self.fetch_all(_PREVIOUS_PAGE, (*key, limit), ClientSummary)[::-1]
+
+    def page_key(self, client):
+        """Keyset pagination key of a listed client"""
+        return (client.created_at, client.id)
+
+    def get_summary(self, client_id):
+        """Get one client as listed, or None"""
+        return self.fetch_one(_SUMMARY_BY_ID, (client_id,), ClientSummary)
+
+    def iter_summaries(self, batch_size=FETCH_BATCH_SIZE):
+        """Yield every client as listed, newest first, in batches"""
+        return self.iter_batches(_ALL_SUMMARIES, (), ClientSummary, batch_size)
+
+    def search(self, match_query, limit=SEARCH_RESULT_LIMIT):
+        """Clients matching a full-text query; stops if the request is cancelled"""
+        return self.fetch_all(_SEARCH, (match_query, limit), ClientSummary, cancellable=True)
+
+    def get(self, client_id):
+        """Get a client with all its editable fields, or None"""
+        return self.fetch_one(_BY_ID, (client_id,), Client)
+
+    def names(self):
+        """Every client's ID and name, by name"""
+        return self.fetch_all(_NAMES, (), ClientName)
+
+    def case_count(self, client_id):
+        """Number of cases a client has"""
+        return self.fetch_value(_CASE_COUNT, (client_id,))
+
+    def count(self):
+        """Number of clients"""
+        return self.fetch_value(_COUNT, ())
+
+    def national_ids(self):
+        """Map of every recorded national ID to its client's ID"""
+        with self.database.get_connection() as conn:
+            return dict(conn.execute(_NATIONAL_IDS).fetchall())
+
+    def create(self, fields, created_by):
+        """Insert a client from a CLIENT_FIELDS dict, returning its ID"""
+        values = [fields.get(field) for field in CLIENT_FIELDS]
+        return self.execute(_INSERT, values + [created_by]).lastrowid
+
+    def insert_many(self, conn, rows, created_by):
+        """Insert CLIENT_FIELDS dicts on conn in one executemany (not committed)"""
+        values = ([fields.get(field) for field in CLIENT_FIELDS] + [created_by] for fields in rows)
+        self.execute_many(conn, _INSERT, values)
+
+    def update(self, client_id, fields):
+        """Update a client from a CLIENT_FIELDS dict"""
+        values = [fields.get(field) for field in CLIENT_FIELDS]
+        self.execute(_UPDATE, values + [client_id])
+
+    def delete(self, client_id):
+        """Delete a client, returning whether it existed"""
+        return self.execute(_DELETE, (client_id,)).rowcount > 0
+
+# Global client repository instance
+client_repository = ClientRepository()
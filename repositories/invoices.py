@@ -0,0 +1,67 @@
+"""
+Invoice data access for Law Office Management System
+"""
+from collections import namedtuple
+from repositories.base import Repository
+from config import FETCH_BATCH_SIZE
+
+# An invoice as listed
+InvoiceSummary = namedtuple('InvoiceSummary', [
+    'id', 'invoice_number', 'client_id', 'client_name', 'case_number', 'amount', 'tax_amount',
+    'total_amount', 'issue_date', 'due_date', 'status', 'payment_date'
+])
+
+_SUMMARY_SELECT = '''
+    SELECT 
+        i.id,
+        i.invoice_number,
+        i.client_id,
+        cl.name as client_name,
+        c.case_number,
+        i.amount,
+        i.tax_amount,
+        i.total_amount,
+        i.issue_date,
+        i.due_date,
+        i.status,
+        i.payment_date
+    FROM invoices i
+    LEFT JOIN clients cl ON i.client_id = cl.id
+    LEFT JOIN cases c ON i.case_id = c.id
+'''
+
+_ALL_SUMMARIES = _SUMMARY_SELECT + '''
+    ORDER BY i.issue_date DESC, i.id DESC
+'''
+
+# Statements: each client's invoices together, oldest first
+_STATEMENTS = _SUMMARY_SELECT + '''
+    ORDER BY cl.name, i.client_id, i.issue_date, i.id
+'''
+
+_CLIENT_STATEMENT = _SUMMARY_SELECT + '''
+    WHERE i.client_id = ?
+    ORDER BY i.issue_date, i.id
+'''
+
+_COUNT = "SELECT COUNT(*) FROM invoices"
+
+class InvoiceRepository(Repository):
+    """Reads invoices"""
+
+    def iter_summaries(self, batch_size=FETCH_BATCH_SIZE):
+        """Yield every invoice as listed, newest first, in batches"""
+        return self.iter_batches(_ALL_SUMMARIES, (), InvoiceSummary, batch_size)
+
+    def iter_statements(self, client_id=None, batch_size=FETCH_BATCH_SIZE):
+        """Yield invoices grouped by client (or one client's), oldest first, in batches"""
+        if client_id is None:
+            return self.iter_batches(_STATEMENTS, (), InvoiceSummary, batch_size)
+        return self.iter_batches(_CLIENT_STATEMENT, (client_id,), InvoiceSummary, batch_size)
+
+    def count(self):
+        """Number of invoices"""
+        return self.fetch_value(_COUNT, ())
+
+# Global invoice repository instance
+invoice_repository = InvoiceRepository()
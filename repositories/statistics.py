@@ -0,0 +1,114 @@
+"""
+Reporting statistics for Law Office Management System
+
+Reads only the pre-summed tables kept by report_aggregates, never the
+cases and invoices tables themselves, so every figure costs a few hundred
+rows at most.
+"""
+from collections import namedtuple
+from repositories.base import Repository
+
+# Cases per member of a dimension (a status, court, case type, lawyer or month)
+CaseStatistic = namedtuple('CaseStatistic', ['label', 'cases'])
+
+# Invoice count and totals per member of a dimension (a status, client or month)
+InvoiceStatistic = namedtuple('InvoiceStatistic', ['label', 'invoices', 'amount', 'tax_amount', 'total_amount'])
+
+CASE_STATISTICS = ('status', 'court', 'type', 'lawyer', 'month')
+INVOICE_STATISTICS = ('status', 'client', 'month')
+
+# Invoice statistics summed over all time only, for which the year is ignored
+ALL_TIME_INVOICE_STATISTICS = ('client',)
+
+# Every dimension counts each case once, so months are summed over one of them
+_CASES_BY_MEMBER = '''
+    SELECT member, SUM(cases) FROM case_aggregates
+    WHERE dimension = ? AND period BETWEEN ? AND ?
+    GROUP BY member
+    ORDER BY 2 DESC, 1
+'''
+
+_CASES_BY_LAWYER = '''
+    SELECT coalesce(u.full_name, ''), SUM(a.cases)
+    FROM case_aggregates a
+    LEFT JOIN users u ON u.id = a.member
+    WHERE a.dimension = 'lawyer' AND a.period BETWEEN ? AND ?
+    GROUP BY a.member
+    ORDER BY 2 DESC, 1
+'''
+
+_CASES_BY_MONTH = '''
+    SELECT period, SUM(cases) FROM case_aggregates
+    WHERE dimension = 'status' AND period BETWEEN ? AND ?
+    GROUP BY period
+    ORDER BY period
+'''
+
+_INVOICES_BY_MEMBER = '''
+    SELECT member, SUM(invoices), ROUND(SUM(amount), 2), ROUND(SUM(tax_amount), 2), ROUND(SUM(total_amount), 2)
+    FROM invoice_aggregates
+    WHERE dimension = ? AND period BETWEEN ? AND ?
+    GROUP BY member
+    ORDER BY 5 DESC, 1
+'''
+
+_INVOICES_BY_CLIENT = '''
+    SELECT coalesce(cl.name, ''), SUM(a.invoices), ROUND(SUM(a.amount), 2),
+           ROUND(SUM(a.tax_amount), 2), ROUND(SUM(a.total_amount), 2)
+    FROM invoice_aggregates a
+    LEFT JOIN clients cl ON cl.id = a.member
+    WHERE a.dimension = 'client'
+    GROUP BY a.member
+    ORDER BY 5 DESC, 1
+'''
+
+_INVOICES_BY_MONTH = '''
+    SELECT period, SUM(invoices), ROUND(SUM(amount), 2), ROUND(SUM(tax_amount), 2), ROUND(SUM(total_amount), 2)
+    FROM invoice_aggregates
+    WHERE dimension = 'status' AND period BETWEEN ? AND ?
+    GROUP BY period
+    ORDER BY period
+'''
+
+_YEARS = '''
+    SELECT substr(period, 1, 4) FROM case_aggregates WHERE dimension = 'status' AND period != ''
+    UNION
+    SELECT substr(period, 1, 4) FROM invoice_aggregates WHERE dimension = 'status' AND period != ''
+    ORDER BY 1 DESC
+'''
+
+def _periods(year):
+    """Period range for a year, or for all time"""
+    if year is None:
+        return ('', '9999-99')
+    return (f"{year}-01", f"{year}-12")
+
+class StatisticsRepository(Repository):
+    """Reads the reporting aggregates"""
+
+    def cases_by(self, dimension, year=None):
+        """Cases per member of a CASE_STATISTICS dimension, most first (months in order)"""
+        periods = _periods(year)
+        if dimension == 'lawyer':
+            return self.fetch_all(_CASES_BY_LAWYER, periods, CaseStatistic)
+        if dimension == 'month':
+            return self.fetch_all(_CASES_BY_MONTH, periods, CaseStatistic)
+        return self.fetch_all(_CASES_BY_MEMBER, (dimension,) + periods, CaseStatistic)
+
+    def invoices_by(self, dimension, year=None):
+        """Invoice totals per member of an INVOICE_STATISTICS dimension, largest first (months in order).
+        Client totals are all-time whatever the year."""
+        periods = _periods(year)
+        if dimension == 'client':
+            return self.fetch_all(_INVOICES_BY_CLIENT, (), InvoiceStatistic)
+        if dimension == 'month':
+            return self.fetch_all(_INVOICES_BY_MONTH, periods, InvoiceStatistic)
+        return self.fetch_all(_INVOICES_BY_MEMBER, (dimension,) + periods, InvoiceStatistic)
+
+    def years(self):
+        """Years with cases or invoices, newest first"""
+        with self.database.get_connection() as conn:
+            return [row[0] for row in conn.execute(_YEARS)]
+
+# Global statistics repository instance
+statistics_repository = StatisticsRepository()
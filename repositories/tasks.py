@@ -0,0 +1,210 @@
+"""
+Task data access for Law Office Management System
+"""
+from collections import namedtuple
+from repositories.base import Repository
+
+# A task as listed in the tasks table
+TaskSummary = namedtuple('TaskSummary', [
+    'id', 'title', 'case_number', 'client_name', 'assigned_name', 'priority', 'status', 'due_date'
+])
+
+# A task with every editable field, for the task form
+Task = namedtuple('Task', [
+    'id', 'title', 'description', 'case_id', 'case_label', 'client_id', 'client_name',
+    'assigned_to', 'assigned_name', 'priority', 'status', 'due_date', 'reminder_date'
+])
+
+# What the reminder scheduler needs of an open task
+TaskReminder = namedtuple('TaskReminder', ['id', 'title', 'due_date', 'reminder_date'])
+
+# Columns the task form writes, in statement parameter order
+TASK_FIELDS = (
+    'title', 'description', 'case_id', 'client_id', 'assigned_to',
+    'priority', 'status', 'due_date', 'reminder_date'
+)
+
+# Statuses whose tasks still need doing (and get reminders)
+OPEN_STATUSES = ('pending', 'in_progress')
+
+_SUMMARY_SELECT = '''
+    SELECT 
+        t.id,
+        t.title,
+        c.case_number,
+        cl.name as client_name,
+        u.full_name as assigned_name,
+        t.priority,
+        t.status,
+        t.due_date
+    FROM tasks t
+    LEFT JOIN cases c ON t.case_id = c.id
+    LEFT JOIN clients cl ON t.client_id = cl.id
+    LEFT JOIN users u ON t.assigned_to = u.id
+'''
+
+# The list shows one status, soonest due first, then the tasks without a
+# due date. Both parts are read in order from idx_tasks_status_due_date,
+# with keyset pagination on (due_date, id) and on id.
+_DATED_FIRST = _SUMMARY_SELECT + '''
+    WHERE t.status = ? AND t.due_date IS NOT NULL
+    ORDER BY t.due_date, t.id
+    LIMIT ?
+'''
+
+_DATED_NEXT = _SUMMARY_SELECT + '''
+    WHERE t.status = ? AND (t.due_date, t.id) > (?, ?)
+    ORDER BY t.due_date, t.id
+    LIMIT ?
+'''
+
+_DATED_PREVIOUS = _SUMMARY_SELECT + '''
+    WHERE t.status = ? AND (t.due_date, t.id) < (?, ?)
+    ORDER BY t.due_date DESC, t.id DESC
+    LIMIT ?
+'''
+
+_DATED_LAST = _SUMMARY_SELECT + '''
+    WHERE t.status = ? AND t.due_date IS NOT NULL
+    ORDER BY t.due_date DESC, t.id DESC
+    LIMIT ?
+'''
+
+_UNDATED_NEXT = _SUMMARY_SELECT + '''
+    WHERE t.status = ? AND t.due_date IS NULL AND t.id > ?
+    ORDER BY t.id
+    LIMIT ?
+'''
+
+_UNDATED_PREVIOUS = _SUMMARY_SELECT + '''
+    WHERE t.status = ? AND t.due_date IS NULL AND t.id < ?
+    ORDER BY t.id DESC
+    LIMIT ?
+'''
+
+_SUMMARY_BY_ID = _SUMMARY_SELECT + '''
+    WHERE t.id = ?
+'''
+
+_BY_ID = '''
+    SELECT 
+        t.id,
+        t.title,
+        t.description,
+        t.case_id,
+        c.case_number || ' - ' || c.title as case_label,
+        t.client_id,
+        cl.name as client_name,
+        t.assigned_to,
+        u.full_name as assigned_name,
+        t.priority,
+        t.status,
+        t.due_date,
+        t.reminder_date
+    FROM tasks t
+    LEFT JOIN cases c ON t.case_id = c.id
+    LEFT JOIN clients cl ON t.client_id = cl.id
+    LEFT JOIN users u ON t.assigned_to = u.id
+    WHERE t.id = ?
+'''
+
+# Open tasks of a user (assigned to them, or created by them and
+# unassigned) with a due date or reminder date still ahead; the load and
+# the single-task query share it so both schedule the same tasks
+_REMINDER_FILTER = f'''
+    status IN ({", ".join(f"'{status}'" for status in OPEN_STATUSES)})
+        AND (due_date >= ? OR reminder_date >= ?)
+        AND coalesce(assigned_to, created_by) = ?
+'''
+
+# Read through idx_tasks_status_due_date by status
+_REMINDERS = f'''
+    SELECT id, title, due_date, reminder_date
+    FROM tasks
+    WHERE {_REMINDER_FILTER}
+'''
+
+_REMINDER_BY_ID = f'''
+    SELECT id, title, due_date, reminder_date
+    FROM tasks
+    WHERE id = ? AND {_REMINDER_FILTER}
+'''
+
+_INSERT = f'''
+    INSERT INTO tasks ({", ".join(TASK_FIELDS)}, created_by)
+    VALUES ({", ".join("?" * (len(TASK_FIELDS) + 1))})
+'''
+
+_UPDATE = f'''
+    UPDATE tasks SET
+        {", ".join(f"{field} = ?" for field in TASK_FIELDS)}, updated_at = CURRENT_TIMESTAMP
+    WHERE id = ?
+'''
+
+_SET_STATUS = "UPDATE tasks SET status = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?"
+
+_DELETE = "DELETE FROM tasks WHERE id = ?"
+
+class TaskRepository(Repository):
+    """Reads and writes tasks"""
+
+    def page(self, status, key, limit, forward=True):
+        """One page of the tasks with a status, in display order (see DataTreeview.set_page_source)"""
+        if forward:
+            if key is None:
+                rows = self.fetch_all(_DATED_FIRST, (status, limit), TaskSummary)
+            elif key[0] is None:
+                return self.fetch_all(_UNDATED_NEXT, (status, key[1], limit), TaskSummary)
+            else:
+                rows = self.fetch_all(_DATED_NEXT, (status, *key, limit), TaskSummary)
+            if len(rows) < limit:
+                rows += self.fetch_all(_UNDATED_NEXT, (status, 0, limit - len(rows)), TaskSummary)
+            return rows
+
+        if key[0] is not None:
+            return self.fetch_all(_DATED_PREVIOUS, (status, *key, limit), TaskSummary)[::-1]
+        rows = self.fetch_all(_UNDATED_PREVIOUS, (status, key[1], limit), TaskSummary)
+        if len(rows) < limit:
+            rows += self.fetch_all(_DATED_LAST, (status, limit - len(rows)), TaskSummary)
+        return rows[::-1]
+
+    def page_key(self, task):
+        """Keyset pagination key of a listed task"""
+        return (task.due_date, task.id)
+
+    def get_summary(self, task_id):
+        """Get one task as listed, or None"""
+        return self.fetch_one(_SUMMARY_BY_ID, (task_id,), TaskSummary)
+
+    def get(self, task_id):
+        """Get a task with all its editable fields, or None"""
+        return self.fetch_one(_BY_ID, (task_id,), Task)
+
+    def reminders(self, user_id, today):
+        """A user's open tasks due, or to be reminded of, on or after today (YYYY-MM-DD)"""
+        return self.fetch_all(_REMINDERS, (today, today, user_id), TaskReminder)
+
+    def get_reminder(self, task_id, user_id, today):
+        """Get a task if reminders() would list it, or None"""
+        return self.fetch_one(_REMINDER_BY_ID, (task_id, today, today, user_id), TaskReminder)
+
+    def create(self, fields, created_by):
+        """Insert a task from a TASK_FIELDS dict, returning its ID"""
+        values = [fields.get(field) for field in TASK_FIELDS]
+        return self.execute(_INSERT, values + [created_by]).lastrowid
+
+    def update(self, task_id, fields):
+        """Update a task from a TASK_FIELDS dict"""
+        values = [fields.get(field) for field in TASK_FIELDS]
+        self.execute(_UPDATE, values + [task_id])
+
+    def set_status(self, task_id, status):
+        """Change a task's status, returning whether it exists"""
+        return self.execute(_SET_STATUS, (status, task_id)).rowcount > 0
+
+    def delete(self, task_id):
+        """Delete a task, returning whether it existed"""
+        return self.execute(_DELETE, (task_id,)).rowcount > 0
+
+# Global task repository instance
+task_repository = TaskRepository()
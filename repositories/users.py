@@ -0,0 +1,33 @@
+"""
+User data access for Law Office Management System
+
+Only what the UI modules read; logins and user administration stay in auth.
+"""
+from collections import namedtuple
+from repositories.base import Repository
+
+# A user for pick lists
+UserName = namedtuple('UserName', ['id', 'full_name'])
+
+_LAWYERS = '''
+    SELECT id, full_name FROM users
+    WHERE role IN ('lawyer', 'admin') AND is_active = 1
+    ORDER BY full_name
+'''
+
+_USERNAMES = "SELECT username, id FROM users WHERE is_active = 1"
+
+class UserRepository(Repository):
+    """Reads users"""
+
+    def lawyers(self):
+        """Active users cases can be assigned to, by name"""
+        return self.fetch_all(_LAWYERS, (), UserName)
+
+    def usernames(self):
+        """Map of every active user's username to their ID"""
+        with self.database.get_connection() as conn:
+            return dict(conn.execute(_USERNAMES).fetchall())
+
+# Global user repository instance
+user_repository = UserRepository()
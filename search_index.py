@@ -0,0 +1,292 @@
+"""
+Full-text search index for cases and clients (SQLite FTS5)
+
+Searchable text is stored normalized: Arabic letter variants are folded
+(alef/hamza forms, ta marbuta, alef maqsura), diacritics and tatweel are
+removed and Latin text is case-folded. Queries go through the same
+normalization, so "أحمد", "احمد" and "اَحْمَد" all match each other.
+
+The index is kept up to date by triggers on cases and clients. They do
+the Arabic folding in plain SQL and leave case folding to the unicode61
+tokenizer, so any connection can write those tables, including the
+sqlite3 shell and DB browsers. tokenize() splits and folds words the way
+unicode61 does, so results narrowed in memory agree with a fresh query.
+"""
+import threading
+import unicodedata
+from functools import lru_cache
+from config import SEARCH_RESULT_LIMIT
+
+# Tashkeel (harakat, tanween, shadda, sukun), Quranic marks and tatweel
+_ARABIC_MARKS = [*range(0x0610, 0x061b), *range(0x064b, 0x0660), 0x0670, *range(0x06d6, 0x06ee), 0x0640]
+
+_ARABIC_LETTERS = {
+    '\u0622': '\u0627',  # آ -> ا
+    '\u0623': '\u0627',  # أ -> ا
+    '\u0625': '\u0627',  # إ -> ا
+    '\u0671': '\u0627',  # ٱ -> ا
+    '\u0629': '\u0647',  # ة -> ه
+    '\u0649': '\u064a',  # ى -> ي
+    '\u0624': '\u0648',  # ؤ -> و
+    '\u0626': '\u064a',  # ئ -> ي
+}
+
+# Combining marks the unicode61 tokenizer drops (rather than splitting on):
+# those that make up the Latin letters it strips diacritics from
+_LATIN_DIACRITICS = set(map(chr, [*range(0x0300, 0x0305), *range(0x0306, 0x030d), 0x030f, 0x0311, 0x031b,
+                                  *range(0x0323, 0x0329), 0x032d, 0x032e, 0x0330, 0x0331]))
+
+_ARABIC_FOLDING = str.maketrans({**dict.fromkeys(map(chr, _ARABIC_MARKS)), **_ARABIC_LETTERS})
+
+def normalize_text(text):
+    """Fold Arabic letter variants, diacritics and case, e.g. for prefix matching"""
+    if text is None:
+        return None
+    return str(text).translate(_ARABIC_FOLDING).casefold()
+
+@lru_cache(maxsize=None)
+def _token_char(char):
+    """A character as the unicode61 tokenizer indexes it: '' when dropped, None for a separator.
+
+    Letters, digits and private-use characters are case-folded (simple
+    folding only, so "ß" stays), a Latin letter with a single diacritic
+    loses it and its diacritic on its own is dropped (remove_diacritics=1).
+    """
+    if char in _LATIN_DIACRITICS:
+        return ''
+    category = unicodedata.category(char)
+    if category[0] not in 'LN' and category != 'Co':
+        return None
+    decomposed = unicodedata.normalize('NFD', char)
+    if len(decomposed) == 2 and decomposed[0].isascii() and unicodedata.category(decomposed[1]) == 'Mn':
+        char = decomposed[0]
+    folded = char.casefold()
+    return folded if len(folded) == 1 else char.lower()
+
+def tokenize(text):
+    """Split text into search tokens, as the unicode61 tokenizer would index it"""
+    tokens = []
+    token = ''
+    for char in (text or '').translate(_ARABIC_FOLDING):
+        folded = _token_char(char)
+        if folded is None:
+            if token:
+                tokens.append(token)
+                token = ''
+        else:
+            token += folded
+    if token:
+        tokens.append(token)
+    return tokens
+
+def build_match_query(term):
+    """Build an FTS5 MATCH expression where every word is a prefix match.
+
+    Returns None when the term has no searchable words.
+    """
+    tokens = tokenize(term)
+    if not tokens:
+        return None
+    return ' '.join(f'"{token}"*' for token in tokens)
+
+def refines(old_tokens, new_tokens):
+    """Check if a query can only match a subset of an earlier query's rows.
+
+    True when every earlier word is a prefix of some new word, e.g.
+    "ahm" -> "ahmed" or "ahmed" -> "ahmed ali".
+    """
+    return all(any(new.startswith(old) for new in new_tokens) for old in old_tokens)
+
+def matches(tokens, document_tokens):
+    """Check if every query word is a prefix of some document word"""
+    return all(any(word.startswith(token) for word in document_tokens) for token in tokens)
+
+class IncrementalSearch:
+    """Full-text search that narrows the previous result set locally.
+
+    fetch(match_query) runs the FTS query and document(row) returns the
+    row's searchable values. When a new term only narrows the previous one
+    and the previous result was not cut off at the limit, the previous rows
+    are filtered in memory instead of querying again. Thread-safe, so it
+    can be called from background workers.
+    """
+
+    def __init__(self, fetch, document, limit=SEARCH_RESULT_LIMIT):
+        self.fetch = fetch
+        self.document = document
+        self.limit = limit
+        self.stats = {'queries': 0, 'refined': 0}
+        self._last = None  # (tokens, [(row, document tokens)])
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def search(self, term):
+        """Return the rows matching term, best matches first"""
+        tokens = tokenize(term)
+        if not tokens:
+            return []
+
+        with self._lock:
+            last = self._last
+            generation = self._generation
+
+        if last and len(last[1]) < self.limit and refines(last[0], tokens):
+            entries = [entry for entry in last[1] if matches(tokens, entry[1])]
+            refined = True
+        else:
+            rows = self.fetch(build_match_query(term))
+            entries = [(row, self._document_tokens(row)) for row in rows]
+            refined = False
+
+        with self._lock:
+            self.stats['refined' if refined else 'queries'] += 1
+            # Results fetched before a reset() may already be out of date
+            if generation == self._generation:
+                self._last = (tokens, entries)
+
+        return [row for row, document_tokens in entries]
+
+    def reset(self):
+        """Forget the previous result set, e.g. after the data changed"""
+        with self._lock:
+            self._last = None
+            self._generation += 1
+
+    def _document_tokens(self, row):
+        """Tokenize a row's searchable values"""
+        return set(tokenize(' '.join(str(value) for value in self.document(row) if value)))
+
+# Documents as indexed, before folding: (view, FTS table, columns, source).
+# Case documents carry their client's columns, denormalized from clients.
+_DOCUMENTS = [
+    ('cases_search', 'cases_fts',
+     ('case_number', 'title', 'client_name', 'national_id', 'phone', 'email', 'description'), '''(
+        SELECT c.id, c.case_number, c.title, cl.name AS client_name, cl.national_id, cl.phone, cl.email, c.description
+        FROM cases c
+        LEFT JOIN clients cl ON c.client_id = cl.id
+    )'''),
+    ('clients_search', 'clients_fts',
+     ('name', 'national_id', 'phone', 'email'),
+     '(SELECT id, name, national_id, phone, email FROM clients)'),
+]
+
+# normalize_text's Arabic folding as SQL replace() calls: (code point, replacement or None)
+_SQL_FOLDING = [(code, None) for code in _ARABIC_MARKS] + \
+               [(ord(letter), ord(folded)) for letter, folded in _ARABIC_LETTERS.items()]
+
+# SQLite's parser overflows at about 30 nested calls, so the folding is
+# split over a chain of views of at most this many replace() calls each
+_SQL_FOLDING_STAGE = 20
+
+_TRIGGERS = ('cases_fts_insert', 'cases_fts_update', 'cases_fts_delete',
+             'clients_fts_insert', 'clients_fts_update', 'clients_fts_delete')
+
+def _sql_fold(expression, folding):
+    """Wrap an SQL expression in replace() calls applying folding"""
+    for code, replacement in folding:
+        replacement = f"char({replacement})" if replacement else "''"
+        expression = f"replace({expression}, char({code}), {replacement})"
+    return expression
+
+def _document_views(view):
+    """Names of the chain of views that ends in view"""
+    stages = range(1, -(-len(_SQL_FOLDING) // _SQL_FOLDING_STAGE))
+    return [f"{view}_{stage}" for stage in stages] + [view]
+
+def _insert_documents(view, table, columns):
+    """SQL indexing the documents of view, to be completed with a WHERE clause"""
+    return f"INSERT INTO {table} (rowid, {', '.join(columns)}) SELECT id, {', '.join(columns)} FROM {view}"
+
+def create_search_index(conn):
+    """Create the FTS5 tables and sync triggers, then index existing rows"""
+    conn.execute('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS cases_fts USING fts5(
+            case_number, title, client_name, national_id, phone, email, description,
+            tokenize = 'unicode61'
+        )
+    ''')
+    conn.execute('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS clients_fts USING fts5(
+            name, national_id, phone, email,
+            tokenize = 'unicode61'
+        )
+    ''')
+
+    # bm25 column weights: identifiers and names outrank free text
+    conn.execute("INSERT INTO cases_fts (cases_fts, rank) VALUES ('rank', 'bm25(10.0, 5.0, 5.0, 8.0, 3.0, 3.0, 1.0)')")
+    conn.execute("INSERT INTO clients_fts (clients_fts, rank) VALUES ('rank', 'bm25(5.0, 8.0, 3.0, 3.0)')")
+
+    create_search_triggers(conn)
+
+    # Index what is already there
+    rebuild_search_index(conn)
+
+def create_search_triggers(conn):
+    """(Re)create the folded document views and the triggers that keep the FTS tables in sync.
+
+    Plain SQL only, so the triggers work on any connection.
+    """
+    for name in _TRIGGERS:
+        conn.execute(f"DROP TRIGGER IF EXISTS {name}")
+
+    for view, table, columns, source in _DOCUMENTS:
+        for stage, name in enumerate(_document_views(view)):
+            folding = _SQL_FOLDING[stage * _SQL_FOLDING_STAGE:(stage + 1) * _SQL_FOLDING_STAGE]
+            values = ', '.join(f"{_sql_fold(column, folding)} AS {column}" for column in columns)
+            conn.execute(f"DROP VIEW IF EXISTS {name}")
+            conn.execute(f"CREATE VIEW {name} AS SELECT id, {values} FROM {source}")
+            source = name
+
+    insert_cases = _insert_documents(*_DOCUMENTS[0][:3])
+    insert_clients = _insert_documents(*_DOCUMENTS[1][:3])
+
+    # Cases
+    conn.execute(f'''
+        CREATE TRIGGER cases_fts_insert AFTER INSERT ON cases BEGIN
+            {insert_cases} WHERE id = new.id;
+        END
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER cases_fts_update
+        AFTER UPDATE OF case_number, title, client_id, description ON cases BEGIN
+            DELETE FROM cases_fts WHERE rowid = old.id;
+            {insert_cases} WHERE id = new.id;
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER cases_fts_delete AFTER DELETE ON cases BEGIN
+            DELETE FROM cases_fts WHERE rowid = old.id;
+        END
+    ''')
+
+    # Clients, including the client columns copied into their cases
+    conn.execute(f'''
+        CREATE TRIGGER clients_fts_insert AFTER INSERT ON clients BEGIN
+            {insert_clients} WHERE id = new.id;
+        END
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER clients_fts_update
+        AFTER UPDATE OF name, national_id, phone, email ON clients BEGIN
+            DELETE FROM clients_fts WHERE rowid = old.id;
+            {insert_clients} WHERE id = new.id;
+            DELETE FROM cases_fts WHERE rowid IN (SELECT id FROM cases WHERE client_id = new.id);
+            {insert_cases} WHERE id IN (SELECT id FROM cases WHERE client_id = new.id);
+        END
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER clients_fts_delete AFTER DELETE ON clients BEGIN
+            DELETE FROM clients_fts WHERE rowid = old.id;
+            DELETE FROM cases_fts WHERE rowid IN (SELECT id FROM cases WHERE client_id = old.id);
+            {insert_cases} WHERE id IN (SELECT id FROM cases WHERE client_id = old.id);
+        END
+    ''')
+
+def rebuild_search_index(conn):
+    """Re-index every case and client from scratch"""
+    conn.execute("DELETE FROM cases_fts")
+    conn.execute("DELETE FROM clients_fts")
+    for view, table, columns, source in _DOCUMENTS:
+        conn.execute(_insert_documents(view, table, columns))
+    conn.execute("INSERT INTO cases_fts (cases_fts) VALUES ('optimize')")
+    conn.execute("INSERT INTO clients_fts (clients_fts) VALUES ('optimize')")
@@ -0,0 +1,53 @@
+"""
+Login sessions for Law Office Management System
+
+A session token lets the application reopen the main window for the user
+who is already logged in (after a restore, for example) without asking for
+the password and running bcrypt again. Tokens are signed with a key that
+only exists in this process, so they are useless once the application exits.
+"""
+import hmac
+import hashlib
+import secrets
+import time
+from config import SESSION_TTL
+
+class SessionManager:
+    """Issues and verifies signed, expiring session tokens"""
+
+    def __init__(self, ttl=SESSION_TTL):
+        self.ttl = ttl
+        self._key = secrets.token_bytes(32)
+        self._revoked = set()
+
+    def issue(self, user_id):
+        """Create a token for a user that expires after ttl seconds"""
+        expires = int(time.time() + self.ttl)
+        payload = f"{user_id}:{expires}:{secrets.token_hex(8)}"
+        return f"{payload}:{self._sign(payload)}"
+
+    def verify(self, token):
+        """Get the user ID a token was issued for, or None if it is not valid"""
+        try:
+            payload, signature = token.rsplit(':', 1)
+            user_id, expires, _ = payload.split(':')
+            user_id, expires = int(user_id), int(expires)
+        except (AttributeError, ValueError):
+            return None
+
+        if not hmac.compare_digest(signature, self._sign(payload)):
+            return None
+        if expires < time.time() or token in self._revoked:
+            return None
+        return user_id
+
+    def revoke(self, token):
+        """Make a token invalid before it expires (on logout)"""
+        if token:
+            self._revoked.add(token)
+
+    def _sign(self, payload):
+        return hmac.new(self._key, payload.encode('utf-8'), hashlib.sha256).hexdigest()
+
+# Global session manager
+sessions = SessionManager()
@@ -0,0 +1,114 @@
+"""
+Startup profiling for Law Office Management System
+
+Run ``python main.py --profile-startup`` to print how long each startup
+phase took and which module imports were slowest, in the spirit of
+``python -X importtime``.
+"""
+import importlib.abc
+import sys
+import time
+from contextlib import contextmanager
+
+class _TimedLoader(importlib.abc.Loader):
+    """Wrap a module loader to time executing the module"""
+
+    def __init__(self, loader, profiler):
+        self._loader = loader
+        self._profiler = profiler
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        # Time spent in nested imports is pushed onto the stack by the
+        # inner loaders, so self time can be separated from cumulative
+        stack = self._profiler._import_stack
+        stack.append(0.0)
+        start = time.perf_counter()
+        try:
+            self._loader.exec_module(module)
+        finally:
+            elapsed = time.perf_counter() - start
+            nested = stack.pop()
+            if stack:
+                stack[-1] += elapsed
+            self._profiler.imports.append((module.__name__, elapsed - nested, elapsed))
+
+    def __getattr__(self, name):
+        return getattr(self._loader, name)
+
+class _ImportTimer(importlib.abc.MetaPathFinder):
+    """Meta path finder that hands out timed loaders"""
+
+    def __init__(self, profiler):
+        self._profiler = profiler
+
+    def find_spec(self, fullname, path, target=None):
+        # Let the regular finders locate the module, skipping this one
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, 'find_spec'):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is not None:
+                if spec.loader is not None and hasattr(spec.loader, 'exec_module'):
+                    spec.loader = _TimedLoader(spec.loader, self._profiler)
+                return spec
+        return None
+
+class StartupProfiler:
+    """Collects startup phase and import timings when enabled"""
+
+    def __init__(self):
+        self.enabled = False
+        self.start = time.perf_counter()
+        self.phases = []   # (name, seconds)
+        self.marks = []    # (name, seconds since start)
+        self.imports = []  # (module, self seconds, cumulative seconds)
+        self._import_stack = []
+        self._import_timer = None
+
+    def enable(self):
+        """Start recording, including module imports"""
+        self.enabled = True
+        self._import_timer = _ImportTimer(self)
+        sys.meta_path.insert(0, self._import_timer)
+
+    @contextmanager
+    def phase(self, name):
+        """Time a block of startup work"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            if self.enabled:
+                self.phases.append((name, time.perf_counter() - start))
+
+    def mark(self, name):
+        """Record that a startup milestone was reached"""
+        if self.enabled:
+            self.marks.append((name, time.perf_counter() - self.start))
+
+    def report(self, top=15):
+        """Print the collected timings and stop recording imports"""
+        if not self.enabled:
+            return
+
+        if self._import_timer in sys.meta_path:
+            sys.meta_path.remove(self._import_timer)
+
+        print("Startup phases:")
+        for name, seconds in self.phases:
+            print(f"  {name:<30} {seconds * 1000:>9.1f} ms")
+
+        print("Milestones (since startup):")
+        for name, seconds in self.marks:
+            print(f"  {name:<30} {seconds * 1000:>9.1f} ms")
+
+        print(f"Slowest imports (top {top}):")
+        print(f"  {'module':<30} {'self ms':>9} {'cumulative':>11}")
+        for module, own, cumulative in sorted(self.imports, key=lambda item: -item[2])[:top]:
+            print(f"  {module:<30} {own * 1000:>9.1f} {cumulative * 1000:>11.1f}")
+
+# Global startup profiler
+profiler = StartupProfiler()
@@ -2,13 +2,29 @@
 Task Management Module for Law Office Management System
 """
 import tkinter as tk
+from tkinter import ttk
 from gui_components import *
+from auth import auth
 from i18n import i18n
+from background import get_runner
+from activity_log import activity_log
+from change_bus import change_bus
+from repositories import task_repository
+from lookups import case_lookup, client_lookup, lawyer_lookup
+from datetime import datetime
+
+TASK_STATUSES = ['pending', 'in_progress', 'completed', 'cancelled']
+TASK_PRIORITIES = ['low', 'medium', 'high', 'urgent']
 
 class TaskManagement:
+    # Kept current from the change bus (see ViewCache.sync)
+    live_tables = ('tasks',)
+    
     def __init__(self, parent):
         self.parent = parent
+        self.current_task = None
         self.create_interface()
+        self.load_tasks()
     
     def create_interface(self):
         """Create the task management interface"""
@@ -17,21 +33,504 @@ class TaskManagement:
         main_frame.pack(fill="both", expand=True, padx=20, pady=20)
         
         # Header
-        StyledLabel(main_frame, text=i18n.get('task_management'), style="title").pack(
-            anchor="e" if i18n.is_rtl() else "w", pady=(0, 20)
+        header_frame = tk.Frame(main_frame, bg="white")
+        header_frame.pack(fill="x", pady=(0, 20))
+        
+        StyledLabel(header_frame, text=i18n.get('task_management'), style="title").pack(
+            side="right" if i18n.is_rtl() else "left"
+        )
+        
+        # Buttons frame
+        buttons_frame = tk.Frame(header_frame, bg="white")
+        buttons_frame.pack(side="left" if i18n.is_rtl() else "right")
+        
+        StyledButton(
+            buttons_frame,
+            text=i18n.get('add_task'),
+            command=self.add_task,
+            style="success"
+        ).pack(side="right" if i18n.is_rtl() else "left", padx=5)
+        
+        StyledButton(
+            buttons_frame,
+            text=i18n.get('edit'),
+            command=self.edit_task,
+            style="primary"
+        ).pack(side="right" if i18n.is_rtl() else "left", padx=5)
+        
+        StyledButton(
+            buttons_frame,
+            text=i18n.get('mark_completed', 'Mark Completed'),
+            command=self.complete_task,
+            style="success"
+        ).pack(side="right" if i18n.is_rtl() else "left", padx=5)
+        
+        StyledButton(
+            buttons_frame,
+            text=i18n.get('delete'),
+            command=self.delete_task,
+            style="danger"
+        ).pack(side="right" if i18n.is_rtl() else "left", padx=5)
+        
+        StyledButton(
+            buttons_frame,
+            text=i18n.get('refresh'),
+            command=self.load_tasks,
+            style="secondary"
+        ).pack(side="right" if i18n.is_rtl() else "left", padx=5)
+        
+        # Status filter
+        filter_frame = tk.Frame(main_frame, bg="white")
+        filter_frame.pack(fill="x", pady=(0, 10))
+        
+        StyledLabel(filter_frame, text=i18n.get('task_status')).pack(side="right" if i18n.is_rtl() else "left", padx=5)
+        self.status_filter = StyledCombobox(
+            filter_frame, values=[i18n.get(status) for status in TASK_STATUSES], state="readonly", width=20
+        )
+        self.status_filter.current(0)
+        self.status_filter.pack(side="right" if i18n.is_rtl() else "left", padx=5)
+        self.status_filter.bind('<<ComboboxSelected>>', lambda e: self.load_tasks())
+        
+        # Tasks list
+        list_frame = tk.Frame(main_frame, bg="white")
+        list_frame.pack(fill="both", expand=True)
+        
+        # Create treeview for tasks
+        columns = (
+            i18n.get('task_title'),
+            i18n.get('case_number'),
+            i18n.get('client_name'),
+            i18n.get('assigned_to'),
+            i18n.get('priority'),
+            i18n.get('task_status'),
+            i18n.get('due_date')
+        )
+        
+        self.tasks_tree = DataTreeview(list_frame, columns=columns, show='headings')
+        
+        # Configure columns
+        for col in columns:
+            self.tasks_tree.heading(col, text=RTLWidget.format_text(col))
+            self.tasks_tree.column(col, width=120, anchor="center")
+        
+        # Add scrollbars
+        v_scrollbar = ttk.Scrollbar(list_frame, orient="vertical", command=self.tasks_tree.yview)
+        h_scrollbar = ttk.Scrollbar(list_frame, orient="horizontal", command=self.tasks_tree.xview)
+        
+        self.tasks_tree.configure(yscrollcommand=v_scrollbar.set, xscrollcommand=h_scrollbar.set)
+        
+        # Pack treeview and scrollbars
+        self.tasks_tree.grid(row=0, column=0, sticky="nsew")
+        v_scrollbar.grid(row=0, column=1, sticky="ns")
+        h_scrollbar.grid(row=1, column=0, sticky="ew")
+        
+        # Configure grid weights
+        list_frame.grid_rowconfigure(0, weight=1)
+        list_frame.grid_columnconfigure(0, weight=1)
+        
+        # Bind double-click to edit
+        self.tasks_tree.bind('<Double-1>', lambda e: self.edit_task())
+        
+        # Bind selection
+        self.tasks_tree.bind('<<TreeviewSelect>>', self.on_task_select)
+        
+        # Saved and deleted tasks are applied row by row
+        change_bus.subscribe('tasks', self.on_tasks_changed, owner=main_frame)
+    
+    def selected_status(self):
+        """Status whose tasks are listed"""
+        return TASK_STATUSES[self.status_filter.current()]
+    
+    def load_tasks(self):
+        """Load the tasks with the selected status, soonest due first, a page at a time"""
+        status = self.selected_status()
+        self.current_task = None
+        self.tasks_tree.set_page_source(
+            lambda key, limit, forward: task_repository.page(status, key, limit, forward),
+            task_repository.page_key,
+            self.format_task_row,
+            on_error=lambda e: show_error(f"Error loading tasks: {str(e)}"),
+            row_id=lambda task: task.id
+        )
+    
+    def refresh(self):
+        """Reload after the data changed elsewhere"""
+        self.load_tasks()
+    
+    def on_tasks_changed(self, table, action, task_id):
+        """Apply a change to one task without reloading the list"""
+        if action == 'delete':
+            self.tasks_tree.remove_row(task_id)
+            return
+        
+        get_runner(self.tasks_tree).submit(
+            task_repository.get_summary, task_id,
+            on_success=lambda task: self.show_changed_task(action, task),
+            on_error=lambda e: print(f"Error loading task {task_id}: {e}")
+        )
+    
+    def show_changed_task(self, action, task):
+        """Redraw a saved task, drop it if it left the listed status, or reload for a new one"""
+        if task is None:
+            return
+        
+        if task.status != self.selected_status():
+            self.tasks_tree.remove_row(task.id)
+            return
+        
+        # A due date change moves the task, so only a row that stays put is redrawn
+        shown = self.tasks_tree.get_row(task.id)
+        if shown is not None and shown.due_date == task.due_date:
+            self.tasks_tree.update_row(task)
+            return
+        
+        # New tasks belong somewhere in due-date order
+        self.load_tasks()
+    
+    def format_task_row(self, task):
+        """Format a task row for display"""
+        task_data = [
+            task.title or '',
+            task.case_number or '',
+            task.client_name or '',
+            task.assigned_name or '',
+            i18n.get(task.priority, task.priority) if task.priority else '',
+            i18n.get(task.status, task.status) if task.status else '',
+            self.format_date(task.due_date) if task.due_date else ''
+        ]
+        
+        # RTL formatting
+        return [RTLWidget.format_text(str(val)) for val in task_data]
+    
+    def on_task_select(self, event):
+        """Handle task selection"""
+        # Tree items are keyed by task ID
+        self.current_task = self.tasks_tree.selected_id()
+    
+    def add_task(self):
+        """Add new task"""
+        TaskDialog(self.parent)
+    
+    def edit_task(self):
+        """Edit selected task"""
+        if not self.current_task:
+            show_warning(i18n.get('select_task_first', 'Please select a task first'))
+            return
+        
+        TaskDialog(self.parent, task_id=self.current_task)
+    
+    def complete_task(self):
+        """Mark the selected task completed"""
+        if not self.current_task:
+            show_warning(i18n.get('select_task_first', 'Please select a task first'))
+            return
+        
+        task_id = self.current_task
+        task = self.tasks_tree.get_row(task_id)
+        user_id = auth.get_current_user()['id']
+        
+        def complete():
+            if not task_repository.set_status(task_id, 'completed'):
+                return False
+            activity_log.log('task', 'update', task_id, task.title if task else None, user_id)
+            return True
+        
+        get_runner(self.tasks_tree).submit(
+            complete,
+            on_success=lambda completed: self.show_task_change(task_id, 'update', completed),
+            on_error=lambda e: show_error(f"Error updating task: {str(e)}")
+        )
+    
+    def delete_task(self):
+        """Delete selected task"""
+        if not self.current_task:
+            show_warning(i18n.get('select_task_first', 'Please select a task first'))
+            return
+        
+        if not confirm_action(i18n.get('confirm_delete_task', 'Are you sure you want to delete this task?')):
+            return
+        
+        task_id = self.current_task
+        task = self.tasks_tree.get_row(task_id)
+        user_id = auth.get_current_user()['id']
+        
+        def delete():
+            if not task_repository.delete(task_id):
+                return False
+            activity_log.log('task', 'delete', task_id, task.title if task else None, user_id)
+            return True
+        
+        get_runner(self.tasks_tree).submit(
+            delete,
+            on_success=lambda deleted: self.show_task_change(task_id, 'delete', deleted),
+            on_error=lambda e: show_error(f"Error deleting task: {str(e)}")
+        )
+    
+    def show_task_change(self, task_id, action, done):
+        """Announce a completed or deleted task, or report that it is gone"""
+        if not done:
+            show_warning(i18n.get('task_not_found', 'Task not found'))
+            return
+        
+        change_bus.publish('tasks', action, task_id)
+        if action == 'delete':
+            show_success(i18n.get('task_deleted', 'Task deleted successfully'))
+    
+    def format_date(self, date_str):
+        """Format date for display"""
+        if not date_str:
+            return ""
+        
+        try:
+            parsed_date = datetime.strptime(date_str, "%Y-%m-%d").date()
+            return parsed_date.strftime("%d/%m/%Y")
+        except:
+            return str(date_str)
+
+class TaskDialog:
+    def __init__(self, parent, task_id=None):
+        self.parent = parent
+        self.task_id = task_id
+        
+        # Create dialog window
+        self.dialog = tk.Toplevel(parent)
+        self.dialog.title(RTLWidget.format_text(i18n.get('edit_task') if task_id else i18n.get('add_task')))
+        self.dialog.geometry("600x700")
+        self.dialog.transient(parent)
+        self.dialog.grab_set()
+        
+        # Center dialog
+        self.dialog.update_idletasks()
+        x = (self.dialog.winfo_screenwidth() // 2) - (300)
+        y = (self.dialog.winfo_screenheight() // 2) - (350)
+        self.dialog.geometry(f"600x700+{x}+{y}")
+        
+        self.create_form()
+        self.load_data()
+        
+        if task_id:
+            self.load_task_data()
+    
+    def create_form(self):
+        """Create task form"""
+        # Main frame with scrollbar
+        canvas = tk.Canvas(self.dialog, bg="white")
+        scrollbar = ttk.Scrollbar(self.dialog, orient="vertical", command=canvas.yview)
+        scrollable_frame = tk.Frame(canvas, bg="white")
+        
+        scrollable_frame.bind(
+            "<Configure>",
+            lambda e: canvas.configure(scrollregion=canvas.bbox("all"))
         )
         
-        # Placeholder content
-        placeholder_frame = tk.Frame(main_frame, bg="white", relief="solid", bd=1)
-        placeholder_frame.pack(fill="both", expand=True, padx=50, pady=50)
+        canvas.create_window((0, 0), window=scrollable_frame, anchor="nw")
+        canvas.configure(yscrollcommand=scrollbar.set)
         
-        StyledLabel(
-            placeholder_frame, 
-            text=i18n.get('coming_soon', 'Task Management - Coming Soon'),
-            style="header"
-        ).pack(expand=True)
+        # Pack canvas and scrollbar
+        canvas.pack(side="left", fill="both", expand=True)
+        scrollbar.pack(side="right", fill="y")
         
-        StyledLabel(
-            placeholder_frame,
-            text=i18n.get('task_management_desc', 'This module will include task creation, assignment, deadlines, and reminders.')
-        ).pack(expand=True, pady=10)
\ No newline at end of file
+        # Form content
+        form_frame = tk.Frame(scrollable_frame, bg="white")
+        form_frame.pack(fill="both", expand=True, padx=20, pady=20)
+        
+        # Task Title
+        StyledLabel(form_frame, text=i18n.get('task_title')).pack(anchor="e" if i18n.is_rtl() else "w")
+        self.title_var = tk.StringVar()
+        StyledEntry(form_frame, textvariable=self.title_var).pack(fill="x", pady=(5, 15))
+        
+        # Case
+        StyledLabel(form_frame, text=i18n.get('case_number')).pack(anchor="e" if i18n.is_rtl() else "w")
+        self.case_var = tk.StringVar()
+        self.case_combo = AutocompleteCombobox(form_frame, textvariable=self.case_var)
+        self.case_combo.pack(fill="x", pady=(5, 15))
+        
+        # Client
+        StyledLabel(form_frame, text=i18n.get('client_name')).pack(anchor="e" if i18n.is_rtl() else "w")
+        self.client_var = tk.StringVar()
+        self.client_combo = AutocompleteCombobox(form_frame, textvariable=self.client_var)
+        self.client_combo.pack(fill="x", pady=(5, 15))
+        
+        # Assigned To
+        StyledLabel(form_frame, text=i18n.get('assigned_to')).pack(anchor="e" if i18n.is_rtl() else "w")
+        self.assigned_var = tk.StringVar()
+        self.assigned_combo = AutocompleteCombobox(form_frame, textvariable=self.assigned_var)
+        self.assigned_combo.pack(fill="x", pady=(5, 15))
+        
+        # Priority
+        StyledLabel(form_frame, text=i18n.get('priority')).pack(anchor="e" if i18n.is_rtl() else "w")
+        self.priority_combo = StyledCombobox(
+            form_frame, values=[i18n.get(priority) for priority in TASK_PRIORITIES], state="readonly"
+        )
+        self.priority_combo.current(TASK_PRIORITIES.index('medium'))
+        self.priority_combo.pack(fill="x", pady=(5, 15))
+        
+        # Status
+        StyledLabel(form_frame, text=i18n.get('task_status')).pack(anchor="e" if i18n.is_rtl() else "w")
+        self.status_combo = StyledCombobox(
+            form_frame, values=[i18n.get(status) for status in TASK_STATUSES], state="readonly"
+        )
+        self.status_combo.current(0)
+        self.status_combo.pack(fill="x", pady=(5, 15))
+        
+        # Due Date
+        StyledLabel(form_frame, text=i18n.get('due_date')).pack(anchor="e" if i18n.is_rtl() else "w")
+        self.due_date_picker = DatePicker(form_frame)
+        self.due_date_picker.pack(fill="x", pady=(5, 15))
+        
+        # Reminder Date
+        StyledLabel(form_frame, text=i18n.get('reminder_date')).pack(anchor="e" if i18n.is_rtl() else "w")
+        self.reminder_date_picker = DatePicker(form_frame)
+        self.reminder_date_picker.pack(fill="x", pady=(5, 15))
+        
+        # Description
+        StyledLabel(form_frame, text=i18n.get('task_description')).pack(anchor="e" if i18n.is_rtl() else "w")
+        self.description_text = StyledText(form_frame, height=5)
+        self.description_text.pack(fill="x", pady=(5, 15))
+        
+        # Buttons
+        buttons_frame = tk.Frame(form_frame, bg="white")
+        buttons_frame.pack(fill="x", pady=20)
+        
+        self.save_button = StyledButton(
+            buttons_frame,
+            text=i18n.get('save'),
+            command=self.save_task,
+            style="success"
+        )
+        self.save_button.pack(side="right" if i18n.is_rtl() else "left", padx=5)
+        
+        StyledButton(
+            buttons_frame,
+            text=i18n.get('cancel'),
+            command=self.dialog.destroy,
+            style="secondary"
+        ).pack(side="right" if i18n.is_rtl() else "left", padx=5)
+    
+    def load_data(self):
+        """Load the case, client and lawyer pick lists (cached until their tables change)"""
+        get_runner(self.dialog).submit(
+            lambda: (case_lookup.get(), client_lookup.get(), lawyer_lookup.get()),
+            on_success=self.show_lookups,
+            on_error=lambda e: show_error(f"Error loading data: {str(e)}")
+        )
+    
+    def show_lookups(self, indexes):
+        """Fill the case, client and lawyer pickers"""
+        if not self.dialog.winfo_exists():
+            return
+        
+        case_index, client_index, lawyer_index = indexes
+        self.case_combo.set_index(case_index)
+        self.client_combo.set_index(client_index)
+        self.assigned_combo.set_index(lawyer_index)
+    
+    def load_task_data(self):
+        """Load existing task data for editing"""
+        get_runner(self.dialog).submit(
+            task_repository.get, self.task_id,
+            on_success=self.show_task_data,
+            on_error=lambda e: show_error(f"Error loading task data: {str(e)}")
+        )
+    
+    def show_task_data(self, task):
+        """Fill the form with a loaded task"""
+        if not self.dialog.winfo_exists():
+            return
+        
+        try:
+            if task:
+                self.title_var.set(task.title or '')
+                
+                if task.case_id:
+                    self.case_combo.select(task.case_id, task.case_label)
+                if task.client_id:
+                    self.client_combo.select(task.client_id, task.client_name)
+                if task.assigned_to:
+                    self.assigned_combo.select(task.assigned_to, task.assigned_name)
+                
+                if task.priority in TASK_PRIORITIES:
+                    self.priority_combo.current(TASK_PRIORITIES.index(task.priority))
+                if task.status in TASK_STATUSES:
+                    self.status_combo.current(TASK_STATUSES.index(task.status))
+                
+                # Set dates
+                for value, picker in ((task.due_date, self.due_date_picker),
+                                      (task.reminder_date, self.reminder_date_picker)):
+                    if value:
+                        try:
+                            picker.set_date(datetime.strptime(value, "%Y-%m-%d").date())
+                        except:
+                            pass
+                
+                # Set description
+                if task.description:
+                    self.description_text.insert("1.0", task.description)
+        
+        except Exception as e:
+            show_error(f"Error loading task data: {str(e)}")
+    
+    def save_task(self):
+        """Save task data"""
+        try:
+            # Validate required fields
+            if not self.title_var.get().strip():
+                show_error(i18n.get('task_title_required', 'Task title is required'))
+                return
+            
+            # Get dates
+            due_date = self.due_date_picker.get_date()
+            reminder_date = self.reminder_date_picker.get_date()
+            
+            # Get description
+            description = self.description_text.get("1.0", "end-1c").strip()
+            
+            fields = {
+                'title': self.title_var.get().strip(),
+                'description': description if description else None,
+                'case_id': self.case_combo.get_id(),
+                'client_id': self.client_combo.get_id(),
+                'assigned_to': self.assigned_combo.get_id(),
+                'priority': TASK_PRIORITIES[self.priority_combo.current()],
+                'status': TASK_STATUSES[self.status_combo.current()],
+                'due_date': due_date.strftime("%Y-%m-%d") if due_date else None,
+                'reminder_date': reminder_date.strftime("%Y-%m-%d") if reminder_date else None
+            }
+            
+            task_id = self.task_id
+            user_id = auth.get_current_user()['id']
+            
+            def save():
+                if task_id:
+                    task_repository.update(task_id, fields)
+                    saved_id, action = task_id, 'update'
+                else:
+                    saved_id = task_repository.create(fields, user_id)
+                    action = 'create'
+                activity_log.log('task', action, saved_id, fields['title'], user_id)
+                return saved_id, action
+            
+            # One save at a time
+            self.save_button.config(state="disabled")
+            get_runner(self.dialog).submit(save, on_success=self.show_saved_task, on_error=self.show_save_error)
+        
+        except Exception as e:
+            show_error(f"Error saving task: {str(e)}")
+    
+    def show_saved_task(self, saved):
+        """Announce a saved task and close the dialog"""
+        task_id, action = saved
+        change_bus.publish('tasks', action, task_id)
+        if action == 'update':
+            show_success(i18n.get('task_updated', 'Task updated successfully'))
+        else:
+            show_success(i18n.get('task_added', 'Task added successfully'))
+        
+        if self.dialog.winfo_exists():
+            self.dialog.destroy()
+    
+    def show_save_error(self, error):
+        """Report a failed save and allow another try"""
+        if self.dialog.winfo_exists():
+            self.save_button.config(state="normal")
+        show_error(f"Error saving task: {str(error)}")
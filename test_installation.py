@@ -63,6 +63,77 @@ def test_arabic_rendering():
         print(f"❌ Arabic rendering failed: {e}")
         return False
 
+def test_database_indexes():
+    """Test that the schema migrations create indexes the planner uses"""
+    try:
+        import sqlite3
+        from migrations import migrate, verify_index_usage, get_schema_version, SCHEMA_VERSION
+        
+        conn = sqlite3.connect(":memory:")
+        migrate(conn)
+        
+        if get_schema_version(conn) != SCHEMA_VERSION:
+            print(f"❌ Schema version {get_schema_version(conn)}, expected {SCHEMA_VERSION}")
+            return False
+        
+        failures = verify_index_usage(conn)
+        conn.close()
+        
+        if failures:
+            for description, plan in failures:
+                print(f"❌ {description} does not use its index: {'; '.join(plan)}")
+            return False
+        
+        print("✅ Database indexes are used by the query planner")
+        return True
+    except Exception as e:
+        print(f"❌ Database index test failed: {e}")
+        return False
+
+def test_nested_transactions():
+    """Test that a nested connection block does not end the outer transaction"""
+    try:
+        import os
+        import sqlite3
+        import tempfile
+        from types import SimpleNamespace
+        from connection_pool import ConnectionPool
+        from repositories import Repository
+        
+        directory = tempfile.mkdtemp()
+        path = os.path.join(directory, "pool.db")
+        pool = ConnectionPool(lambda: sqlite3.connect(path))
+        with pool.connection() as conn:
+            conn.execute("CREATE TABLE clients (name TEXT)")
+        
+        try:
+            with pool.connection() as conn:
+                conn.execute("INSERT INTO clients (name) VALUES ('outer')")
+                with pool.connection() as inner:
+                    inner.execute("SELECT COUNT(*) FROM clients").fetchone()
+                # Repository writes join the caller's transaction too
+                repository = Repository(SimpleNamespace(get_connection=pool.connection))
+                repository.execute("INSERT INTO clients (name) VALUES (?)", ('nested',))
+                raise RuntimeError("outer block failed")
+        except RuntimeError:
+            pass
+        
+        with pool.connection() as conn:
+            rows = conn.execute("SELECT COUNT(*) FROM clients").fetchone()[0]
+        pool.close_all()
+        os.remove(path)
+        os.rmdir(directory)
+        
+        if rows != 0:
+            print(f"❌ Outer rollback kept {rows} row(s) after a nested block")
+            return False
+        
+        print("✅ Nested connection blocks share the outer transaction")
+        return True
+    except Exception as e:
+        print(f"❌ Nested transaction test failed: {e}")
+        return False
+
 def test_gui():
     """Test basic GUI functionality"""
     try:
@@ -87,6 +158,48 @@ def test_gui():
         print(f"❌ GUI test failed: {e}")
         return False
 
+def test_tree_duplicate_rows():
+    """Test that a row prepended while its page loads is not inserted twice"""
+    try:
+        import time
+        import tkinter as tk
+        from collections import namedtuple
+        from gui_components import DataTreeview
+        
+        root = tk.Tk()
+        root.withdraw()
+        try:
+            Row = namedtuple('Row', ['id', 'name'])
+            rows = [Row(3, "Third"), Row(2, "Second"), Row(1, "First")]
+            tree = DataTreeview(root, columns=("name",), show="headings")
+            tree.set_page_source(
+                lambda key, limit, forward: rows if key is None else [],
+                lambda row: row.id,
+                lambda row: [row.name],
+                row_id=lambda row: row.id
+            )
+            
+            # A new row is announced before the first page arrives
+            tree.prepend_row(rows[0])
+            
+            deadline = time.time() + 5
+            while tree._loading and time.time() < deadline:
+                root.update()
+                time.sleep(0.01)
+            
+            shown = list(tree.get_children())
+            if shown != ["3", "2", "1"]:
+                print(f"❌ Tree shows {shown}, expected ['3', '2', '1']")
+                return False
+        finally:
+            root.destroy()
+        
+        print("✅ Rows already shown are not inserted twice")
+        return True
+    except Exception as e:
+        print(f"❌ Tree duplicate rows test failed: {e}")
+        return False
+
 def main():
     """Run all tests"""
     print("🧪 Law Office Management System - Installation Test")
@@ -106,6 +219,24 @@ def main():
     
     print()
     
+    # Test database indexes
+    if not test_database_indexes():
+        success = False
+    
+    print()
+    
+    # Test nested transactions
+    if not test_nested_transactions():
+        success = False
+    
+    print()
+    
+    # Test paged tree rows
+    if not test_tree_duplicate_rows():
+        success = False
+    
+    print()
+    
     # Test GUI
     if not test_gui():
         success = False
@@ -0,0 +1,43 @@
+"""
+Arabic text shaping for display, with a bounded LRU cache
+
+Reshaping and the BiDi algorithm are slow relative to how often the same
+strings (client names, courts, statuses, translated labels) are drawn, so
+results are memoized per (text, language).
+"""
+from functools import lru_cache
+import arabic_reshaper
+from bidi.algorithm import get_display
+from config import TEXT_SHAPING_CACHE_SIZE
+
+@lru_cache(maxsize=TEXT_SHAPING_CACHE_SIZE)
+def _shape(text, language):
+    """Reshape Arabic text and apply the BiDi algorithm"""
+    try:
+        return get_display(arabic_reshaper.reshape(text))
+    except Exception:
+        return text
+
+def shape_text(text, language="ar"):
+    """Get the display form of text for a right-to-left language"""
+    return _shape(str(text), language)
+
+def shape_text_uncached(text):
+    """Shape text without touching the cache (for benchmarks)"""
+    return _shape.__wrapped__(str(text), None)
+
+def clear_cache():
+    """Drop all cached shaping results"""
+    _shape.cache_clear()
+
+def get_cache_stats():
+    """Get cache hit/miss counters"""
+    info = _shape.cache_info()
+    lookups = info.hits + info.misses
+    return {
+        'hits': info.hits,
+        'misses': info.misses,
+        'size': info.currsize,
+        'max_size': info.maxsize,
+        'hit_rate': info.hits / lookups if lookups else 0.0,
+    }